@@ -0,0 +1,230 @@
+"""
+;==========================================
+; Title:  benchmark.py
+; Author: zSavT
+; Date:   18/10/2026
+;==========================================
+
+Misura i tempi di creazione, verifica, backup e installazione del pacchetto
+su un albero di file sintetico con la stessa forma di quello reale: migliaia
+di file piccoli (testi), centinaia di texture DDS e pochi archivi PAR grandi.
+
+Non usa Qt, quindi funziona anche su una macchina Linux senza display.
+I dati sono generati in modo deterministico (seed fisso), così i risultati di
+versioni diverse sono confrontabili. Esempi:
+
+    python benchmark.py                              # scala predefinita
+    python benchmark.py --scale 0.1 --repeat 1       # prova veloce
+    python benchmark.py --save-baseline base.json    # salva i tempi come riferimento
+    python benchmark.py --compare base.json          # confronta con il riferimento
+
+Con --compare lo script termina con codice 1 se almeno una misura è più lenta
+del riferimento oltre la tolleranza (--tolerance, predefinita 15%).
+"""
+
+import os       # Per percorsi e dimensioni dei file
+import sys      # Per il codice di uscita
+import json     # Per salvare e leggere i tempi di riferimento
+import time     # Per misurare i tempi
+import random   # Per generare i dati sintetici in modo deterministico
+import shutil   # Per copiare e rimuovere le cartelle di prova
+import argparse # Per le opzioni da riga di comando
+import tempfile # Per la cartella di lavoro
+import platform # Per descrivere la macchina nei risultati
+import statistics
+import contextlib
+
+import packager
+from installer_core import InstallEngine, check_package, restore_originals, CHECK_VALID, INSTALL_RECORD
+
+# --- Costanti Globali ---
+BENCH_KEY = b"benchmark-key-0123456789abcdef!!"  # Chiave usata solo per i pacchetti di prova
+SEED = 4                                         # Seed dei dati sintetici
+DEFAULT_TOLERANCE = 0.15                         # Rallentamento massimo rispetto al riferimento
+# Forma dell'albero sintetico alla scala 1.0: (numero di file, dimensione minima, dimensione massima)
+TREE_SHAPE = {
+    "small": (3000, 512, 16 * 1024),             # File di testo estratti dai PAR (molto comprimibili)
+    "dds": (300, 64 * 1024, 1024 * 1024),        # Texture DDS (poco comprimibili, salvate solo cifrate)
+    "par": (3, 48 * 1024 * 1024, 96 * 1024 * 1024),  # Archivi PAR grandi
+}
+WORKER_COUNTS = sorted({1, os.cpu_count() or 1})
+
+
+def _text_block(rng, size):
+    words = [b"Kiryu", b"Akiyama", b"Saejima", b"Tanimura", b"Kamurocho", b"soldi", b"missione", b"<Color:Red>", b"\n"]
+    out = bytearray()
+    while len(out) < size:
+        out += rng.choice(words) + b" "
+    return bytes(out[:size])
+
+
+def _binary_block(rng, size):
+    # Metà dati casuali e metà ripetuti, come una texture compressa con header e padding
+    half = size // 2
+    return rng.randbytes(half) + bytes(size - half)
+
+
+def generate_tree(root, scale=1.0, seed=SEED):
+    """
+    Genera l'albero sintetico in 'root'.
+
+    Returns:
+        dict: Numero di file e byte totali per ciascun tipo.
+    """
+    rng = random.Random(seed)
+    stats = {}
+    for kind, (count, min_size, max_size) in TREE_SHAPE.items():
+        count = max(1, int(count * scale))
+        total = 0
+        for i in range(count):
+            size = max(1, int(rng.randint(min_size, max_size) * (scale if kind == "par" else 1)))
+            if kind == "small":
+                path = os.path.join(root, "data", "auth", f"scene{i % 40:02d}", f"msg{i:05d}.bin")
+                data = _text_block(rng, size)
+            elif kind == "dds":
+                path = os.path.join(root, "data", "chara", f"tex{i % 10}", f"tex{i:04d}.dds")
+                data = _binary_block(rng, size)
+            else:
+                path = os.path.join(root, "data", "stage", f"archive{i}.par")
+                data = _binary_block(rng, size)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f: f.write(data)
+            total += size
+        stats[kind] = {"files": count, "bytes": total}
+    return stats
+
+
+def timed(function, repeat, setup=None):
+    """Esegue function() 'repeat' volte (dopo setup(), se indicato) e ritorna la mediana dei tempi."""
+    times = []
+    for _ in range(repeat):
+        if setup: setup()
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def run_benchmarks(work_dir, scale, repeat):
+    """
+    Esegue tutte le misure.
+
+    Returns:
+        dict: {nome della misura: secondi (mediana)}.
+    """
+    source = os.path.join(work_dir, "source")
+    package = os.path.join(work_dir, "patch.pkg")
+    dest = os.path.join(work_dir, "dest")
+    vanilla = os.path.join(work_dir, "vanilla")
+    print(f"Generazione albero sintetico (scala {scale})...")
+    stats = generate_tree(source, scale)
+    for kind, info in stats.items():
+        print(f"   {kind}: {info['files']} file, {info['bytes'] / (1024 * 1024):.1f} MB")
+    # I file "originali" del gioco: stessi percorsi, contenuto diverso
+    generate_tree(vanilla, scale, seed=SEED + 1)
+    results = {}
+
+    def quiet(function):
+        def wrapper():
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                result = function()
+            return result
+        return wrapper
+
+    def expect_success(result):
+        if not result[0]:
+            raise RuntimeError(f"Operazione fallita durante il benchmark: {result[1]}")
+
+    for workers in WORKER_COUNTS:
+        name = f"package_build_w{workers}"
+        print(f"-> {name}")
+        results[name] = timed(quiet(lambda: packager.create_encrypted_package(source, package, BENCH_KEY, workers=workers)), repeat,
+                              setup=lambda: os.path.exists(package) and os.remove(package))
+
+    print("-> package_verify")
+    def verify():
+        esito, dettaglio = check_package(package, BENCH_KEY)
+        if esito != CHECK_VALID: raise RuntimeError(f"Verifica fallita: {esito} {dettaglio}")
+    results["package_verify"] = timed(quiet(verify), repeat)
+
+    def reset_dest():
+        shutil.rmtree(dest, ignore_errors=True)
+        shutil.copytree(vanilla, dest)
+
+    def install(workers, backup, incremental=True):
+        return quiet(lambda: expect_success(InstallEngine(dest, BENCH_KEY, backup, package, workers, incremental).run()))
+
+    for workers in WORKER_COUNTS:
+        name = f"install_w{workers}"
+        print(f"-> {name}")
+        results[name] = timed(install(workers, False), repeat, setup=reset_dest)
+    workers = WORKER_COUNTS[-1]
+    print("-> install_backup")
+    results["install_backup"] = timed(install(workers, True), repeat, setup=reset_dest)
+    print("-> install_unchanged (incrementale, nessun file da estrarre)")
+    results["install_unchanged"] = timed(install(workers, False), repeat)
+    print("-> install_full_reinstall")
+    results["install_full_reinstall"] = timed(install(workers, False, incremental=False), repeat)
+    print("-> restore")
+    def install_with_backup():
+        reset_dest(); install(workers, True)()
+    def restore():
+        expect_success(restore_originals(dest))
+        if os.path.exists(os.path.join(dest, INSTALL_RECORD)):
+            raise RuntimeError(f"Registro '{INSTALL_RECORD}' rimasto dopo il ripristino")
+    results["restore"] = timed(quiet(restore), repeat, setup=install_with_backup)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Stampa il confronto con i tempi di riferimento. Ritorna True se non ci sono regressioni."""
+    ok = True
+    print(f"\n{'misura':<28}{'riferimento':>12}{'attuale':>12}{'variazione':>12}")
+    for name, seconds in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            print(f"{name:<28}{'-':>12}{seconds:>11.3f}s{'nuova':>12}")
+            continue
+        change = (seconds - reference) / reference if reference > 0 else 0.0
+        flag = ""
+        if change > tolerance:
+            flag = "  <-- REGRESSIONE"; ok = False
+        print(f"{name:<28}{reference:>11.3f}s{seconds:>11.3f}s{change:>+11.1%}{flag}")
+    return ok
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark di creazione e installazione del pacchetto della patch.")
+    parser.add_argument("--scale", type=float, default=1.0, help="Fattore di scala dell'albero sintetico (predefinito: 1.0).")
+    parser.add_argument("--repeat", type=int, default=3, help="Ripetizioni di ogni misura; si usa la mediana (predefinito: 3).")
+    parser.add_argument("--work-dir", help="Cartella di lavoro (predefinita: temporanea, rimossa alla fine).")
+    parser.add_argument("--save-baseline", metavar="FILE", help="Salva i risultati come tempi di riferimento.")
+    parser.add_argument("--compare", metavar="FILE", help="Confronta i risultati con i tempi di riferimento.")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Rallentamento tollerato nel confronto (predefinito: 0.15).")
+    args = parser.parse_args(argv)
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="patch_ita_bench_")
+    try:
+        results = run_benchmarks(work_dir, args.scale, max(1, args.repeat))
+    finally:
+        if not args.work_dir: shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        "machine": {"platform": platform.platform(), "python": platform.python_version(), "cpu_count": os.cpu_count()},
+        "scale": args.scale, "repeat": args.repeat, "results": {name: round(seconds, 4) for name, seconds in results.items()},
+    }
+    print("\n" + json.dumps(report, indent=1))
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f: json.dump(report, f, indent=1)
+        print(f"Tempi di riferimento salvati in '{args.save_baseline}'.")
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f: baseline = json.load(f)
+        if baseline.get("scale") != args.scale:
+            print(f"Avviso: il riferimento è stato misurato con scala {baseline.get('scale')}, non {args.scale}.")
+        if not compare(report["results"], baseline["results"], args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
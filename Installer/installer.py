@@ -11,13 +11,14 @@ import os
 import platform
 import webbrowser
 import subprocess
-import traceback
-import shutil
-import datetime
-import pyzipper
 import urllib.request
 import json
 from packaging import version
+from installer_core import (
+    resource_path, leggi_chiave, recover_journal, check_package, restore_originals, format_eta, InstallEngine, Profiler, log_path,
+    CHIAVE, PACKAGE_FILE, BACKUP_STORE, BACKUP_INDEX, EXTRACT_WORKERS,
+    CHECK_VALID, CHECK_CORRUPT, CHECK_BAD_KEY, CHECK_ERROR, CHECK_CANCELLED
+)
 
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QLabel, QPushButton, QVBoxLayout, QFrame,
@@ -48,19 +49,8 @@ def apri_url(url):
     except Exception as e:
         print(f"Impossibile aprire il browser per {url}: {e}")
 
-# --- Funzione Resource Path ---
-def resource_path(relative_path):
-    try:
-        base_path = sys._MEIPASS
-    except Exception:
-        base_path = os.path.abspath(".")
-    return os.path.join(base_path, relative_path)
-
 # --- Costanti Globali ---
-CHIAVE = "chiave.txt"
 DEFAULT_FOLDER_NAME = ""
-LOG_FILE = "install_log.txt"
-PACKAGE_FILE = "patch.pkg"
 IMG_FILE = resource_path("assets/img.png")
 LOGO_ICO = resource_path("assets/Logo.ico")
 HEAD_ICON_PATH = resource_path("assets/head_icon.png")
@@ -219,25 +209,6 @@ QScrollBar::add-line:horizontal, QScrollBar::sub-line:horizontal {{ width: 0px;
 QScrollBar::add-page:horizontal, QScrollBar::sub-page:horizontal {{ background: none; }}
 """
 
-def leggi_chiave(nome_file):
-    try:
-        if not os.path.exists(nome_file):
-            print(f"Errore: Il file '{nome_file}' non esiste.")
-            return None
-        if not os.access(nome_file, os.R_OK):
-            print(f"Errore: Il file '{nome_file}' non ha i permessi di lettura.")
-            return None
-        with open(nome_file, 'r') as file:
-            chiave = file.readline().strip()
-        if not chiave:
-            print(f"Avviso: Il file '{nome_file}' è vuoto o non contiene una chiave valida.")
-            return None
-        print(f"Chiave di decriptazione letta con successo dal file '{nome_file}'.")
-        return chiave.encode('utf-8')
-    except Exception as e:
-        print(f"Si è verificato un errore durante la lettura del file '{nome_file}': {e}")
-        return None
-
 class VersionCheckWorker(QThread):
     update_found = pyqtSignal(str, str)
     def __init__(self, current_version, repo_url):
@@ -303,113 +274,62 @@ class VersionCheckWorker(QThread):
         except Exception as e:
             print(f"Impossibile controllare gli aggiornamenti: {e}")
 
+class PackageCheckWorker(QThread):
+    """
+    Verifica il pacchetto della patch in background (vedi installer_core.check_package).
+    L'esito è emesso con finished(esito, dettaglio).
+    """
+    progress = pyqtSignal(int)
+    finished = pyqtSignal(str, str)
+    def __init__(self, package_path, aes_key):
+        super().__init__()
+        self.package_path = package_path
+        self.aes_key = aes_key
+        self._is_interruption_requested = False
+    def requestInterruption(self):
+        self._is_interruption_requested = True
+    def isInterruptionRequested(self):
+        return self._is_interruption_requested
+    def run(self):
+        profiler = Profiler.from_env()
+        result = check_package(self.package_path, self.aes_key, self.progress.emit, self.isInterruptionRequested, profiler)
+        profiler.write()
+        self.finished.emit(*result)
+
 class InstallWorker(QThread):
+    """Esegue l'installazione (installer_core.InstallEngine) in background."""
     progress = pyqtSignal(int)
     finished = pyqtSignal(bool, str)
     backup_status = pyqtSignal(str)
-    def __init__(self, dest_path, aes_key, do_backup, package_filename):
+    throughput = pyqtSignal(float, float) # MB/s, secondi rimanenti
+    def __init__(self, dest_path, aes_key, do_backup, package_filename, workers=EXTRACT_WORKERS, incremental=True):
+        super().__init__()
+        self.engine = InstallEngine(dest_path, aes_key, do_backup, resource_path(package_filename), workers, incremental,
+                                    on_progress=self.progress.emit, on_status=self.backup_status.emit, on_throughput=self.throughput.emit,
+                                    profiler=Profiler.from_env())
+    def requestInterruption(self):
+        self.engine.requestInterruption()
+    def isInterruptionRequested(self):
+        return self.engine.isInterruptionRequested()
+    def run(self):
+        result = self.engine.run()
+        self.engine.profiler.write()
+        self.finished.emit(*result)
+
+class RestoreWorker(QThread):
+    """Ripristina in background i file originali (installer_core.restore_originals)."""
+    progress = pyqtSignal(int)
+    finished = pyqtSignal(bool, str)
+    def __init__(self, dest_path):
         super().__init__()
         self.dest_path = dest_path
-        self.aes_key = aes_key
-        self.do_backup = do_backup
-        self.package_filename = package_filename
         self._is_interruption_requested = False
     def requestInterruption(self):
         self._is_interruption_requested = True
     def isInterruptionRequested(self):
         return self._is_interruption_requested
     def run(self):
-        try:
-            package_path = resource_path(self.package_filename)
-            if not os.path.exists(package_path):
-                raise FileNotFoundError(f"File della patch non trovato: {self.package_filename}")
-            with pyzipper.AESZipFile(package_path) as zf:
-                zf.setpassword(self.aes_key)
-                file_infos = zf.infolist()
-                total_files = len(file_infos)
-                if self.do_backup:
-                    self.backup_status.emit("Avvio backup file originali...")
-                    backup_folder_name = f"_backup_patch_ita_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}"
-                    backup_base_path = os.path.join(self.dest_path, backup_folder_name)
-                    backup_count = 0
-                    try:
-                        os.makedirs(backup_base_path, exist_ok=True)
-                        print(f"Creata cartella backup: {backup_base_path}")
-                        for file_info in file_infos:
-                            if self.isInterruptionRequested():
-                                self.finished.emit(False, "Backup annullato dall'utente.")
-                                return
-                            if not file_info.is_dir():
-                                source_file_path = os.path.join(self.dest_path, file_info.filename)
-                                if os.path.isfile(source_file_path):
-                                    backup_file_path = os.path.join(backup_base_path, file_info.filename)
-                                    backup_file_dir = os.path.dirname(backup_file_path)
-                                    os.makedirs(backup_file_dir, exist_ok=True)
-                                    print(f"Backing up: {source_file_path} -> {backup_file_path}")
-                                    shutil.copy2(source_file_path, backup_file_path)
-                                    backup_count += 1
-                        if backup_count > 0:
-                            self.backup_status.emit(f"Backup di {backup_count} file completato in '{backup_folder_name}'.")
-                            print(f"Backup completato: {backup_count} file.")
-                        else:
-                            self.backup_status.emit("Nessun file originale trovato da backuppare.")
-                            print("Nessun file da backuppare.")
-                    except (shutil.Error, OSError, IOError) as backup_error:
-                        error_msg = f"Errore durante il backup:\n{backup_error}"
-                        print(f"Errore backup: {error_msg}")
-                        with open(LOG_FILE, 'a', encoding='utf-8') as f: f.write(error_msg + "\n")
-                        self.finished.emit(False, error_msg + "\nL'installazione è stata interrotta.")
-                        return
-                if total_files == 0:
-                    self.finished.emit(True, "Installazione completata (archivio vuoto).")
-                    return
-                for i, file_info in enumerate(file_infos):
-                    if self.isInterruptionRequested():
-                        self.finished.emit(False, "Installazione annullata dall'utente.")
-                        return
-                    file = file_info.filename
-                    target_path = os.path.join(self.dest_path, file)
-                    if file_info.is_dir():
-                        os.makedirs(target_path, exist_ok=True)
-                        self.progress.emit(int(((i + 1) / total_files) * 100))
-                        continue
-                    os.makedirs(os.path.dirname(target_path), exist_ok=True)
-                    try:
-                        with zf.open(file_info) as source, open(target_path, "wb") as target:
-                            chunk_size = 1024 * 512
-                            while True:
-                                if self.isInterruptionRequested():
-                                    try:
-                                        target.close()
-                                        os.remove(target_path)
-                                    except OSError: pass
-                                    self.finished.emit(False, "Installazione annullata dall'utente.")
-                                    return
-                                chunk = source.read(chunk_size)
-                                if not chunk: break
-                                target.write(chunk)
-                    except Exception as write_error:
-                         raise IOError(f"Errore scrittura file {target_path}: {write_error}") from write_error
-                    self.progress.emit(int(((i + 1) / total_files) * 100))
-            if not self.isInterruptionRequested():
-                self.finished.emit(True, "Installazione completata con successo!")
-        except FileNotFoundError as e:
-             with open(LOG_FILE, 'a', encoding='utf-8') as f: f.write(f"Errore FileNotFoundError: {str(e)}\n")
-             self.finished.emit(False, str(e))
-        except (pyzipper.BadZipFile, RuntimeError) as e:
-            error_msg = f"Errore: {self.package_filename} è corrotto, la chiave AES usata non è valida o file zip non valido."
-            with open(LOG_FILE, 'a', encoding='utf-8') as f: f.write(f"{error_msg} Dettaglio: {type(e).__name__}: {str(e)}\n")
-            self.finished.emit(False, error_msg)
-        except IOError as e:
-            error_msg = f"Errore di I/O durante l'estrazione:\n{str(e)}"
-            with open(LOG_FILE, 'a', encoding='utf-8') as f: f.write(error_msg + "\n")
-            self.finished.emit(False, error_msg + "\nVerifica permessi e spazio disco.")
-        except Exception as e:
-            error_msg = f"Errore imprevisto durante l'estrazione:\n{type(e).__name__}: {str(e)}"
-            with open(LOG_FILE, 'a', encoding='utf-8') as f:
-                f.write(error_msg + "\n")
-                traceback.print_exc(file=f)
-            self.finished.emit(False, error_msg)
+        self.finished.emit(*restore_originals(self.dest_path, self.progress.emit, self.isInterruptionRequested))
 
 class PirateWarningDialog(QDialog):
     def __init__(self, parent=None):
@@ -578,7 +498,14 @@ class PackageCheckScreen(QWidget):
         try: self.next_btn.setIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_ArrowRight))
         except Exception: pass
         btn_layout.addWidget(self.cancel_btn); btn_layout.addStretch(); btn_layout.addWidget(self.next_btn)
-        layout.addWidget(title); layout.addSpacing(20); layout.addWidget(self.status_label); layout.addWidget(self.key_input_widget); layout.addSpacing(10); layout.addLayout(retry_layout); layout.addStretch(); layout.addLayout(btn_layout)
+        self.check_progress = QProgressBar(); self.check_progress.setRange(0, 100); self.check_progress.setTextVisible(False); self.check_progress.setFixedHeight(8); self.check_progress.setVisible(False)
+        self.check_worker = None; self.checked_package = PACKAGE_FILE
+        self.check_cache = {} # Esiti già calcolati, per (percorso, mtime, dimensione, chiave)
+        layout.addWidget(title); layout.addSpacing(20); layout.addWidget(self.status_label); layout.addWidget(self.check_progress); layout.addWidget(self.key_input_widget); layout.addSpacing(10); layout.addLayout(retry_layout); layout.addStretch(); layout.addLayout(btn_layout)
+    def stop_check(self):
+        if self.check_worker and self.check_worker.isRunning():
+            self.check_worker.requestInterruption(); self.check_worker.wait()
+        self.check_worker = None; self.check_progress.setVisible(False)
     def check_package(self, package_to_check=PACKAGE_FILE):
         if self.key_input_widget.isVisible():
             new_key_text = self.key_input_field.text(); key_changed = False
@@ -598,24 +525,38 @@ class PackageCheckScreen(QWidget):
             self.status_label.setText(f"<font color='#ff8080'>❌ Errore: Chiave AES non disponibile.</font><br><font color='#bbccd0' size='-1'>Impossibile leggere {CHIAVE} e nessuna chiave inserita.</font>")
             self.next_btn.setEnabled(False); self.retry_btn.setVisible(True); self.key_input_widget.setVisible(True); self.key_input_field.setFocus(); return
         if os.path.isfile(package_path):
-            try:
-                with pyzipper.AESZipFile(package_path) as zf: zf.setpassword(aes_key_to_use); test = zf.testzip()
-                if test is None:
-                    self.status_label.setText(f"<font color='#228B22'>✔️ File '{package_to_check}' valido.</font>")
-                    self.next_btn.setEnabled(True); self.retry_btn.setVisible(False); self.key_input_widget.setVisible(False)
-                else:
-                    self.status_label.setText(f"<font color='#ffd880'>⚠️ File '{package_to_check}' corrotto (file: {test}).</font><br><font color='#bbccd0' size='-1'>Riscrivi la patch.</font>")
-                    self.next_btn.setEnabled(False); self.retry_btn.setVisible(True); self.key_input_widget.setVisible(False)
-            except (pyzipper.BadZipFile, RuntimeError) as e:
-                 print(f"Package check bad key/zip error: {type(e).__name__}")
-                 self.status_label.setText(f"<font color='#ffd880'>⚠️ Chiave AES non valida o archivio corrotto.</font><br><font color='#bbccd0' size='-1'>Inserisci chiave corretta e riprova.</font>")
-                 self.next_btn.setEnabled(False); self.retry_btn.setVisible(True); self.key_input_widget.setVisible(True); self.key_input_field.setFocus()
-            except Exception as e:
-                 self.status_label.setText(f"<font color='#ff8080'>❌ Errore verifica: {type(e).__name__}</font>")
-                 self.next_btn.setEnabled(False); self.retry_btn.setVisible(True); self.key_input_widget.setVisible(False); print(f"Pkg check err: {e}"); traceback.print_exc()
+            st = os.stat(package_path); cache_key = (package_path, st.st_mtime_ns, st.st_size, aes_key_to_use)
+            self.checked_package = package_to_check
+            if cache_key in self.check_cache:
+                print("Esito verifica pacchetto già disponibile, controllo saltato."); self.show_check_result(*self.check_cache[cache_key]); return
+            self.stop_check(); self.next_btn.setEnabled(False); self.check_progress.setValue(0); self.check_progress.setVisible(True)
+            self.check_worker = PackageCheckWorker(package_path, aes_key_to_use)
+            self.check_worker.progress.connect(self.check_progress.setValue)
+            self.check_worker.finished.connect(lambda esito, dettaglio, worker=self.check_worker: self.on_check_finished(worker, cache_key, esito, dettaglio))
+            self.check_worker.start()
         else:
             self.status_label.setText(f"<font color='#ff8080'>❌ File '{package_to_check}' non trovato.</font><br><font color='#bbccd0' size='-1'>Controlla cartella installer.</font>")
             self.next_btn.setEnabled(False); self.retry_btn.setVisible(False); self.key_input_widget.setVisible(False)
+    def on_check_finished(self, worker, cache_key, esito, dettaglio):
+        if worker is not self.check_worker: return # Esito di un controllo sostituito da uno più recente
+        self.check_worker = None; self.check_progress.setVisible(False)
+        if esito == CHECK_CANCELLED: return
+        if esito != CHECK_ERROR: self.check_cache[cache_key] = (esito, dettaglio)
+        self.show_check_result(esito, dettaglio)
+    def show_check_result(self, esito, dettaglio):
+        package_to_check = self.checked_package
+        if esito == CHECK_VALID:
+            self.status_label.setText(f"<font color='#228B22'>✔️ File '{package_to_check}' valido.</font>")
+            self.next_btn.setEnabled(True); self.retry_btn.setVisible(False); self.key_input_widget.setVisible(False)
+        elif esito == CHECK_CORRUPT:
+            self.status_label.setText(f"<font color='#ffd880'>⚠️ File '{package_to_check}' corrotto (file: {dettaglio}).</font><br><font color='#bbccd0' size='-1'>Riscrivi la patch.</font>")
+            self.next_btn.setEnabled(False); self.retry_btn.setVisible(True); self.key_input_widget.setVisible(False)
+        elif esito == CHECK_BAD_KEY:
+            self.status_label.setText(f"<font color='#ffd880'>⚠️ Chiave AES non valida o archivio corrotto.</font><br><font color='#bbccd0' size='-1'>Inserisci chiave corretta e riprova.</font>")
+            self.next_btn.setEnabled(False); self.retry_btn.setVisible(True); self.key_input_widget.setVisible(True); self.key_input_field.setFocus()
+        else:
+            self.status_label.setText(f"<font color='#ff8080'>❌ Errore verifica: {dettaglio}</font>")
+            self.next_btn.setEnabled(False); self.retry_btn.setVisible(True); self.key_input_widget.setVisible(False)
 
 class NoticeScreen(QWidget):
     def __init__(self):
@@ -681,13 +622,16 @@ class InstallScreen(QWidget):
         self.browse_btn.setFixedSize(34, 34); self.browse_btn.setToolTip("Sfoglia cartelle"); self.browse_btn.clicked.connect(self.select_folder)
         path_layout = QHBoxLayout(); path_layout.addWidget(path_label); path_layout.addStretch()
         path_input_layout = QHBoxLayout(); path_input_layout.addWidget(self.path_input, 1); path_input_layout.addSpacing(5); path_input_layout.addWidget(self.browse_btn)
-        self.backup_checkbox = QCheckBox("Crea backup dei file originali prima dell'installazione"); self.backup_checkbox.setChecked(True); self.backup_checkbox.setToolTip("Se selezionato, i file che verranno sovrascritti dalla patch\nsaranno prima copiati in una sottocartella '_backup_patch_ita_...'")
+        self.backup_checkbox = QCheckBox("Crea backup dei file originali prima dell'installazione"); self.backup_checkbox.setChecked(True); self.backup_checkbox.setToolTip(f"Se selezionato, i file che verranno sovrascritti dalla patch\nsaranno prima salvati nella sottocartella '{BACKUP_STORE}'")
         self.install_btn = QPushButton("Installa Patch"); self.install_btn.setObjectName("InstallButton"); self.install_btn.setDefault(True)
         try: self.install_btn.setIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_DialogSaveButton))
         except Exception as e: print(f"Err install icon: {e}")
         self.cancel_btn = QPushButton("Annulla"); self.cancel_btn.setObjectName("CancelButton")
         try: self.cancel_btn.setIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_DialogCancelButton))
         except Exception as e: print(f"Err cancel icon: {e}")
+        self.restore_btn = QPushButton("Ripristina Originali"); self.restore_btn.setToolTip(f"Ripristina i file originali salvati in '{BACKUP_STORE}'\n(rimuove la patch dalla cartella selezionata)")
+        try: self.restore_btn.setIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_BrowserReload))
+        except Exception as e: print(f"Err restore icon: {e}")
         self.progress_bar = QProgressBar(); self.progress_bar.setValue(0); self.progress_bar.setTextVisible(False)
         self.status_label = QLabel("Pronto per l'installazione."); self.status_label.setObjectName("StatusLabel"); self.status_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.head_icon = QLabel(self); self.head_icon.setObjectName("HeadIcon")
@@ -697,7 +641,7 @@ class InstallScreen(QWidget):
             self.head_icon.setFixedSize(24, 24); self.head_icon.setAlignment(Qt.AlignmentFlag.AlignCenter); self.head_icon.hide()
             self.head_icon.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents); self.progress_bar.valueChanged.connect(self.update_icon_position)
         except Exception as e: print(f"Err head icon: {e}")
-        btn_layout = QHBoxLayout(); btn_layout.addWidget(self.cancel_btn); btn_layout.addStretch(); btn_layout.addWidget(self.install_btn)
+        btn_layout = QHBoxLayout(); btn_layout.addWidget(self.cancel_btn); btn_layout.addStretch(); btn_layout.addWidget(self.restore_btn); btn_layout.addWidget(self.install_btn)
         self.layout.addLayout(title_layout); self.layout.addLayout(path_layout); self.layout.addLayout(path_input_layout); self.layout.addSpacing(10)
         self.layout.addWidget(self.backup_checkbox); self.layout.addSpacing(20)
         self.layout.addWidget(self.progress_bar); self.layout.addWidget(self.status_label); self.layout.addStretch(); self.layout.addLayout(btn_layout)
@@ -768,9 +712,14 @@ class InstallerWizard(QWidget):
         self.hidden_key_button = QPushButton(self); self.hidden_key_button.setObjectName("HiddenKeyButton"); self.hidden_key_button.setFixedSize(10, 10); self.hidden_key_button.setFlat(True)
         self.hidden_key_button.setToolTip("Inserisci chiave AES personalizzata"); self.hidden_key_button.setStyleSheet("background-color:transparent;border:none;"); self.hidden_key_button.clicked.connect(self.show_custom_key_dialog); self.hidden_key_button.raise_()
         self.welcome.next_btn.clicked.connect(lambda: self.stack.setCurrentWidget(self.notice)); self.notice.next_btn.clicked.connect(self.go_to_check); self.notice.back_btn.clicked.connect(lambda: self.stack.setCurrentWidget(self.welcome))
-        self.check_pkg.next_btn.clicked.connect(lambda: self.stack.setCurrentWidget(self.license)); self.license.next_btn.clicked.connect(lambda: self.stack.setCurrentWidget(self.install)); self.install.install_btn.clicked.connect(self.confirm_installation)
+        self.check_pkg.next_btn.clicked.connect(lambda: self.stack.setCurrentWidget(self.license)); self.license.next_btn.clicked.connect(lambda: self.stack.setCurrentWidget(self.install)); self.install.install_btn.clicked.connect(self.confirm_installation); self.install.restore_btn.clicked.connect(self.confirm_restore)
         self.welcome.cancel_btn.clicked.connect(self.close); self.notice.cancel_btn.clicked.connect(self.close); self.check_pkg.cancel_btn.clicked.connect(self.close)
         self.license.cancel_btn.clicked.connect(self.close); self.install.cancel_btn.clicked.connect(self.handle_cancel_install); self.position_hidden_button()
+        # Completa o annulla un'eventuale installazione interrotta nella cartella predefinita
+        try:
+            recovered = recover_journal(os.path.normpath(self.install.path_input.text()))
+            if recovered: self.install.status_label.setText(recovered)
+        except OSError as e: print(f"Recupero installazione interrotta fallito: {e}")
     def show_update_dialog(self, new_version, url):
         msg_box = QMessageBox(self); msg_box.setWindowTitle("Aggiornamento Disponibile"); msg_box.setText(f"È disponibile una nuova versione della patch: <b>{new_version}</b>")
         msg_box.setInformativeText("Vuoi aprire la pagina di download per scaricarla?"); msg_box.setIcon(QMessageBox.Icon.Information)
@@ -844,20 +793,44 @@ class InstallerWizard(QWidget):
         if not self.current_aes_key: QMessageBox.critical(self, "Errore Chiave AES", f"Impossibile procedere: chiave AES non valida o non trovata ({CHIAVE})."); return
         try: os.makedirs(dest_path, exist_ok=True)
         except OSError as e: QMessageBox.critical(self, "Errore Cartella", f"Impossibile creare o accedere alla cartella di destinazione:\n{dest_path}\nErrore: {e}"); return
-        self.install.install_btn.setEnabled(False); self.install.cancel_btn.setText("Annulla"); self.install.cancel_btn.setObjectName("CancelButton")
+        self.install.install_btn.setEnabled(False); self.install.restore_btn.setEnabled(False); self.install.cancel_btn.setText("Annulla"); self.install.cancel_btn.setObjectName("CancelButton")
         self.install.path_input.setEnabled(False); self.install.browse_btn.setEnabled(False); self.install.backup_checkbox.setEnabled(False)
         self.install.status_label.setText("Avvio preparazione operazione..."); self.install.progress_bar.setValue(0); self.install.head_icon.hide()
         print(f"Avvio installazione del pacchetto: {PACKAGE_FILE}")
         self.install_worker = InstallWorker(dest_path, self.current_aes_key, do_backup, PACKAGE_FILE)
-        self.install_worker.progress.connect(self.update_progress); self.install_worker.finished.connect(self.on_finished); self.install_worker.backup_status.connect(self.update_backup_status); self.install_worker.start()
+        self.install_worker.progress.connect(self.update_progress); self.install_worker.finished.connect(self.on_finished); self.install_worker.backup_status.connect(self.update_backup_status); self.install_worker.throughput.connect(self.update_throughput)
+        self.throughput_text = ""; self.install_worker.start()
+    def confirm_restore(self):
+        dest_path = self.install.path_input.text()
+        if not dest_path: QMessageBox.warning(self, "Percorso Mancante", "Specifica la cartella di installazione."); return
+        dest_path = os.path.normpath(dest_path)
+        if not os.path.isfile(os.path.join(dest_path, BACKUP_STORE, BACKUP_INDEX)):
+            QMessageBox.information(self, "Nessun Backup", f"Nessun backup dei file originali trovato in:\n{dest_path}"); return
+        dialog = CustomConfirmDialog(parent=self, title="Ripristino File Originali", text=f"Ripristinare i file originali in:<br><br><b>{dest_path}</b>", informative_text="I file modificati dalla patch torneranno alla versione originale e quelli aggiunti verranno rimossi. Procedere?")
+        if dialog.exec() == QDialog.DialogCode.Accepted: self.perform_restore(dest_path)
+    def perform_restore(self, dest_path):
+        if self.install_worker and self.install_worker.isRunning(): return
+        self.install.install_btn.setEnabled(False); self.install.restore_btn.setEnabled(False); self.install.cancel_btn.setText("Annulla")
+        self.install.path_input.setEnabled(False); self.install.browse_btn.setEnabled(False); self.install.backup_checkbox.setEnabled(False)
+        self.install.status_label.setText("Ripristino dei file originali in corso..."); self.install.progress_bar.setValue(0); self.install.head_icon.hide()
+        self.install_worker = RestoreWorker(dest_path)
+        self.install_worker.progress.connect(self.install.progress_bar.setValue); self.install_worker.finished.connect(self.on_restore_finished); self.install_worker.start()
+    def on_restore_finished(self, success, message):
+        self.install.install_btn.setEnabled(True); self.install.restore_btn.setEnabled(True); self.install.cancel_btn.setText("Chiudi"); self.install.cancel_btn.setEnabled(True)
+        self.install.path_input.setEnabled(True); self.install.browse_btn.setEnabled(True); self.install.backup_checkbox.setEnabled(True); self.install.head_icon.hide()
+        self.install_worker = None; self.install.status_label.setText(message)
+        if success: self.install.progress_bar.setValue(100); QMessageBox.information(self, "Ripristino Completato", message)
+        elif message != "Ripristino annullato dall'utente.": self.install.progress_bar.setValue(0); QMessageBox.critical(self, "Errore Ripristino", f"{message}\n\nControlla il file '{log_path(os.path.normpath(self.install.path_input.text()))}' per maggiori dettagli tecnici.")
     def update_backup_status(self, message):
         self.install.status_label.setText(message); QApplication.processEvents()
+    def update_throughput(self, mb_per_s, eta):
+        self.throughput_text = f" - {mb_per_s:.1f} MB/s, circa {format_eta(eta)} rimanenti"
     def update_progress(self, value):
         self.install.progress_bar.setValue(value)
-        if value > 0 and value < 100: self.install.status_label.setText(f"Installazione in corso... {value}%")
+        if value > 0 and value < 100: self.install.status_label.setText(f"Installazione in corso... {value}%{self.throughput_text}")
         self.install.update_icon_position(value)
     def on_finished(self, success, message):
-        self.install.install_btn.setEnabled(True); self.install.cancel_btn.setText("Chiudi"); self.install.cancel_btn.setObjectName("CancelButton"); self.install.cancel_btn.setEnabled(True)
+        self.install.install_btn.setEnabled(True); self.install.restore_btn.setEnabled(True); self.install.cancel_btn.setText("Chiudi"); self.install.cancel_btn.setObjectName("CancelButton"); self.install.cancel_btn.setEnabled(True)
         self.install.path_input.setEnabled(True); self.install.browse_btn.setEnabled(True); self.install.backup_checkbox.setEnabled(True); self.install.head_icon.hide()
         self.install_worker = None
         if success:
@@ -872,13 +845,14 @@ class InstallerWizard(QWidget):
             elif "Errore durante il backup" in message:
                  self.install.status_label.setText("Errore durante il backup."); QMessageBox.critical(self, "Errore di Backup", message)
             else:
-                self.install.status_label.setText("Errore durante l'operazione."); QMessageBox.critical(self, "Errore", f"Si è verificato un errore:\n{message}\n\nControlla il file '{LOG_FILE}' per maggiori dettagli tecnici.")
+                self.install.status_label.setText("Errore durante l'operazione."); QMessageBox.critical(self, "Errore", f"Si è verificato un errore:\n{message}\n\nControlla il file '{log_path(os.path.normpath(self.install.path_input.text()))}' per maggiori dettagli tecnici.")
     def handle_cancel_install(self):
         if self.install_worker and self.install_worker.isRunning():
              msg_box=QMessageBox(self); msg_box.setWindowTitle("Annulla Operazione"); msg_box.setText("Interrompere l'operazione in corso?"); msg_box.setIcon(QMessageBox.Icon.Question); msg_box.setStandardButtons(QMessageBox.StandardButton.Yes|QMessageBox.StandardButton.No); msg_box.setDefaultButton(QMessageBox.StandardButton.No); yes_b=msg_box.button(QMessageBox.StandardButton.Yes); yes_b.setObjectName("CancelButton"); no_b=msg_box.button(QMessageBox.StandardButton.No); no_b.setObjectName("AcceptButton");
              if msg_box.exec()==QMessageBox.StandardButton.Yes: self.install_worker.requestInterruption(); self.install.status_label.setText("Annullamento in corso..."); self.install.cancel_btn.setEnabled(False)
         else: self.close()
     def closeEvent(self, event):
+        self.check_pkg.stop_check()
         if self.install_worker and self.install_worker.isRunning():
             msg_box=QMessageBox(self); msg_box.setWindowTitle("Operazione In Corso"); msg_box.setText("Operazione in corso. Interrompere e uscire?"); msg_box.setIcon(QMessageBox.Icon.Warning); msg_box.setStandardButtons(QMessageBox.StandardButton.Yes|QMessageBox.StandardButton.No); msg_box.setDefaultButton(QMessageBox.StandardButton.No); yes_b=msg_box.button(QMessageBox.StandardButton.Yes); yes_b.setObjectName("CancelButton"); no_b=msg_box.button(QMessageBox.StandardButton.No); no_b.setObjectName("AcceptButton");
             if msg_box.exec()==QMessageBox.StandardButton.Yes: self.install_worker.requestInterruption(); event.accept()
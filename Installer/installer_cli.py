@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+
+# -----------------------------------------------------------------------------
+# Installer Patch ITA Yakuza 4 Remastered - Riga di comando
+# Autore: SavT
+# -----------------------------------------------------------------------------
+#
+# Installazione, verifica del pacchetto e ripristino dei file originali senza
+# interfaccia grafica (non importa Qt). Esempi:
+#
+#   python installer_cli.py verify
+#   python installer_cli.py install --dest "/percorso/Yakuza 4/data" --no-backup
+#   python installer_cli.py --json install --dest ... --key-file chiave.txt
+#   python installer_cli.py restore --dest ...
+#
+# Con --json ogni evento è una riga JSON su stdout ({"event": "status" | "progress"
+# | "result", ...}); i messaggi di diagnostica vanno su stderr.
+# Con --profile FILE (o la variabile d'ambiente PATCH_ITA_PROFILE) i tempi di ogni
+# fase vengono aggiunti al file indicato come righe JSON.
+# Codici di uscita: 0 successo, 1 errore, 130 operazione annullata (Ctrl+C).
+
+import sys
+import os
+import time
+import json
+import argparse
+import threading
+import traceback
+import contextlib
+
+from installer_core import (
+    resource_path, leggi_chiave, check_package, restore_originals, format_eta, InstallEngine, Profiler,
+    CHIAVE, PACKAGE_FILE, EXTRACT_WORKERS, PROFILE_ENV, CHECK_VALID, CHECK_CANCELLED
+)
+
+EXIT_OK = 0
+EXIT_ERROR = 1
+EXIT_CANCELLED = 130
+
+
+class Output:
+    """Scrive stato, avanzamento ed esito in formato testuale o come righe JSON."""
+    def __init__(self, json_mode, stream):
+        self.json_mode = json_mode
+        self.stream = stream
+        self.last_percent = -1
+        self.rate = None # Ultimi (MB/s, secondi rimanenti) ricevuti
+        self.lock = threading.Lock()
+    def _write_json(self, **fields):
+        with self.lock:
+            self.stream.write(json.dumps(fields, ensure_ascii=False) + "\n"); self.stream.flush()
+    def status(self, message):
+        if self.json_mode: self._write_json(event="status", message=message)
+        else: print(message, file=self.stream, flush=True)
+    def throughput(self, mb_per_s, eta):
+        self.rate = (mb_per_s, eta)
+    def progress(self, percent):
+        if percent == self.last_percent: return
+        self.last_percent = percent
+        if self.json_mode:
+            rate = {"mb_s": round(self.rate[0], 2), "eta": round(self.rate[1], 1)} if self.rate else {}
+            self._write_json(event="progress", percent=percent, **rate)
+            return
+        text = f"Avanzamento: {percent:3d}%"
+        if self.rate: text += f" ({self.rate[0]:.1f} MB/s, circa {format_eta(self.rate[1])} rimanenti)"
+        if self.stream.isatty(): print(f"\r{text:<60}", end="" if percent < 100 else "\n", file=self.stream, flush=True)
+        elif percent % 10 == 0: print(text, file=self.stream, flush=True)
+    def result(self, command, success, message, elapsed, **extra):
+        if self.json_mode: self._write_json(event="result", command=command, success=success, message=message, elapsed=round(elapsed, 3), **extra)
+        else: print(f"{'OK' if success else 'ERRORE'}: {message} ({elapsed:.1f} s)", file=self.stream, flush=True)
+
+
+def run_cancellable(target, request_stop):
+    """
+    Esegue target() in un thread separato, così che Ctrl+C possa chiedere
+    l'interruzione (request_stop) e attendere che l'operazione termini in modo pulito.
+    Ritorna la coppia (risultato di target, True se interrotto dall'utente); se
+    target() solleva un'eccezione, questa viene rilanciata nel thread chiamante.
+    """
+    result, error = [], []
+    finished = threading.Event()
+    def run():
+        try: result.append(target())
+        except BaseException as e: error.append(e)
+        finally: finished.set()
+    threading.Thread(target=run, daemon=True).start()
+    interrupted = False
+    # Si attende un Event e non thread.join(): un join interrotto da Ctrl+C può
+    # far risultare terminato un thread ancora in esecuzione
+    while not finished.is_set():
+        try:
+            finished.wait(0.2)
+        except KeyboardInterrupt:
+            if not interrupted:
+                print("Interruzione richiesta, attendo la chiusura dell'operazione...", file=sys.stderr)
+                interrupted = True
+                request_stop()
+    if error:
+        raise error[0]
+    return result[0], interrupted
+
+
+def read_key(args, profiler):
+    start = time.perf_counter()
+    key = leggi_chiave(args.key_file)
+    profiler.record("key_read", time.perf_counter() - start)
+    return key
+
+
+def missing_key(args):
+    return False, f"Chiave AES non disponibile: impossibile leggere '{args.key_file}'.", False, {}
+
+
+def cmd_verify(args, out, profiler):
+    key = read_key(args, profiler)
+    if not key: return missing_key(args)
+    stop = threading.Event()
+    (esito, dettaglio), interrupted = run_cancellable(lambda: check_package(args.package, key, out.progress, stop.is_set, profiler), stop.set)
+    messages = {
+        CHECK_VALID: f"Pacchetto '{args.package}' valido.",
+        CHECK_CANCELLED: "Verifica annullata dall'utente.",
+    }
+    message = messages.get(esito, f"Pacchetto '{args.package}' non valido ({esito}: {dettaglio}).")
+    return esito == CHECK_VALID, message, interrupted, {"esito": esito, "dettaglio": dettaglio}
+
+
+def cmd_install(args, out, profiler):
+    key = read_key(args, profiler)
+    if not key: return missing_key(args)
+    os.makedirs(args.dest, exist_ok=True)
+    engine = InstallEngine(args.dest, key, not args.no_backup, args.package, args.workers, not args.full,
+                           on_progress=out.progress, on_status=out.status, on_throughput=out.throughput, profiler=profiler)
+    (success, message), interrupted = run_cancellable(engine.run, engine.requestInterruption)
+    return success, message, interrupted, {}
+
+
+def cmd_restore(args, out, profiler):
+    stop = threading.Event()
+    (success, message), interrupted = run_cancellable(lambda: restore_originals(args.dest, out.progress, stop.is_set), stop.set)
+    return success, message, interrupted, {}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Installer Patch ITA Yakuza 4 Remastered (riga di comando).")
+    parser.add_argument("--json", action="store_true", help="Scrive avanzamento ed esito come righe JSON su stdout.")
+    parser.add_argument("--profile", metavar="FILE", default=os.environ.get(PROFILE_ENV), help="Aggiunge al file i tempi di ogni fase (righe JSON).")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def add_package_options(command):
+        command.add_argument("--package", default=resource_path(PACKAGE_FILE), help=f"Pacchetto della patch (predefinito: {PACKAGE_FILE}).")
+        command.add_argument("--key-file", default=resource_path(CHIAVE), help=f"File con la chiave AES (predefinito: {CHIAVE}).")
+
+    verify = commands.add_parser("verify", help="Verifica il pacchetto e la chiave.")
+    add_package_options(verify)
+    verify.set_defaults(handler=cmd_verify)
+
+    install = commands.add_parser("install", help="Installa la patch.")
+    install.add_argument("--dest", required=True, help="Cartella di installazione (cartella 'data' del gioco).")
+    add_package_options(install)
+    install.add_argument("--no-backup", action="store_true", help="Non salva i file originali prima di sostituirli.")
+    install.add_argument("--full", action="store_true", help="Estrae tutti i file, anche quelli già aggiornati.")
+    install.add_argument("--workers", type=int, default=EXTRACT_WORKERS, help=f"Thread di estrazione (predefinito: {EXTRACT_WORKERS}).")
+    install.set_defaults(handler=cmd_install)
+
+    restore = commands.add_parser("restore", help="Ripristina i file originali salvati dal backup.")
+    restore.add_argument("--dest", required=True, help="Cartella in cui è installata la patch.")
+    restore.set_defaults(handler=cmd_restore)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    out = Output(args.json, sys.stdout)
+    start = time.perf_counter()
+    # In modalità JSON stdout contiene solo eventi: i messaggi del motore vanno su stderr
+    redirect = contextlib.redirect_stdout(sys.stderr) if args.json else contextlib.nullcontext()
+    with redirect:
+        profiler = Profiler(args.profile)
+        try:
+            success, message, interrupted, extra = args.handler(args, out, profiler)
+        except Exception as e:
+            traceback.print_exc(file=sys.stderr)
+            success, message, interrupted, extra = False, f"Errore imprevisto: {type(e).__name__}: {e}", False, {}
+        profiler.write()
+    out.result(args.command, success, message, time.perf_counter() - start, **extra)
+    if interrupted:
+        return EXIT_CANCELLED
+    return EXIT_OK if success else EXIT_ERROR
+
+
+if __name__ == "__main__":
+    sys.exit(main())
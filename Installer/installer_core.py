@@ -0,0 +1,934 @@
+# -*- coding: utf-8 -*-
+
+# -----------------------------------------------------------------------------
+# Installer Patch ITA Yakuza 4 Remastered - Motore di installazione
+# Autore: SavT
+# -----------------------------------------------------------------------------
+#
+# Verifica del pacchetto, backup, installazione e ripristino dei file originali,
+# senza dipendenze da Qt: usato sia dall'interfaccia grafica (installer.py) sia
+# dalla riga di comando (installer_cli.py).
+
+import sys
+import os
+import traceback
+import shutil
+import pyzipper
+import json
+import threading
+import concurrent.futures
+import hashlib
+import time
+import platform
+import datetime
+import errno
+import tempfile
+try:
+    import fcntl # Per i reflink (copy-on-write) su Linux, assente su Windows
+except ImportError:
+    fcntl = None
+from pkg_format import MANIFEST_NAME, DELTA_DIR, hash_file, read_manifest, iter_check, apply_block_diff, chunk_size_for
+
+# --- Funzione Resource Path ---
+def resource_path(relative_path):
+    try:
+        base_path = sys._MEIPASS
+    except Exception:
+        base_path = os.path.abspath(".")
+    return os.path.join(base_path, relative_path)
+
+# --- Costanti Globali ---
+CHIAVE = "chiave.txt"
+LOG_FILE = "_patch_ita_log.txt" # Nella cartella di installazione (vedi log_path)
+PACKAGE_FILE = "patch.pkg"
+INSTALL_RECORD = "_patch_ita_install.json"
+STAGING_SUFFIX = ".patch_ita_tmp"
+JOURNAL_FILE = "_patch_ita_journal.json" # File in attesa di essere sostituiti durante un'installazione
+JOURNAL_STAGING = "staging" # File ancora in estrazione: in caso di interruzione vanno scartati
+JOURNAL_COMMIT = "commit"   # File tutti estratti e verificati: in caso di interruzione vanno applicati
+BACKUP_STORE = "_backup_patch_ita" # Archivio dei file originali, nella cartella di destinazione
+BACKUP_INDEX = "index.json"
+CHUNK_SIZE = 2 * 1024 * 1024 # Dimensione massima dei blocchi letti durante l'estrazione (i file piccoli in un solo blocco)
+EXTRACT_WORKERS = max(1, min(8, os.cpu_count() or 1))
+PROFILE_ENV = "PATCH_ITA_PROFILE" # Variabile d'ambiente con il file in cui salvare le misure dei tempi
+PROGRESS_INTERVAL = 0.1 # Intervallo minimo (secondi) tra due aggiornamenti dell'avanzamento
+SPACE_MARGIN = 64 * 1024 * 1024 # Spazio libero da lasciare sul disco oltre a quello stimato per l'installazione
+PREALLOCATE_MIN = 1024 * 1024   # Dimensione minima dei file da preallocare prima della scrittura
+
+# --- Funzioni di supporto ---
+def leggi_chiave(nome_file):
+    try:
+        if not os.path.exists(nome_file):
+            print(f"Errore: Il file '{nome_file}' non esiste.")
+            return None
+        if not os.access(nome_file, os.R_OK):
+            print(f"Errore: Il file '{nome_file}' non ha i permessi di lettura.")
+            return None
+        with open(nome_file, 'r') as file:
+            chiave = file.readline().strip()
+        if not chiave:
+            print(f"Avviso: Il file '{nome_file}' è vuoto o non contiene una chiave valida.")
+            return None
+        print(f"Chiave di decriptazione letta con successo dal file '{nome_file}'.")
+        return chiave.encode('utf-8')
+    except Exception as e:
+        print(f"Si è verificato un errore durante la lettura del file '{nome_file}': {e}")
+        return None
+
+def log_path(dest_path):
+    """
+    Percorso del file di log: nella cartella di installazione, insieme al registro e al backup,
+    oppure nella cartella temporanea se la destinazione non esiste.
+    """
+    return os.path.join(dest_path if os.path.isdir(dest_path) else tempfile.gettempdir(), LOG_FILE)
+
+def write_log(dest_path, text, with_traceback=False):
+    """Aggiunge un messaggio (e, se richiesto, la traccia dell'eccezione in corso) al file di log."""
+    path = log_path(dest_path)
+    try:
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(text + "\n")
+            if with_traceback: traceback.print_exc(file=f)
+    except OSError as e:
+        print(f"Avviso: impossibile scrivere il log '{path}': {e}")
+
+def load_install_record(dest_path):
+    """
+    Legge il registro dell'ultima installazione (dimensione, mtime e hash dei file installati).
+    Ritorna un dizionario vuoto se il registro non esiste o non è leggibile.
+    """
+    record_path = os.path.join(dest_path, INSTALL_RECORD)
+    try:
+        with open(record_path, 'r', encoding='utf-8') as f:
+            return json.load(f).get("files", {})
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError, AttributeError) as e:
+        print(f"Avviso: registro installazione '{record_path}' non leggibile ({e}), verrà ricreato.")
+        return {}
+
+def save_install_record(dest_path, manifest_files, removed=()):
+    """
+    Salva il registro dell'installazione per i file del manifest presenti nella destinazione.
+    Le voci registrate in precedenza e non presenti nel manifest (es. file non toccati da
+    un pacchetto delta) vengono mantenute, tranne quelle dei file rimossi (removed).
+    Alla prossima installazione i file con stessa dimensione e mtime non vengono ri-letti.
+    """
+    files = load_install_record(dest_path)
+    for name in removed:
+        files.pop(name, None)
+    for name, info in manifest_files.items():
+        files.pop(name, None)
+        try: st = os.stat(os.path.join(dest_path, name))
+        except OSError: continue
+        if st.st_size == info["size"]:
+            files[name] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": info["sha256"]}
+    record_path = os.path.join(dest_path, INSTALL_RECORD)
+    try:
+        with open(record_path, 'w', encoding='utf-8') as f: json.dump({"files": files}, f)
+    except OSError as e:
+        print(f"Avviso: impossibile scrivere il registro installazione '{record_path}': {e}")
+
+def write_journal(dest_path, state, names):
+    """
+    Scrive (in modo atomico e su disco) il journal dell'installazione in corso:
+    lo stato (JOURNAL_STAGING o JOURNAL_COMMIT) e i file che verranno sostituiti.
+    """
+    journal_path = os.path.join(dest_path, JOURNAL_FILE)
+    with open(journal_path + STAGING_SUFFIX, 'w', encoding='utf-8') as f:
+        json.dump({"state": state, "files": names}, f)
+        f.flush(); os.fsync(f.fileno())
+    os.replace(journal_path + STAGING_SUFFIX, journal_path)
+
+def clear_journal(dest_path):
+    try: os.remove(os.path.join(dest_path, JOURNAL_FILE))
+    except FileNotFoundError: pass
+
+def discard_staged(dest_path, names):
+    """Rimuove i file temporanei (STAGING_SUFFIX) ancora presenti per i file indicati."""
+    for name in names:
+        try: os.remove(os.path.join(dest_path, name) + STAGING_SUFFIX)
+        except FileNotFoundError: pass
+
+def commit_staged(dest_path, names):
+    """Sostituisce i file indicati con le rispettive versioni temporanee, se presenti."""
+    for name in names:
+        target_path = os.path.join(dest_path, name)
+        if os.path.exists(target_path + STAGING_SUFFIX):
+            os.replace(target_path + STAGING_SUFFIX, target_path)
+
+def flush_staged(dest_path, names):
+    """Assicura che i file temporanei siano scritti su disco prima di applicarli."""
+    if hasattr(os, "sync"):
+        os.sync() # Una sola chiamata per tutti i file (Linux, macOS)
+        return
+    for name in names:
+        with open(os.path.join(dest_path, name) + STAGING_SUFFIX, 'rb+') as f: os.fsync(f.fileno())
+
+def recover_journal(dest_path):
+    """
+    Completa o annulla un'installazione interrotta (chiusura forzata, crash, mancanza di corrente).
+    Se i file erano ancora in estrazione vengono scartati e restano quelli originali; se erano già
+    tutti verificati vengono applicati. Ritorna un messaggio con l'esito, oppure None se non c'era
+    nessuna installazione interrotta.
+    """
+    journal_path = os.path.join(dest_path, JOURNAL_FILE)
+    try:
+        with open(journal_path, 'r', encoding='utf-8') as f: journal = json.load(f)
+        state, names = journal["state"], journal["files"]
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        print(f"Avviso: journal '{journal_path}' non leggibile ({e}), verrà ignorato.")
+        clear_journal(dest_path)
+        return None
+    if state == JOURNAL_COMMIT:
+        commit_staged(dest_path, names)
+        message = f"Completata l'installazione interrotta in precedenza ({len(names)} file)."
+    else:
+        discard_staged(dest_path, names)
+        message = "Annullata l'installazione interrotta in precedenza: i file originali non sono stati modificati."
+    clear_journal(dest_path)
+    print(message)
+    return message
+
+def load_backup_index(dest_path):
+    """
+    Legge l'indice dell'archivio di backup: {nome file: {"size", "sha256"}}, oppure None
+    per i file che non esistevano prima dell'installazione della patch.
+    Ritorna un dizionario vuoto se non è stato ancora fatto nessun backup.
+    """
+    index_path = os.path.join(dest_path, BACKUP_STORE, BACKUP_INDEX)
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            return json.load(f)["files"]
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        raise IOError(f"Indice del backup '{index_path}' non leggibile: {e}") from e
+
+def save_backup_index(dest_path, files):
+    """Salva l'indice dell'archivio di backup, sostituendo quello precedente in modo atomico."""
+    index_path = os.path.join(dest_path, BACKUP_STORE, BACKUP_INDEX)
+    os.makedirs(os.path.dirname(index_path), exist_ok=True)
+    with open(index_path + STAGING_SUFFIX, 'w', encoding='utf-8') as f: json.dump({"files": files}, f, indent=1, sort_keys=True)
+    os.replace(index_path + STAGING_SUFFIX, index_path)
+
+def backup_object_path(dest_path, sha256):
+    """Percorso in cui l'archivio di backup conserva il contenuto con l'hash indicato."""
+    return os.path.join(dest_path, BACKUP_STORE, "objects", sha256[:2], sha256)
+
+# Esiti della verifica del pacchetto (check_package)
+CHECK_VALID = "valido"
+CHECK_CORRUPT = "corrotto"
+CHECK_BAD_KEY = "chiave"
+CHECK_ERROR = "errore"
+CHECK_CANCELLED = "annullato"
+
+FICLONE = 0x40049409 # ioctl Linux per clonare un file (btrfs, XFS, ...)
+
+def reflink_file(source_path, target_path):
+    """
+    Crea target_path come reflink di source_path: i dati su disco sono condivisi
+    finché uno dei due file non viene modificato (btrfs, XFS, ...).
+    Ritorna False, senza lasciare file parziali, se il filesystem non lo supporta.
+    """
+    if fcntl is None or not sys.platform.startswith("linux"):
+        return False
+    try:
+        with open(source_path, "rb") as source, open(target_path, "wb") as target:
+            fcntl.ioctl(target.fileno(), FICLONE, source.fileno())
+        return True
+    except OSError:
+        try: os.remove(target_path)
+        except OSError: pass
+        return False
+
+def clone_file(source_path, target_path):
+    """
+    Copia un file tramite reflink se possibile, altrimenti con una copia normale.
+    Ritorna True se è stato usato un reflink.
+    """
+    if reflink_file(source_path, target_path):
+        return True
+    shutil.copyfile(source_path, target_path)
+    return False
+
+def backup_file(source_path, backup_path):
+    """
+    Salva una copia di backup di un file originale evitando, dove possibile, di copiarne i dati:
+    prima tenta un reflink, poi un hard link (stessa partizione), infine una copia completa.
+    L'hard link condivide i dati con il file originale: è sicuro perché l'installazione
+    non scrive mai sui file esistenti, ma li sostituisce con os.replace.
+    Ritorna il metodo usato: "reflink", "hardlink" oppure "copia".
+    """
+    if reflink_file(source_path, backup_path):
+        shutil.copystat(source_path, backup_path)
+        return "reflink"
+    try:
+        os.link(source_path, backup_path)
+        return "hardlink"
+    except OSError:
+        shutil.copy2(source_path, backup_path)
+        return "copia"
+
+def hardlinks_supported(path):
+    """
+    Controlla se nella cartella 'path' si possono creare hard link (non supportati ad
+    esempio da FAT32/exFAT): in questo caso il backup non occupa spazio aggiuntivo.
+    """
+    probe_path = os.path.join(path, "_patch_ita_probe" + STAGING_SUFFIX)
+    try:
+        with open(probe_path, "wb"): pass
+        os.link(probe_path, probe_path + ".link")
+        os.remove(probe_path + ".link")
+        return True
+    except OSError:
+        return False
+    finally:
+        try: os.remove(probe_path)
+        except OSError: pass
+
+def preallocate(f, size):
+    """
+    Riserva sul disco lo spazio per l'intero file prima di scriverlo: riduce la
+    frammentazione e, se il disco è pieno, l'errore arriva subito invece che a metà file.
+    Usa posix_fallocate dove disponibile, altrimenti imposta la dimensione finale del
+    file (su NTFS riserva i cluster). I file piccoli non vengono preallocati.
+    """
+    if size < PREALLOCATE_MIN:
+        return
+    try:
+        if hasattr(os, "posix_fallocate"): os.posix_fallocate(f.fileno(), 0, size)
+        else: f.truncate(size)
+    except OSError as e:
+        if e.errno == errno.ENOSPC: raise
+        # Preallocazione non supportata dal filesystem: si scrive normalmente
+
+def check_package(package_path, aes_key, on_progress=None, should_stop=None, profiler=None):
+    """
+    Verifica il pacchetto della patch (vedi pkg_format.iter_check).
+
+    Args:
+        package_path (str): Percorso del pacchetto.
+        aes_key (bytes): Chiave AES.
+        on_progress: Callback opzionale chiamata con la percentuale di voci controllate.
+        should_stop: Callback opzionale; se ritorna True la verifica viene interrotta.
+        profiler (Profiler): Misura opzionale dei tempi.
+
+    Returns:
+        tuple: (esito, dettaglio), dove esito è uno tra CHECK_VALID, CHECK_CORRUPT
+               (dettaglio: voce non valida), CHECK_BAD_KEY, CHECK_ERROR (dettaglio:
+               tipo di errore) e CHECK_CANCELLED.
+    """
+    profiler = profiler or Profiler()
+    try:
+        start = time.perf_counter()
+        with pyzipper.AESZipFile(package_path) as zf:
+            zf.setpassword(aes_key)
+            profiler.record("package_open", time.perf_counter() - start, entries=len(zf.infolist()))
+            start = time.perf_counter()
+            last_percent = -1
+            for done, total, bad_name in iter_check(zf):
+                if should_stop and should_stop():
+                    return CHECK_CANCELLED, ""
+                if bad_name is not None:
+                    return CHECK_CORRUPT, bad_name
+                percent = int((done / total) * 100)
+                if on_progress and percent != last_percent:
+                    on_progress(percent); last_percent = percent
+            profiler.record("check", time.perf_counter() - start, entries=len(zf.infolist()), manifest=MANIFEST_NAME in zf.NameToInfo)
+        return CHECK_VALID, ""
+    except (pyzipper.BadZipFile, RuntimeError) as e:
+        print(f"Package check bad key/zip error: {type(e).__name__}")
+        return CHECK_BAD_KEY, type(e).__name__
+    except Exception as e:
+        print(f"Pkg check err: {e}"); traceback.print_exc()
+        return CHECK_ERROR, type(e).__name__
+
+class Profiler:
+    """
+    Misura opzionale dei tempi delle fasi di verifica e installazione, per capire se su una
+    macchina il collo di bottiglia è la decriptazione, la decompressione o la scrittura su disco.
+
+    È attivo solo se viene indicato un file (opzione --profile della riga di comando o
+    variabile d'ambiente PATCH_ITA_PROFILE): altrimenti record() non fa nulla.
+    write() aggiunge al file una riga JSON per ogni misura, precedute da una riga "session"
+    con i dati della macchina e seguite, se sono state estratte voci, da una riga "summary"
+    con i loro totali.
+    I tempi delle voci ("entry") sono per thread: con l'estrazione parallela la loro somma
+    supera il tempo reale della fase "extract".
+    """
+    def __init__(self, path=None):
+        self.path = path
+        self.enabled = path is not None
+        self._records = []
+        self._lock = threading.Lock()
+    @classmethod
+    def from_env(cls):
+        return cls(os.environ.get(PROFILE_ENV) or None)
+    def record(self, phase, seconds, **fields):
+        """Registra una misura: fase, tempo in secondi ed eventuali dati (es. bytes, name)."""
+        if not self.enabled: return
+        entry = {"phase": phase, "seconds": round(seconds, 6), **fields}
+        if fields.get("bytes") and seconds > 0:
+            entry["mb_s"] = round(fields["bytes"] / seconds / (1024 * 1024), 2)
+        with self._lock: self._records.append(entry)
+    @staticmethod
+    def summary(records):
+        """Totali delle voci estratte, separando le voci salvate (solo cifrate) da quelle compresse."""
+        entries = [r for r in records if r["phase"] == "entry"]
+        totals = {"phase": "summary", "entries": len(entries)}
+        for key in ("open_s", "read_s", "hash_s", "write_s"):
+            totals[key] = round(sum(r[key] for r in entries), 6)
+        # Per le voci salvate la lettura è solo decriptazione, per le altre decriptazione e decompressione
+        for label, stored in (("stored", True), ("deflated", False)):
+            group = [r for r in entries if (r["compress_type"] == pyzipper.ZIP_STORED) == stored]
+            size = sum(r["bytes"] for r in group); read_s = sum(r["read_s"] for r in group)
+            totals[f"{label}_bytes"] = size
+            totals[f"{label}_read_mb_s"] = round(size / read_s / (1024 * 1024), 2) if read_s > 0 else None
+        return totals
+    def write(self):
+        """Aggiunge le misure raccolte al file indicato e le azzera."""
+        if not self.enabled: return
+        with self._lock: records, self._records = self._records, []
+        session = {"phase": "session", "time": datetime.datetime.now().isoformat(timespec="seconds"),
+                   "platform": platform.platform(), "python": platform.python_version(), "cpu_count": os.cpu_count()}
+        try:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                summary = [self.summary(records)] if any(r["phase"] == "entry" for r in records) else []
+                for line in [session] + records + summary:
+                    f.write(json.dumps(line, ensure_ascii=False) + "\n")
+            print(f"Misure dei tempi salvate in '{self.path}'.")
+        except OSError as e:
+            print(f"Avviso: impossibile scrivere le misure dei tempi in '{self.path}': {e}")
+
+def format_eta(seconds):
+    """Formatta un tempo residuo in secondi come testo breve (es. "2 min 05 s")."""
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds} s"
+    return f"{seconds // 60} min {seconds % 60:02d} s"
+
+class ProgressTracker:
+    """
+    Avanzamento dell'estrazione calcolato sui byte scritti e non sul numero di file,
+    così un file PAR da centinaia di MB pesa quanto i suoi dati.
+    add() può essere chiamato da più thread a ogni blocco scritto: le callback
+    on_progress(percentuale) e on_throughput(MB/s, secondi rimanenti) vengono chiamate
+    al massimo una volta ogni 'interval' secondi (e sempre al completamento).
+    """
+    def __init__(self, total_bytes, on_progress, on_throughput, interval=PROGRESS_INTERVAL):
+        self.total_bytes = total_bytes
+        self.done_bytes = 0
+        self.on_progress = on_progress
+        self.on_throughput = on_throughput
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._start = self._last_emit = time.monotonic()
+    def add(self, count):
+        with self._lock:
+            self.done_bytes += count
+            now = time.monotonic()
+            if now - self._last_emit < self.interval and self.done_bytes < self.total_bytes:
+                return
+            self._last_emit = now
+            elapsed = now - self._start
+            if elapsed > 0 and self.done_bytes:
+                rate = self.done_bytes / elapsed
+                self.on_throughput(rate / (1024 * 1024), max(0.0, (self.total_bytes - self.done_bytes) / rate))
+            self.on_progress(int((self.done_bytes / self.total_bytes) * 100) if self.total_bytes else 100)
+
+class InstallEngine:
+    """
+    Installazione della patch: backup dei file originali, estrazione e verifica dei file,
+    applicazione atomica tramite journal. Non dipende da Qt: l'interfaccia grafica
+    (InstallWorker) e la riga di comando (installer_cli.py) ricevono avanzamento e messaggi
+    di stato tramite le callback on_progress(percentuale), on_throughput(MB/s, secondi
+    rimanenti) e on_status(messaggio), chiamate dal thread che esegue run() o dai thread
+    di estrazione.
+    """
+    def __init__(self, dest_path, aes_key, do_backup, package_path, workers=EXTRACT_WORKERS, incremental=True, on_progress=None, on_status=None, on_throughput=None, profiler=None):
+        self.dest_path = dest_path
+        self.aes_key = aes_key
+        self.do_backup = do_backup
+        self.package_path = package_path
+        self.package_filename = os.path.basename(package_path)
+        self.workers = max(1, workers)
+        self.incremental = incremental
+        self.on_progress = on_progress or (lambda value: None)
+        self.on_status = on_status or (lambda message: None)
+        self.on_throughput = on_throughput or (lambda mb_per_s, eta: None)
+        self.profiler = profiler or Profiler()
+        self._tracker = None
+        self._is_interruption_requested = False
+        self._abort_extraction = False
+        self._expected_files = {} # Voci del manifest, per la verifica durante l'estrazione
+    def requestInterruption(self):
+        """Chiede l'interruzione dell'installazione (può essere chiamato da qualunque thread)."""
+        self._is_interruption_requested = True
+    def isInterruptionRequested(self):
+        return self._is_interruption_requested
+    def _should_stop(self):
+        return self._is_interruption_requested or self._abort_extraction
+    def _extract_entry(self, zf, file_info):
+        """
+        Estrae una singola voce dell'archivio nella cartella di destinazione.
+        Se la voce è nel manifest, il suo hash viene verificato durante la scrittura:
+        il pacchetto viene così decriptato una sola volta.
+        Il file viene scritto accanto alla destinazione (STAGING_SUFFIX) e la sostituirà con
+        os.replace solo a estrazione completata: il file originale non viene mai modificato
+        (può essere un hard link del backup).
+        Ritorna False se l'operazione è stata interrotta (il file parziale viene rimosso).
+        """
+        if self._should_stop():
+            return False
+        target_path = os.path.join(self.dest_path, file_info.filename)
+        staged_path = target_path + STAGING_SUFFIX
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+        expected = self._expected_files.get(file_info.filename)
+        digest = hashlib.sha256() if expected else None
+        completed = False
+        profiling = self.profiler.enabled
+        open_s = read_s = hash_s = write_s = 0.0
+        written = 0
+        chunk_size = chunk_size_for(file_info.file_size, CHUNK_SIZE)
+        try:
+            t0 = time.perf_counter()
+            with zf.open(file_info) as source, open(staged_path, "wb") as target:
+                if profiling: open_s = time.perf_counter() - t0 # Include la derivazione della chiave AES della voce
+                preallocate(target, file_info.file_size)
+                while True:
+                    if self._should_stop():
+                        return False
+                    if profiling: t0 = time.perf_counter()
+                    # read1() evita che ZipExtFile ricomponga il blocco concatenando più letture:
+                    # per le voci non compresse il blocco è direttamente l'output della decriptazione
+                    chunk = source.read1(chunk_size)
+                    if profiling: t1 = time.perf_counter(); read_s += t1 - t0
+                    if not chunk: break
+                    if digest: digest.update(chunk)
+                    if profiling: t2 = time.perf_counter(); hash_s += t2 - t1
+                    target.write(chunk)
+                    if profiling: write_s += time.perf_counter() - t2
+                    written += len(chunk)
+                    self._tracker.add(len(chunk))
+                if written != file_info.file_size: target.truncate(written) # Toglie lo spazio preallocato in eccesso
+            if digest and digest.hexdigest() != expected["sha256"]:
+                raise pyzipper.BadZipFile(f"Hash non corrispondente per '{file_info.filename}'.")
+            completed = True
+            self.profiler.record("entry", open_s + read_s + hash_s + write_s, name=file_info.filename, bytes=file_info.file_size,
+                                 compressed=file_info.compress_size, compress_type=file_info.compress_type,
+                                 open_s=round(open_s, 6), read_s=round(read_s, 6), hash_s=round(hash_s, 6), write_s=round(write_s, 6))
+        except (pyzipper.BadZipFile, RuntimeError):
+            raise
+        except Exception as write_error:
+             raise IOError(f"Errore scrittura file {target_path}: {write_error}") from write_error
+        finally:
+            if not completed:
+                try: os.remove(staged_path)
+                except OSError: pass
+        return True
+    def _matches(self, name, expected, record):
+        """
+        Controlla se il file installato coincide con dimensione e hash attesi.
+        Se dimensione e mtime coincidono con il registro dell'ultima installazione
+        si usa l'hash registrato, altrimenti il file viene ri-letto.
+        """
+        if self._should_stop():
+            return False
+        target_path = os.path.join(self.dest_path, name)
+        try: st = os.stat(target_path)
+        except OSError: return False
+        if st.st_size != expected["size"]:
+            return False
+        cached = record.get(name)
+        if cached and cached.get("size") == st.st_size and cached.get("mtime_ns") == st.st_mtime_ns:
+            return cached.get("sha256") == expected["sha256"]
+        return hash_file(target_path) == expected["sha256"]
+    def _find_matching(self, checks, record):
+        """
+        Controlla in parallelo una lista di coppie (nome, {"size", "sha256"}).
+        Ritorna l'insieme dei nomi il cui file installato coincide.
+        """
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.workers) as pool:
+            results = pool.map(lambda check: self._matches(check[0], check[1], record), checks)
+            return {name for (name, _), matching in zip(checks, results) if matching}
+    def _store_original(self, name, record):
+        """
+        Salva nell'archivio di backup il file originale 'name', se esiste.
+        I file già installati da una versione precedente della patch (riconosciuti dal
+        registro dell'installazione) non sono originali e non vengono salvati.
+        Ritorna (voce dell'indice, metodo usato per la copia), oppure None se il file
+        va ignorato o l'operazione è stata interrotta.
+        """
+        if self._should_stop():
+            return None
+        source_path = os.path.join(self.dest_path, name)
+        try: st = os.stat(source_path)
+        except FileNotFoundError: return {"entry": None, "method": None}
+        cached = record.get(name)
+        if cached and cached.get("size") == st.st_size and cached.get("mtime_ns") == st.st_mtime_ns:
+            return None
+        sha256 = hash_file(source_path)
+        object_path = backup_object_path(self.dest_path, sha256)
+        method = None
+        if not os.path.exists(object_path):
+            os.makedirs(os.path.dirname(object_path), exist_ok=True)
+            method = backup_file(source_path, object_path + STAGING_SUFFIX)
+            os.replace(object_path + STAGING_SUFFIX, object_path)
+        return {"entry": {"size": st.st_size, "sha256": sha256}, "method": method}
+    def _plan_space(self, staged_bytes, backup_names):
+        """
+        Stima lo spazio su disco richiesto dall'installazione: fino all'applicazione finale
+        i file estratti convivono con quelli da sostituire, quindi servono tutti i byte dei
+        file nuovi, più quelli dei file originali da salvare se il backup deve copiarli
+        (senza hard link).
+        Ritorna la coppia (byte richiesti, byte liberi).
+        """
+        needed = staged_bytes
+        if backup_names and not hardlinks_supported(self.dest_path):
+            try: backup_index = load_backup_index(self.dest_path)
+            except IOError: backup_index = {}
+            for name in backup_names:
+                if name in backup_index: continue
+                try: needed += os.path.getsize(os.path.join(self.dest_path, name))
+                except OSError: pass
+        return needed, shutil.disk_usage(self.dest_path).free
+    def _remove_files(self, names):
+        """
+        Rimuove i file eliminati nella nuova versione della patch (voce "removed" del
+        manifest delta). Se l'archivio di backup contiene il file originale del gioco
+        che la patch aveva sostituito, viene ripristinato quello, come se la nuova
+        versione fosse stata installata sui file originali.
+        """
+        backup_index = load_backup_index(self.dest_path)
+        for name in names:
+            target_path = os.path.join(self.dest_path, name)
+            entry = backup_index.get(name)
+            object_path = backup_object_path(self.dest_path, entry["sha256"]) if entry else None
+            if object_path and os.path.isfile(object_path):
+                clone_file(object_path, target_path + STAGING_SUFFIX)
+                os.replace(target_path + STAGING_SUFFIX, target_path)
+                print(f"Ripristinato l'originale di un file rimosso dalla patch: {name}")
+            else:
+                try: os.remove(target_path)
+                except FileNotFoundError: pass
+                print(f"Rimosso: {name}")
+    def _stage_delta(self, zf, name, info):
+        """
+        Applica il diff binario di una voce delta sul file installato, scrivendo il
+        risultato in un file temporaneo accanto alla destinazione e verificandone l'hash.
+        Ritorna la coppia (file temporaneo, destinazione) da confermare con os.replace.
+        """
+        target_path = os.path.join(self.dest_path, name)
+        staged_path = target_path + STAGING_SUFFIX
+        try:
+            with zf.open(info["delta"]["patch"]) as diff, open(target_path, "rb") as base, open(staged_path, "wb") as out:
+                preallocate(out, info["size"])
+                apply_block_diff(base, diff, out)
+            if hash_file(staged_path) != info["sha256"]:
+                raise pyzipper.BadZipFile(f"Verifica fallita per '{name}' dopo l'applicazione della patch delta.")
+        except BaseException:
+            try: os.remove(staged_path)
+            except OSError: pass
+            raise
+        return staged_path, target_path
+    def _extract_parallel(self, package_path, file_infos):
+        """
+        Distribuisce l'estrazione delle voci su un pool di thread.
+        Ogni thread apre un proprio AESZipFile, così decriptazione e decompressione
+        (che rilasciano il GIL) procedono in parallelo su più core.
+        Ritorna False se l'operazione è stata interrotta.
+        """
+        local = threading.local()
+        handles = []
+        handles_lock = threading.Lock()
+        def extract_with_own_handle(file_info):
+            zf = getattr(local, "zf", None)
+            if zf is None:
+                zf = pyzipper.AESZipFile(package_path)
+                zf.setpassword(self.aes_key)
+                local.zf = zf
+                with handles_lock: handles.append(zf)
+            return self._extract_entry(zf, file_info)
+        try:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=self.workers) as pool:
+                futures = [pool.submit(extract_with_own_handle, file_info) for file_info in file_infos]
+                try:
+                    for future in concurrent.futures.as_completed(futures):
+                        if not future.result():
+                            self._abort_extraction = True
+                            break
+                except BaseException:
+                    self._abort_extraction = True
+                    raise
+                finally:
+                    if self._abort_extraction:
+                        for future in futures: future.cancel()
+        finally:
+            for zf in handles: zf.close()
+        return not self._should_stop()
+    def run(self):
+        """
+        Esegue l'installazione. Ritorna la coppia (successo, messaggio per l'utente).
+        """
+        journal_names = []
+        journal_state = None
+        run_start = time.perf_counter()
+        try:
+            package_path = self.package_path
+            if not os.path.exists(package_path):
+                raise FileNotFoundError(f"File della patch non trovato: {self.package_filename}")
+            recovered = recover_journal(self.dest_path)
+            if recovered: self.on_status(recovered)
+            start = time.perf_counter()
+            with pyzipper.AESZipFile(package_path) as zf:
+                zf.setpassword(self.aes_key)
+                self.profiler.record("package_open", time.perf_counter() - start, entries=len(zf.infolist()))
+                start = time.perf_counter()
+                manifest = read_manifest(zf)
+                self.profiler.record("manifest_read", time.perf_counter() - start, files=len(manifest["files"]) if manifest else 0)
+                manifest_files = manifest["files"] if manifest else {}
+                self._expected_files = manifest_files
+                record = load_install_record(self.dest_path) if manifest else {}
+                file_infos = [fi for fi in zf.infolist() if fi.filename != MANIFEST_NAME and not fi.filename.startswith(DELTA_DIR)]
+                delta_jobs = [(name, info) for name, info in manifest_files.items() if "delta" in info]
+                # File duplicati: salvati una sola volta nel pacchetto, vengono copiati dopo l'estrazione
+                copy_jobs = [(name, info) for name, info in manifest_files.items() if "blob" in info]
+                skipped_files = 0
+                if manifest and self.incremental:
+                    self.on_status("Confronto con i file già installati...")
+                    start = time.perf_counter()
+                    checks = [(fi.filename, manifest_files[fi.filename]) for fi in file_infos if not fi.is_dir() and fi.filename in manifest_files]
+                    checks += delta_jobs + copy_jobs
+                    skipped = self._find_matching(checks, record)
+                    if self.isInterruptionRequested():
+                        return False, "Installazione annullata dall'utente."
+                    file_infos = [fi for fi in file_infos if fi.filename not in skipped]
+                    delta_jobs = [job for job in delta_jobs if job[0] not in skipped]
+                    copy_jobs = [job for job in copy_jobs if job[0] not in skipped]
+                    skipped_files = len(skipped)
+                    self.profiler.record("compare", time.perf_counter() - start, files=len(checks), skipped=skipped_files)
+                    if skipped_files:
+                        print(f"Installazione incrementale: {skipped_files} file già aggiornati, saltati.")
+                        self.on_status(f"{skipped_files} file già aggiornati verranno saltati.")
+                if delta_jobs:
+                    self.on_status("Verifica dei file richiesti dalla patch delta...")
+                    base_checks = [(name, {"size": info["delta"]["base_size"], "sha256": info["delta"]["base_sha256"]}) for name, info in delta_jobs]
+                    matching_bases = self._find_matching(base_checks, record)
+                    if self.isInterruptionRequested():
+                        return False, "Installazione annullata dall'utente."
+                    wrong_bases = [name for name, _ in delta_jobs if name not in matching_bases]
+                    if wrong_bases:
+                        error_msg = (f"La patch delta richiede la versione precedente della patch già installata.\n"
+                                     f"{len(wrong_bases)} file mancanti o diversi (es. {wrong_bases[0]}).\n"
+                                     f"Installa prima la patch completa.")
+                        write_log(self.dest_path, error_msg + "\n" + "\n".join(wrong_bases))
+                        return False, error_msg
+                # File eliminati nella nuova versione: si rimuovono solo se sono ancora quelli
+                # installati dalla versione precedente, non file modificati o aggiunti dall'utente
+                removed_files = manifest.get("removed", {}) if manifest else {}
+                removed = sorted(self._find_matching(list(removed_files.items()), record)) if removed_files else []
+                if self.isInterruptionRequested():
+                    return False, "Installazione annullata dall'utente."
+                total_files = len(file_infos) + len(delta_jobs) + len(copy_jobs)
+                dir_infos = [file_info for file_info in file_infos if file_info.is_dir()]
+                file_entries = [file_info for file_info in file_infos if not file_info.is_dir()]
+                total_bytes = sum(fi.file_size for fi in file_entries) + sum(info["size"] for _, info in delta_jobs + copy_jobs)
+                # Controllo dello spazio libero prima del backup, che a sua volta può occupare spazio
+                if total_files:
+                    start = time.perf_counter()
+                    needed, free = self._plan_space(total_bytes, [fi.filename for fi in file_entries] + [name for name, _ in delta_jobs + copy_jobs] if self.do_backup else [])
+                    self.profiler.record("space_check", time.perf_counter() - start, needed=needed, free=free)
+                    if needed + SPACE_MARGIN > free:
+                        error_msg = (f"Spazio su disco insufficiente in '{self.dest_path}':\n"
+                                     f"servono circa {(needed + SPACE_MARGIN) / (1024 * 1024):.0f} MB, disponibili {free / (1024 * 1024):.0f} MB.")
+                        write_log(self.dest_path, error_msg)
+                        return False, error_msg + "\nLibera spazio e riprova: nessun file è stato modificato."
+                if self.do_backup:
+                    self.on_status("Avvio backup file originali...")
+                    start = time.perf_counter()
+                    try:
+                        backup_index = load_backup_index(self.dest_path)
+                        # I file già presenti nell'indice hanno l'originale salvato da un'installazione precedente
+                        backup_names = [fi.filename for fi in file_entries] + [name for name, _ in delta_jobs + copy_jobs]
+                        backup_names = [name for name in backup_names if name not in backup_index]
+                        backup_methods = {}
+                        backup_count = 0
+                        with concurrent.futures.ThreadPoolExecutor(max_workers=self.workers) as pool:
+                            results = pool.map(lambda name: self._store_original(name, record), backup_names)
+                            for name, result in zip(backup_names, results):
+                                if result is None: continue
+                                backup_index[name] = result["entry"]
+                                if result["entry"] is None: continue
+                                print(f"Backing up ({result['method'] or 'già presente'}): {name}")
+                                if result["method"]: backup_methods[result["method"]] = backup_methods.get(result["method"], 0) + 1
+                                backup_count += 1
+                        save_backup_index(self.dest_path, backup_index)
+                        self.profiler.record("backup", time.perf_counter() - start, files=len(backup_names), stored=backup_count, methods=backup_methods)
+                        if self.isInterruptionRequested():
+                            return False, "Backup annullato dall'utente."
+                        if backup_count > 0:
+                            self.on_status(f"Backup di {backup_count} file completato in '{BACKUP_STORE}'.")
+                            print(f"Backup completato: {backup_count} file ({', '.join(f'{count} {method}' for method, count in backup_methods.items()) or 'tutti già presenti'}).")
+                        else:
+                            self.on_status("Nessun nuovo file originale da salvare.")
+                            print("Nessun file da backuppare.")
+                    except (shutil.Error, OSError, IOError) as backup_error:
+                        error_msg = f"Errore durante il backup:\n{backup_error}"
+                        print(f"Errore backup: {error_msg}")
+                        write_log(self.dest_path, error_msg)
+                        return False, error_msg + "\nL'installazione è stata interrotta."
+                if total_files == 0:
+                    if removed: self._remove_files(removed)
+                    if manifest: save_install_record(self.dest_path, manifest_files, removed)
+                    if skipped_files: return True, "Installazione completata: tutti i file erano già aggiornati."
+                    else: return True, "Installazione completata (archivio vuoto)."
+                for file_info in dir_infos:
+                    os.makedirs(os.path.join(self.dest_path, file_info.filename), exist_ok=True)
+                self._tracker = ProgressTracker(total_bytes, self.on_progress, self.on_throughput)
+                # Tutti i file vengono prima estratti accanto alla destinazione e sostituiti
+                # solo alla fine: un'interruzione non lascia mai la patch installata a metà
+                journal_names = [fi.filename for fi in file_entries] + [name for name, _ in delta_jobs + copy_jobs]
+                write_journal(self.dest_path, JOURNAL_STAGING, journal_names); journal_state = JOURNAL_STAGING
+                completed = True
+                for name, info in delta_jobs:
+                    if self._should_stop():
+                        completed = False
+                        break
+                    start = time.perf_counter()
+                    self._stage_delta(zf, name, info)
+                    self.profiler.record("delta", time.perf_counter() - start, name=name, bytes=info["size"])
+                    self._tracker.add(info["size"])
+                start = time.perf_counter()
+                if completed and self.workers > 1 and len(file_entries) > 1:
+                    print(f"Estrazione parallela con {self.workers} worker.")
+                    completed = self._extract_parallel(package_path, file_entries)
+                elif completed:
+                    for file_info in file_entries:
+                        if not self._extract_entry(zf, file_info):
+                            completed = False
+                            break
+                self.profiler.record("extract", time.perf_counter() - start, files=len(file_entries), bytes=sum(fi.file_size for fi in file_entries), workers=self.workers)
+                start = time.perf_counter()
+                reflinks = 0
+                for name, info in copy_jobs:
+                    if not completed or self.isInterruptionRequested():
+                        completed = False
+                        break
+                    target_path = os.path.join(self.dest_path, name)
+                    # Il file con lo stesso contenuto può essere stato appena estratto (non ancora applicato)
+                    source_path = os.path.join(self.dest_path, info["blob"])
+                    if os.path.exists(source_path + STAGING_SUFFIX): source_path += STAGING_SUFFIX
+                    os.makedirs(os.path.dirname(target_path), exist_ok=True)
+                    try:
+                        reflinks += clone_file(source_path, target_path + STAGING_SUFFIX)
+                    except OSError as copy_error:
+                        raise IOError(f"Errore scrittura file {target_path}: {copy_error}") from copy_error
+                    self._tracker.add(info["size"])
+                if not completed:
+                    return False, "Installazione annullata dall'utente."
+                if copy_jobs:
+                    print(f"Copiati {len(copy_jobs)} file duplicati ({reflinks} tramite reflink).")
+                    self.profiler.record("copy", time.perf_counter() - start, files=len(copy_jobs), bytes=sum(info["size"] for _, info in copy_jobs), reflinks=reflinks)
+                # Tutti i file sono estratti e verificati: da qui in poi un'interruzione viene
+                # completata al prossimo avvio (recover_journal) invece che annullata
+                self.on_status("Applicazione delle modifiche...")
+                start = time.perf_counter()
+                flush_staged(self.dest_path, journal_names)
+                self.profiler.record("flush", time.perf_counter() - start, files=len(journal_names))
+                start = time.perf_counter()
+                write_journal(self.dest_path, JOURNAL_COMMIT, journal_names); journal_state = JOURNAL_COMMIT
+                commit_staged(self.dest_path, journal_names)
+                clear_journal(self.dest_path); journal_state = None
+                self.profiler.record("commit", time.perf_counter() - start, files=len(journal_names))
+                if removed:
+                    start = time.perf_counter()
+                    self._remove_files(removed)
+                    self.profiler.record("remove", time.perf_counter() - start, files=len(removed))
+                if manifest: save_install_record(self.dest_path, manifest_files, removed)
+            return True, "Installazione completata con successo!"
+        except FileNotFoundError as e:
+             write_log(self.dest_path, f"Errore FileNotFoundError: {str(e)}")
+             return False, str(e)
+        except (pyzipper.BadZipFile, RuntimeError) as e:
+            error_msg = f"Errore: {self.package_filename} è corrotto, la chiave AES usata non è valida o file zip non valido."
+            write_log(self.dest_path, f"{error_msg} Dettaglio: {type(e).__name__}: {str(e)}")
+            return False, error_msg
+        except IOError as e:
+            error_msg = f"Errore di I/O durante l'estrazione:\n{str(e)}"
+            write_log(self.dest_path, error_msg)
+            return False, error_msg + "\nVerifica permessi e spazio disco."
+        except Exception as e:
+            error_msg = f"Errore imprevisto durante l'estrazione:\n{type(e).__name__}: {str(e)}"
+            write_log(self.dest_path, error_msg, with_traceback=True)
+            return False, error_msg
+        finally:
+            self.profiler.record("install", time.perf_counter() - run_start, workers=self.workers, backup=self.do_backup, incremental=self.incremental)
+            if journal_state == JOURNAL_STAGING:
+                try:
+                    discard_staged(self.dest_path, journal_names)
+                    clear_journal(self.dest_path)
+                except OSError as cleanup_error:
+                    print(f"Avviso: file temporanei non rimossi ({cleanup_error}), verranno rimossi al prossimo avvio.")
+
+def restore_originals(dest_path, on_progress=None, should_stop=None):
+    """
+    Ripristina i file originali salvati nell'archivio di backup (BACKUP_STORE):
+    i file sovrascritti dalla patch tornano alla versione originale, quelli
+    aggiunti dalla patch vengono rimossi, insieme al registro dell'installazione
+    (INSTALL_RECORD). L'archivio viene conservato.
+
+    Args:
+        dest_path (str): Cartella di installazione della patch.
+        on_progress: Callback opzionale chiamata con la percentuale di file ripristinati.
+        should_stop: Callback opzionale; se ritorna True il ripristino viene interrotto.
+
+    Returns:
+        tuple: (successo, messaggio per l'utente).
+    """
+    try:
+        recover_journal(dest_path)
+        backup_index = load_backup_index(dest_path)
+        if not backup_index:
+            return False, f"Nessun backup trovato in '{os.path.join(dest_path, BACKUP_STORE)}'."
+        missing = []
+        for done, (name, entry) in enumerate(sorted(backup_index.items()), 1):
+            if should_stop and should_stop():
+                return False, "Ripristino annullato dall'utente."
+            target_path = os.path.join(dest_path, name)
+            if entry is None:
+                try: os.remove(target_path)
+                except FileNotFoundError: pass
+            else:
+                object_path = backup_object_path(dest_path, entry["sha256"])
+                if not os.path.isfile(object_path):
+                    missing.append(name)
+                    continue
+                os.makedirs(os.path.dirname(target_path), exist_ok=True)
+                # Copia (o reflink) e non hard link: il gioco o Steam potrebbero modificare il file
+                try: clone_file(object_path, target_path + STAGING_SUFFIX)
+                except BaseException:
+                    try: os.remove(target_path + STAGING_SUFFIX)
+                    except OSError: pass
+                    raise
+                os.replace(target_path + STAGING_SUFFIX, target_path)
+            if on_progress: on_progress(int((done / len(backup_index)) * 100))
+        if missing:
+            error_msg = f"Ripristino incompleto: {len(missing)} file mancanti nell'archivio di backup (es. {missing[0]})."
+            write_log(dest_path, error_msg + "\n" + "\n".join(missing))
+            return False, error_msg
+        # I file ora sono quelli originali: il registro non è più valido e la prossima
+        # installazione incrementale salterebbe i file con dimensione e mtime invariati
+        try: os.remove(os.path.join(dest_path, INSTALL_RECORD))
+        except FileNotFoundError: pass
+        return True, f"Ripristinati {len(backup_index)} file originali."
+    except (OSError, IOError) as e:
+        error_msg = f"Errore durante il ripristino:\n{e}"
+        write_log(dest_path, error_msg)
+        return False, error_msg
+    except Exception as e:
+        error_msg = f"Errore imprevisto durante il ripristino:\n{type(e).__name__}: {str(e)}"
+        write_log(dest_path, error_msg, with_traceback=True)
+        return False, error_msg
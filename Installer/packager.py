@@ -13,15 +13,38 @@ cifratura AES-256 da un file di testo chiamato 'chiave.txt' situato
 nella stessa directory dello script.
 
 Utilizza la libreria pyzipper per la creazione dell'archivio criptato.
+
+Oltre al pacchetto completo, lo script può creare un pacchetto "delta" che
+contiene solo i file cambiati rispetto a una versione precedente (cartella o
+pacchetto .pkg già pubblicato): i file grandi vengono salvati come diff
+binario a blocchi, da applicare dall'installer sui file già installati.
 """
 
 import os       # Per interazioni con il sistema operativo (path, walk, remove)
 import pyzipper # La libreria principale per creare archivi ZIP criptati con AES
 import sys      # Per terminare lo script in caso di errori critici (sys.exit)
+import tempfile # Per i file temporanei dei diff binari
+import time     # Per la data delle voci scritte da stream
+import shutil   # Per copiare gli stream nell'archivio
+import hashlib  # Per calcolare l'hash dei file mentre vengono aggiunti
+import struct   # Per leggere le intestazioni locali delle voci ZIP
+import concurrent.futures # Per comprimere e cifrare i file su più processi
+from pkg_format import ( # Formato del pacchetto condiviso con l'installer
+    MANIFEST_NAME, PACKAGE_DELTA, DELTA_DIR,
+    build_manifest, hash_file, hash_stream, read_manifest,
+    build_block_index, write_block_diff,
+)
 
 # --- Costanti Globali ---
 KEY_FILENAME = "chiave.txt"  # Nome del file che deve contenere la chiave di cifratura AES
                              # Questo file deve trovarsi nella stessa cartella dello script.
+DELTA_MIN_SIZE = 1024 * 1024 # I file più piccoli di questa soglia sono inclusi interi nei pacchetti delta
+DELTA_MAX_RATIO = 0.5        # Il diff binario è usato solo se è più piccolo di questa frazione del file
+BUILD_WORKERS = os.cpu_count() or 1 # Numero di processi usati per comprimere e cifrare i file
+# Estensioni di file già compressi: vengono solo cifrati (ZIP_STORED), comprimerli ancora
+# costerebbe tempo senza ridurne la dimensione
+STORED_EXTENSIONS = (".dds", ".par", ".png", ".jpg", ".usm", ".ogg")
+COPY_BUFFER_SIZE = 1024 * 1024
 
 # --- Funzioni di Utilità ---
 
@@ -42,6 +65,23 @@ def get_input_path(prompt_msg):
             return path
         print("❌ Percorso non valido o non è una directory. Riprova.")
 
+def get_source_path(prompt_msg):
+    """
+    Richiede all'utente il percorso di una sorgente per il pacchetto delta:
+    una cartella oppure un pacchetto .pkg già creato.
+
+    Args:
+        prompt_msg (str): Il messaggio da mostrare all'utente come prompt.
+
+    Returns:
+        str: Il percorso validato fornito dall'utente.
+    """
+    while True:
+        path = input(prompt_msg).strip()
+        if os.path.isdir(path) or (os.path.isfile(path) and path.lower().endswith(".pkg")):
+            return path
+        print("❌ Percorso non valido: indica una cartella o un file .pkg. Riprova.")
+
 def get_output_filename():
     """
     Richiede all'utente il nome base per il file di output e aggiunge
@@ -68,45 +108,335 @@ def confirm(prompt_msg):
     # Converte l'input in minuscolo per il confronto
     return input(prompt_msg + " [s/N]: ").lower() == 's'
 
+def remove_partial_output(output_file):
+    """
+    Tenta di rimuovere il file .pkg parzialmente creato dopo un errore.
+
+    Args:
+        output_file (str): Il percorso del file .pkg da rimuovere.
+    """
+    if os.path.exists(output_file):
+        try:
+            os.remove(output_file)
+            print(f"   🗑️  File parziale '{output_file}' rimosso.")
+        except OSError as remove_error:
+            # Errore durante la rimozione (es. permessi mancanti)
+            print(f"   ⚠️  Impossibile rimuovere il file parziale '{output_file}': {remove_error}")
+
+# --- Sorgenti dei File ---
+
+class SourceTree:
+    """
+    Insieme di file usato come sorgente per il pacchetto delta: una cartella
+    oppure un pacchetto .pkg già creato (letto con la stessa chiave).
+    """
+
+    def __init__(self, path, encryption_key):
+        """
+        Args:
+            path (str): Percorso della cartella o del file .pkg.
+            encryption_key (bytes): La chiave AES per leggere un pacchetto .pkg.
+        """
+        self.path = path
+        self.zf = None
+        self.blobs = {} # File duplicati di un pacchetto .pkg: {nome: voce che ne contiene i dati}
+        if os.path.isfile(path):
+            self.zf = pyzipper.AESZipFile(path)
+            self.zf.setpassword(encryption_key)
+
+    def files(self):
+        """
+        Elenca i file della sorgente con dimensione e hash.
+
+        Returns:
+            dict: Mappa {nome con '/' come separatore: {"size": int, "sha256": str}}.
+        """
+        if self.zf is None:
+            return {arcname: {"size": os.path.getsize(filepath), "sha256": hash_file(filepath)}
+                    for filepath, arcname in collect_source_files(self.path)}
+        manifest = read_manifest(self.zf)
+        if manifest is not None:
+            if manifest.get("type") == PACKAGE_DELTA:
+                raise ValueError(f"'{self.path}' è un pacchetto delta: usa un pacchetto completo come sorgente.")
+            self.blobs = {name: info["blob"] for name, info in manifest["files"].items() if "blob" in info}
+            return {name: {"size": info["size"], "sha256": info["sha256"]} for name, info in manifest["files"].items()}
+        # Pacchetto creato prima dell'introduzione del manifest: gli hash vanno calcolati
+        files = {}
+        for info in self.zf.infolist():
+            if not info.is_dir():
+                with self.zf.open(info) as source:
+                    files[info.filename] = {"size": info.file_size, "sha256": hash_stream(source)}
+        return files
+
+    def open(self, name):
+        """
+        Apre in lettura binaria un file della sorgente (va chiamato dopo files()).
+
+        Args:
+            name (str): Nome del file con '/' come separatore.
+
+        Returns:
+            Uno stream binario da chiudere al termine della lettura.
+        """
+        if self.zf is None:
+            return open(os.path.join(self.path, name), "rb")
+        return self.zf.open(self.blobs.get(name, name))
+
+    def close(self):
+        if self.zf is not None:
+            self.zf.close()
+
+# --- Costruzione Parallela dell'Archivio ---
+
+def compression_for(arcname):
+    """
+    Sceglie il metodo di compressione di una voce in base all'estensione.
+
+    Args:
+        arcname (str): Il nome della voce nell'archivio.
+
+    Returns:
+        int: pyzipper.ZIP_STORED per i file già compressi, pyzipper.ZIP_DEFLATED per gli altri.
+    """
+    if arcname.lower().endswith(STORED_EXTENSIONS):
+        return pyzipper.ZIP_STORED
+    return pyzipper.ZIP_DEFLATED
+
+
+def open_encrypted_zip(output_file, encryption_key):
+    """
+    Apre in scrittura un archivio ZIP cifrato con AES-256.
+
+    Args:
+        output_file (str): Il percorso dell'archivio da creare.
+        encryption_key (bytes): La chiave AES da usare per la cifratura.
+
+    Returns:
+        pyzipper.AESZipFile: L'archivio aperto in scrittura.
+    """
+    zf = pyzipper.AESZipFile(output_file, 'w',
+                             compression=pyzipper.ZIP_DEFLATED, # Algoritmo di compressione standard
+                             encryption=pyzipper.WZ_AES)        # Specifica l'uso di AES
+    # Imposta i dettagli della cifratura: AES a 256 bit
+    zf.setencryption(pyzipper.WZ_AES, nbits=256)
+    # Imposta la password (chiave) per la cifratura/decifratura
+    zf.setpassword(encryption_key)
+    return zf
+
+
+def add_file(zf, filepath, arcname):
+    """
+    Aggiunge un file all'archivio calcolandone l'hash nella stessa lettura.
+
+    Args:
+        zf (pyzipper.AESZipFile): L'archivio aperto in scrittura.
+        filepath (str): Il percorso del file su disco.
+        arcname (str): Il nome della voce nell'archivio ('/' come separatore).
+
+    Returns:
+        dict: {"size": int, "sha256": str} da registrare nel manifest.
+    """
+    zinfo = zf.zipinfo_cls.from_file(filepath, arcname)
+    zinfo.compress_type = compression_for(arcname)
+    digest = hashlib.sha256()
+    with open(filepath, "rb") as source, zf.open(zinfo, 'w') as target:
+        while True:
+            chunk = source.read(COPY_BUFFER_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+            target.write(chunk)
+    return {"size": zinfo.file_size, "sha256": digest.hexdigest()}
+
+
+def build_shard(shard_path, items, encryption_key):
+    """
+    Crea un archivio parziale con un sottoinsieme dei file. Eseguita nei processi worker.
+
+    Args:
+        shard_path (str): Il percorso dell'archivio parziale da creare.
+        items (list): Coppie (percorso su disco, nome nell'archivio).
+        encryption_key (bytes): La chiave AES da usare per la cifratura.
+
+    Returns:
+        dict: Voci del manifest dei file aggiunti.
+    """
+    files = {}
+    with open_encrypted_zip(shard_path, encryption_key) as zf:
+        for filepath, arcname in items:
+            files[arcname] = add_file(zf, filepath, arcname)
+    return files
+
+
+def split_shards(items, count):
+    """
+    Distribuisce i file in 'count' gruppi di dimensione totale simile
+    (i file più grandi vengono assegnati per primi al gruppo meno carico).
+
+    Args:
+        items (list): Coppie (percorso su disco, nome nell'archivio).
+        count (int): Numero di gruppi.
+
+    Returns:
+        list: Lista di gruppi non vuoti, ognuno ordinato per nome.
+    """
+    shards = [[] for _ in range(count)]
+    loads = [0] * count
+    for filepath, arcname in sorted(items, key=lambda item: os.path.getsize(item[0]), reverse=True):
+        lightest = loads.index(min(loads))
+        shards[lightest].append((filepath, arcname))
+        loads[lightest] += os.path.getsize(filepath)
+    return [sorted(shard, key=lambda item: item[1]) for shard in shards if shard]
+
+
+def append_raw_entries(zf, shard_path):
+    """
+    Copia nell'archivio finale le voci di un archivio parziale così come sono
+    (già compresse e cifrate), aggiornandone solo la posizione nel file.
+
+    Usa gli attributi interni di zipfile (fp, filelist, start_dir) perché
+    pyzipper non offre un'API pubblica per copiare voci senza ricomprimerle.
+
+    Args:
+        zf (pyzipper.AESZipFile): L'archivio finale aperto in scrittura.
+        shard_path (str): Il percorso dell'archivio parziale.
+    """
+    with pyzipper.AESZipFile(shard_path) as shard, open(shard_path, "rb") as raw:
+        for zinfo in shard.infolist():
+            if zinfo.flag_bits & 0x08:
+                raise ValueError(f"Voce con data descriptor non supportata: {zinfo.filename}")
+            raw.seek(zinfo.header_offset)
+            header = raw.read(30)
+            name_length, extra_length = struct.unpack("<HH", header[26:30])
+            remaining = name_length + extra_length + zinfo.compress_size
+            zf.fp.seek(zf.start_dir)
+            zinfo.header_offset = zf.fp.tell()
+            zf.fp.write(header)
+            while remaining:
+                chunk = raw.read(min(remaining, COPY_BUFFER_SIZE))
+                if not chunk:
+                    raise ValueError(f"Archivio parziale troncato: {shard_path}")
+                zf.fp.write(chunk)
+                remaining -= len(chunk)
+            zf.start_dir = zf.fp.tell()
+            zf.filelist.append(zinfo)
+            zf.NameToInfo[zinfo.filename] = zinfo
+            zf._didModify = True
+
+
+def deduplicate_items(items, workers=BUILD_WORKERS):
+    """
+    Raggruppa i file con contenuto identico (stesso hash SHA-256).
+
+    Per ogni contenuto viene scelta come voce da archiviare quella con il nome
+    minore in ordine alfabetico; gli altri percorsi diventano riferimenti
+    ("blob") a quella voce nel manifest.
+
+    Args:
+        items (list): Coppie (percorso su disco, nome nell'archivio).
+        workers (int): Numero di thread usati per il calcolo degli hash.
+
+    Returns:
+        tuple: (lista dei file da archiviare, voci del manifest dei duplicati).
+    """
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+        hashes = list(pool.map(lambda item: hash_file(item[0]), items))
+    canonical = {}
+    for (filepath, arcname), sha256 in sorted(zip(items, hashes), key=lambda pair: pair[0][1]):
+        canonical.setdefault(sha256, arcname)
+    unique_items = []
+    aliases = {}
+    for (filepath, arcname), sha256 in zip(items, hashes):
+        if canonical[sha256] == arcname:
+            unique_items.append((filepath, arcname))
+        else:
+            aliases[arcname] = {"size": os.path.getsize(filepath), "sha256": sha256, "blob": canonical[sha256]}
+    return unique_items, aliases
+
+
+def collect_source_files(source_folder):
+    """
+    Elenca ricorsivamente i file della cartella sorgente.
+
+    Args:
+        source_folder (str): La cartella da archiviare.
+
+    Returns:
+        list: Coppie (percorso su disco, nome nell'archivio con '/' come separatore).
+    """
+    items = []
+    for foldername, subfolders, filenames in os.walk(source_folder):
+        for filename in filenames:
+            # Costruisce il percorso completo del file
+            filepath = os.path.join(foldername, filename)
+            # Calcola il percorso relativo rispetto alla cartella sorgente
+            # per mantenere la struttura delle cartelle nell'archivio
+            arcname = os.path.relpath(filepath, source_folder).replace(os.sep, "/")
+            items.append((filepath, arcname))
+    return items
+
 # --- Funzione Principale di Criptazione ---
 
-def create_encrypted_package(source_folder, output_file, encryption_key):
+def create_encrypted_package(source_folder, output_file, encryption_key, workers=BUILD_WORKERS):
     """
     Crea un archivio ZIP (.pkg) criptato utilizzando AES-256.
 
     Comprime i file della cartella sorgente in un file ZIP e lo cifra
-    utilizzando la chiave fornita. Gestisce gli errori durante la creazione
-    e tenta di rimuovere file parziali in caso di fallimento.
+    utilizzando la chiave fornita. I file con contenuto identico sono salvati
+    una sola volta: il manifest indica per i duplicati da quale voce vanno
+    copiati. I file già compressi (DDS, PAR, ...) sono
+    solo cifrati, gli altri vengono anche compressi con DEFLATE. Con più
+    worker i file sono divisi in gruppi di dimensione simile: ogni processo
+    crea un archivio parziale e le voci già cifrate vengono poi copiate
+    nell'archivio finale. In coda all'archivio viene aggiunto il manifest con
+    dimensione e hash SHA-256 di ogni file, usato dall'installer per saltare
+    i file già aggiornati. Gestisce gli errori durante la creazione e tenta
+    di rimuovere file parziali in caso di fallimento.
 
     Args:
         source_folder (str): Il percorso della cartella da archiviare e criptare.
         output_file (str): Il nome completo del file .pkg di output da creare.
         encryption_key (bytes): La chiave AES (come sequenza di byte) da usare
                                 per la cifratura. Deve essere adatta per AES-256 (32 byte).
+        workers (int): Numero di processi usati per comprimere e cifrare i file.
     """
     print(f"\n⚙️  Creazione pacchetto criptato in corso: {output_file}...")
     try:
-        # Apre il file ZIP in modalità scrittura ('w') con pyzipper
-        with pyzipper.AESZipFile(output_file, 'w',
-                                 compression=pyzipper.ZIP_DEFLATED, # Algoritmo di compressione standard
-                                 encryption=pyzipper.WZ_AES) as zf: # Specifica l'uso di AES
-            # Imposta i dettagli della cifratura: AES a 256 bit
-            zf.setencryption(pyzipper.WZ_AES, nbits=256)
-            # Imposta la password (chiave) per la cifratura/decifratura
-            zf.setpassword(encryption_key)
-
-            # Itera ricorsivamente su tutti i file e sottocartelle della sorgente
-            print("   Aggiunta file all'archivio:")
-            for foldername, subfolders, filenames in os.walk(source_folder):
-                for filename in filenames:
-                    # Costruisce il percorso completo del file
-                    filepath = os.path.join(foldername, filename)
-                    # Calcola il percorso relativo rispetto alla cartella sorgente
-                    # per mantenere la struttura delle cartelle nell'archivio
-                    arcname = os.path.relpath(filepath, source_folder)
+        print("   Ricerca file duplicati...")
+        items, aliases = deduplicate_items(collect_source_files(source_folder), workers)
+        if aliases:
+            saved = sum(entry["size"] for entry in aliases.values())
+            print(f"   {len(aliases)} file duplicati salvati una sola volta ({saved / (1024 * 1024):.1f} MB risparmiati).")
+        shard_count = max(1, min(workers, len(items)))
+        # Dimensione e hash di ogni file aggiunto, per il manifest
+        manifest_files = dict(aliases)
+
+        with open_encrypted_zip(output_file, encryption_key) as zf:
+            if shard_count == 1:
+                print("   Aggiunta file all'archivio:")
+                for filepath, arcname in items:
                     print(f"     -> {arcname}") # Mostra il file che viene aggiunto
-                    # Scrive il file nell'archivio ZIP con il suo percorso relativo
-                    zf.write(filepath, arcname)
+                    manifest_files[arcname] = add_file(zf, filepath, arcname)
+            else:
+                print(f"   Compressione e cifratura di {len(items)} file su {shard_count} processi...")
+                output_dir = os.path.dirname(os.path.abspath(output_file))
+                with tempfile.TemporaryDirectory(dir=output_dir) as temp_dir, \
+                     concurrent.futures.ProcessPoolExecutor(max_workers=shard_count) as pool:
+                    shards = split_shards(items, shard_count)
+                    futures = []
+                    for i, shard in enumerate(shards):
+                        shard_path = os.path.join(temp_dir, f"shard_{i}.zip")
+                        futures.append((shard_path, len(shard), pool.submit(build_shard, shard_path, shard, encryption_key)))
+                    # Le voci vengono copiate nell'ordine dei gruppi, così l'archivio è sempre uguale
+                    for i, (shard_path, count, future) in enumerate(futures, start=1):
+                        manifest_files.update(future.result())
+                        append_raw_entries(zf, shard_path)
+                        os.remove(shard_path)
+                        print(f"     -> Gruppo {i}/{len(futures)} completato ({count} file)")
+
+            # Scrive il manifest come ultima voce (cifrata come le altre)
+            print(f"   Scrittura manifest ({len(manifest_files)} file, {len(items)} voci nell'archivio)...")
+            zf.writestr(MANIFEST_NAME, build_manifest(manifest_files))
 
         # Se tutto è andato a buon fine
         print(f"\n✅ Pacchetto criptato creato con successo: {output_file}")
@@ -115,23 +445,108 @@ def create_encrypted_package(source_folder, output_file, encryption_key):
         # Gestisce eventuali errori durante la creazione del file ZIP
         print(f"\n❌ Errore critico durante la creazione del pacchetto: {e}")
         # Tenta di rimuovere il file .pkg parzialmente creato, se esiste
-        if os.path.exists(output_file):
-            try:
-                os.remove(output_file)
-                print(f"   🗑️  File parziale '{output_file}' rimosso.")
-            except OSError as remove_error:
-                # Errore durante la rimozione (es. permessi mancanti)
-                print(f"   ⚠️  Impossibile rimuovere il file parziale '{output_file}': {remove_error}")
+        remove_partial_output(output_file)
         # Esce dallo script indicando un errore
         sys.exit(1)
 
 
+def write_stream(zf, arcname, stream):
+    """
+    Scrive nell'archivio il contenuto di uno stream (compresso e cifrato come le altre voci).
+
+    Args:
+        zf (pyzipper.AESZipFile): L'archivio aperto in scrittura.
+        arcname (str): Il nome della voce nell'archivio.
+        stream: Lo stream binario da copiare.
+    """
+    zinfo = zf.zipinfo_cls(arcname, date_time=time.localtime(time.time())[:6])
+    zinfo.compress_type = compression_for(arcname)
+    with zf.open(zinfo, 'w', force_zip64=True) as target:
+        shutil.copyfileobj(stream, target, COPY_BUFFER_SIZE)
+
+
+def create_delta_package(old_source, new_source, output_file, encryption_key):
+    """
+    Crea un pacchetto delta criptato con i soli file cambiati tra due versioni.
+
+    I file nuovi o più piccoli di DELTA_MIN_SIZE sono inclusi interi. Per i
+    file più grandi già presenti nella versione precedente viene calcolato un
+    diff binario a blocchi, usato solo se abbastanza compatto. Il manifest
+    registra per ogni diff l'hash del file base richiesto, così l'installer può
+    verificarlo prima di applicare le modifiche, e i file eliminati nella nuova
+    versione, con l'hash della versione precedente: l'installer li rimuove solo
+    se il file installato è ancora quello della patch.
+
+    Args:
+        old_source (str): Cartella o pacchetto .pkg della versione precedente.
+        new_source (str): Cartella o pacchetto .pkg della nuova versione.
+        output_file (str): Il nome completo del file .pkg delta da creare.
+        encryption_key (bytes): La chiave AES usata per leggere e scrivere i pacchetti.
+    """
+    print(f"\n⚙️  Creazione pacchetto delta in corso: {output_file}...")
+    old_tree = SourceTree(old_source, encryption_key)
+    new_tree = SourceTree(new_source, encryption_key)
+    try:
+        print("   Analisi delle due versioni...")
+        old_files = old_tree.files()
+        new_files = new_tree.files()
+        removed = {name: old_files[name] for name in sorted(set(old_files) - set(new_files))}
+
+        with tempfile.TemporaryDirectory() as temp_dir, \
+             open_encrypted_zip(output_file, encryption_key) as zf:
+
+            manifest_files = {}
+            full_count = delta_count = 0
+            print("   Aggiunta file modificati all'archivio:")
+            for name, info in sorted(new_files.items()):
+                old_info = old_files.get(name)
+                if old_info is not None and old_info["sha256"] == info["sha256"]:
+                    continue # File invariato: non serve nel pacchetto delta
+                entry = dict(info)
+                if old_info is not None and info["size"] >= DELTA_MIN_SIZE:
+                    # Calcola il diff binario rispetto alla versione precedente
+                    diff_path = os.path.join(temp_dir, "diff.bin")
+                    with old_tree.open(name) as base:
+                        base_index, base_size, base_sha256 = build_block_index(base)
+                    with new_tree.open(name) as target, open(diff_path, "wb") as diff:
+                        write_block_diff(base_index, target, diff)
+                    diff_size = os.path.getsize(diff_path)
+                    if diff_size < info["size"] * DELTA_MAX_RATIO:
+                        patch_name = DELTA_DIR + name + ".bdiff"
+                        print(f"     ~> {name} (diff: {diff_size} byte su {info['size']})")
+                        zf.write(diff_path, patch_name)
+                        entry["delta"] = {"patch": patch_name, "base_size": base_size, "base_sha256": base_sha256}
+                        manifest_files[name] = entry
+                        delta_count += 1
+                        continue
+                print(f"     -> {name}")
+                with new_tree.open(name) as source:
+                    write_stream(zf, name, source)
+                manifest_files[name] = entry
+                full_count += 1
+
+            for name in removed:
+                print(f"     x> {name} (rimosso)")
+            print(f"   Scrittura manifest ({full_count} file completi, {delta_count} diff binari, {len(removed)} file rimossi)...")
+            zf.writestr(MANIFEST_NAME, build_manifest(manifest_files, PACKAGE_DELTA, removed))
+
+        print(f"\n✅ Pacchetto delta creato con successo: {output_file}")
+
+    except Exception as e:
+        print(f"\n❌ Errore critico durante la creazione del pacchetto delta: {e}")
+        remove_partial_output(output_file)
+        sys.exit(1)
+    finally:
+        old_tree.close()
+        new_tree.close()
+
+
 # --- Blocco di Esecuzione Principale ---
 if __name__ == "__main__":
     """
     Punto di ingresso dello script. Gestisce il flusso principale:
     1. Lettura della chiave dal file.
-    2. Raccolta input dall'utente (cartella sorgente, nome output).
+    2. Raccolta input dall'utente (tipo di pacchetto, sorgenti).
     3. Visualizzazione riepilogo.
     4. Richiesta conferma.
     5. Avvio della creazione del pacchetto criptato.
@@ -176,13 +591,21 @@ if __name__ == "__main__":
         sys.exit(1) # Termina per altri errori di lettura
 
     # --- 2. Raccolta input utente ---
-    source = get_input_path("📁 Inserisci il percorso della cartella da includere nel pacchetto: ")
+    delta_mode = input("📦 Tipo di pacchetto: [1] Completo  [2] Delta (solo differenze) [1]: ").strip() == "2"
+    if delta_mode:
+        old_source = get_source_path("📁 Inserisci la versione precedente (cartella o file .pkg): ")
+        source = get_source_path("📁 Inserisci la nuova versione (cartella o file .pkg): ")
+    else:
+        source = get_input_path("📁 Inserisci il percorso della cartella da includere nel pacchetto: ")
     output = "patch.pkg"
 
     # --- 3. Visualizzazione riepilogo ---
     print(f"\n📋 Riepilogo Operazione:")
+    if delta_mode:
+        print(f"   - Versione precedente:  {old_source}")
     print(f"   - Cartella sorgente:    {source}")
     print(f"   - File pacchetto (.pkg):{output}")
+    print(f"   - Tipo pacchetto:       {'Delta' if delta_mode else 'Completo'}")
     print(f"   - File chiave usato:    {KEY_FILENAME}") # Mostra quale file chiave è stato letto
 
     # --- 4. Richiesta Conferma ---
@@ -190,7 +613,10 @@ if __name__ == "__main__":
     if confirm("\nProcedere con la creazione del pacchetto criptato?"):
         # --- 5. Avvio Creazione Pacchetto ---
         # Chiama la funzione principale passando i parametri raccolti
-        create_encrypted_package(source, output, aes_key_from_file)
+        if delta_mode:
+            create_delta_package(old_source, source, output, aes_key_from_file)
+        else:
+            create_encrypted_package(source, output, aes_key_from_file)
     else:
         # Se l'utente non conferma
         print("\n⏹️  Operazione annullata dall'utente.")
\ No newline at end of file
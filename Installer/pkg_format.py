@@ -0,0 +1,358 @@
+"""
+;==========================================
+; Title:  pkg_format.py
+; Author: zSavT
+; Date:   18/10/2026
+;==========================================
+
+Costanti e funzioni condivise tra packager.py e installer.py per il formato
+del pacchetto criptato (.pkg).
+
+Oltre ai file della patch, il pacchetto contiene una voce speciale (il
+manifest) con dimensione e hash SHA-256 di ogni file. Il manifest è cifrato
+come le altre voci e non viene mai estratto nella cartella del gioco.
+I file con contenuto identico sono archiviati una sola volta: nel manifest
+i duplicati indicano con la chiave "blob" la voce che ne contiene i dati.
+
+Un pacchetto "delta" contiene solo i file cambiati rispetto a una versione
+precedente: i file piccoli sono salvati interi, quelli grandi (es. PAR) come
+diff binario a blocchi da applicare sul file già installato. Il manifest elenca
+anche i file eliminati nella nuova versione, che l'installer rimuove.
+"""
+
+import hashlib  # Per il calcolo degli hash SHA-256 dei file
+import io       # Per riconoscere gli stream che supportano readinto()
+import os       # Per la dimensione dei file da leggere
+import json     # Per la serializzazione del manifest
+import struct   # Per la codifica delle operazioni del diff binario
+
+import pyzipper # Per le eccezioni degli archivi cifrati
+
+# --- Costanti Globali ---
+MANIFEST_NAME = "_patch_ita_manifest.json"  # Nome della voce del manifest all'interno del pacchetto
+MANIFEST_FORMAT = 1                         # Versione del formato del manifest
+HASH_CHUNK_SIZE = 1024 * 1024               # Dimensione dei blocchi letti durante il calcolo degli hash
+MIN_CHUNK_SIZE = 4096                       # Dimensione minima dei blocchi di lettura adattati al file
+PACKAGE_FULL = "full"                       # Pacchetto completo
+PACKAGE_DELTA = "delta"                     # Pacchetto con le sole differenze da una versione precedente
+DELTA_DIR = "_patch_ita_delta/"             # Prefisso delle voci che contengono diff binari
+DELTA_BLOCK_SIZE = 64 * 1024                # Dimensione dei blocchi confrontati dal diff binario
+DELTA_MAGIC = b"Y4PD\x01"                   # Intestazione di un diff binario
+
+_OP_COPY = b"C"     # Copia 'length' byte dal file base a partire da 'offset'
+_OP_LITERAL = b"L"  # Inserisce 'length' byte presenti nel diff
+_OP_END = b"E"      # Fine del diff
+_MAX_LITERAL = 4 * 1024 * 1024
+
+
+def chunk_size_for(size, maximum=HASH_CHUNK_SIZE):
+    """
+    Dimensione dei blocchi con cui leggere un file di 'size' byte: i file piccoli
+    vengono letti in un'unica volta, senza allocare un buffer più grande del necessario.
+
+    Args:
+        size (int): Dimensione del file.
+        maximum (int): Dimensione massima dei blocchi.
+
+    Returns:
+        int: La dimensione dei blocchi.
+    """
+    return max(MIN_CHUNK_SIZE, min(size, maximum))
+
+
+def hash_stream(stream, chunk_size=HASH_CHUNK_SIZE):
+    """
+    Calcola l'hash SHA-256 di uno stream binario leggendolo a blocchi.
+
+    Se lo stream supporta readinto() (file su disco) i dati vengono letti sempre
+    nello stesso buffer, senza creare un nuovo oggetto bytes per ogni blocco.
+
+    Args:
+        stream: Oggetto file-like aperto in lettura binaria.
+        chunk_size (int): Dimensione dei blocchi letti.
+
+    Returns:
+        str: L'hash SHA-256 in formato esadecimale.
+    """
+    digest = hashlib.sha256()
+    if isinstance(stream, io.RawIOBase):
+        view = memoryview(bytearray(chunk_size))
+        while True:
+            count = stream.readinto(view)
+            if not count:
+                break
+            digest.update(view[:count])
+        return digest.hexdigest()
+    # read1() restituisce i blocchi così come escono dalla decompressione, senza ricomporli
+    read = getattr(stream, "read1", stream.read)
+    while True:
+        chunk = read(chunk_size)
+        if not chunk:
+            break
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_file(path):
+    """
+    Calcola l'hash SHA-256 di un file su disco.
+
+    Args:
+        path (str): Percorso del file.
+
+    Returns:
+        str: L'hash SHA-256 in formato esadecimale.
+    """
+    # Senza buffer di Python: readinto() scrive direttamente nel buffer di hash_stream
+    with open(path, "rb", buffering=0) as f:
+        return hash_stream(f, chunk_size_for(os.fstat(f.fileno()).st_size))
+
+
+def build_manifest(files, package_type=PACKAGE_FULL, removed=None):
+    """
+    Serializza il manifest del pacchetto.
+
+    Args:
+        files (dict): Mappa {nome voce nell'archivio: {"size": int, "sha256": str}}.
+                      I nomi usano sempre '/' come separatore, come nel file ZIP.
+                      Nei pacchetti delta le voci applicate come diff hanno in più
+                      la chiave "delta": {"patch": str, "base_size": int, "base_sha256": str}.
+                      I file duplicati, assenti dall'archivio, hanno la chiave
+                      "blob" con il nome della voce che contiene lo stesso contenuto.
+        package_type (str): PACKAGE_FULL oppure PACKAGE_DELTA.
+        removed (dict | None): Solo nei pacchetti delta, i file della versione precedente
+                               eliminati nella nuova: {nome: {"size": int, "sha256": str}},
+                               con dimensione e hash del file installato dalla versione precedente.
+
+    Returns:
+        bytes: Il manifest in formato JSON (UTF-8), pronto per essere scritto nell'archivio.
+    """
+    manifest = {"format": MANIFEST_FORMAT, "type": package_type, "files": files}
+    if removed: manifest["removed"] = removed
+    return json.dumps(manifest, indent=1, sort_keys=True).encode("utf-8")
+
+
+def read_manifest(zf):
+    """
+    Legge il manifest da un pacchetto aperto.
+
+    Args:
+        zf (pyzipper.AESZipFile): L'archivio aperto, con la password già impostata.
+
+    Returns:
+        dict | None: Il manifest decodificato, oppure None se il pacchetto è stato
+                     creato con una versione del packager che non lo includeva.
+    """
+    if MANIFEST_NAME not in zf.NameToInfo:
+        return None
+    return json.loads(zf.read(MANIFEST_NAME).decode("utf-8"))
+
+
+def iter_check(zf, chunk_size=HASH_CHUNK_SIZE):
+    """
+    Verifica un pacchetto voce per voce, al posto di testzip().
+
+    Se il pacchetto ha un manifest viene decriptato solo quello: il codice di
+    autenticazione (HMAC) della voce AES conferma che la chiave è corretta e
+    che il manifest non è stato alterato. Si controlla poi che ogni file del
+    manifest sia presente nell'archivio con la dimensione attesa; l'hash del
+    contenuto viene verificato durante l'estrazione. I pacchetti senza
+    manifest vengono decriptati e verificati per intero, come con testzip().
+
+    Args:
+        zf (pyzipper.AESZipFile): L'archivio aperto, con la password già impostata.
+        chunk_size (int): Dimensione dei blocchi letti per i pacchetti senza manifest.
+
+    Yields:
+        tuple: (voci controllate, voci totali, nome della voce non valida oppure None).
+               Dopo la prima voce non valida non vengono controllate altre voci.
+
+    Raises:
+        RuntimeError, pyzipper.BadZipFile: Se la chiave è errata o il manifest è corrotto.
+    """
+    manifest = read_manifest(zf)
+    if manifest is None:
+        infos = zf.infolist()
+        for done, info in enumerate(infos, 1):
+            try:
+                with zf.open(info) as entry:
+                    while entry.read1(chunk_size):
+                        pass
+            except pyzipper.BadZipFile:
+                yield done, len(infos), info.filename
+                return
+            yield done, len(infos), None
+        return
+    files = manifest["files"]
+    for done, (name, info) in enumerate(files.items(), 1):
+        if "blob" in info:
+            entry = zf.NameToInfo.get(info["blob"])
+            expected_size = info["size"]
+        elif "delta" in info:
+            entry = zf.NameToInfo.get(info["delta"]["patch"])
+            expected_size = None # La dimensione del diff non è nota al manifest
+        else:
+            entry = zf.NameToInfo.get(name)
+            expected_size = info["size"]
+        if entry is None or (expected_size is not None and entry.file_size != expected_size):
+            yield done, len(files), name
+            return
+        yield done, len(files), None
+
+
+def quick_check(zf):
+    """
+    Verifica un pacchetto con iter_check() in un'unica chiamata.
+
+    Args:
+        zf (pyzipper.AESZipFile): L'archivio aperto, con la password già impostata.
+
+    Returns:
+        str | None: Il nome della prima voce non valida, oppure None se il pacchetto è valido.
+    """
+    for _, _, bad_name in iter_check(zf):
+        if bad_name is not None:
+            return bad_name
+    return None
+
+
+# --- Diff binario a blocchi ---
+
+def _block_digest(block):
+    return hashlib.blake2b(block, digest_size=16).digest()
+
+
+def build_block_index(stream, block_size=DELTA_BLOCK_SIZE):
+    """
+    Indicizza i blocchi di un file base per il calcolo del diff binario.
+
+    Args:
+        stream: Stream binario del file base, letto in modo sequenziale.
+        block_size (int): Dimensione dei blocchi.
+
+    Returns:
+        tuple: (indice {digest del blocco: offset}, dimensione, hash SHA-256 del file base).
+    """
+    index = {}
+    digest = hashlib.sha256()
+    offset = 0
+    while True:
+        block = stream.read(block_size)
+        if not block:
+            break
+        digest.update(block)
+        index.setdefault(_block_digest(block), offset)
+        offset += len(block)
+    return index, offset, digest.hexdigest()
+
+
+def write_block_diff(base_index, target, out, block_size=DELTA_BLOCK_SIZE):
+    """
+    Scrive il diff binario che trasforma il file base nel file target.
+
+    Il target viene letto a blocchi allineati: ogni blocco già presente nel file
+    base (in qualunque posizione allineata) diventa una copia, gli altri sono
+    salvati per intero. Copie contigue vengono unite in un'unica operazione.
+
+    Vengono riconosciuti solo i blocchi allineati a block_size: un'inserzione o
+    una cancellazione che sposta i dati di un numero di byte non multiplo di
+    block_size rende letterali tutti i blocchi successivi, e il diff diventa
+    grande quasi quanto il file (create_delta_package salva allora il file intero).
+
+    Args:
+        base_index (dict): Indice restituito da build_block_index().
+        target: Stream binario del nuovo file, letto in modo sequenziale.
+        out: Stream binario in cui scrivere il diff.
+        block_size (int): Dimensione dei blocchi (deve coincidere con quella dell'indice).
+
+    Returns:
+        int: Numero di byte salvati per intero nel diff.
+    """
+    out.write(DELTA_MAGIC)
+    literal = bytearray()
+    copy_offset = copy_length = 0
+    literal_bytes = 0
+
+    def flush_copy():
+        nonlocal copy_length
+        if copy_length:
+            out.write(_OP_COPY + struct.pack("<QQ", copy_offset, copy_length))
+            copy_length = 0
+
+    def flush_literal():
+        if literal:
+            out.write(_OP_LITERAL + struct.pack("<Q", len(literal)))
+            out.write(literal)
+            literal.clear()
+
+    while True:
+        block = target.read(block_size)
+        if not block:
+            break
+        offset = base_index.get(_block_digest(block))
+        if offset is None:
+            flush_copy()
+            literal += block
+            literal_bytes += len(block)
+            if len(literal) >= _MAX_LITERAL:
+                flush_literal()
+            continue
+        flush_literal()
+        if copy_length and copy_offset + copy_length == offset:
+            copy_length += len(block)
+        else:
+            flush_copy()
+            copy_offset, copy_length = offset, len(block)
+    flush_copy()
+    flush_literal()
+    out.write(_OP_END)
+    return literal_bytes
+
+
+def _read_exact(stream, size):
+    data = stream.read(size)
+    if len(data) != size:
+        raise ValueError("Diff binario troncato.")
+    return data
+
+
+def apply_block_diff(base, diff, out, chunk_size=HASH_CHUNK_SIZE):
+    """
+    Ricostruisce il nuovo file applicando un diff binario al file base.
+
+    Args:
+        base: Stream binario del file base (deve supportare seek).
+        diff: Stream binario del diff, letto in modo sequenziale.
+        out: Stream binario in cui scrivere il file ricostruito.
+        chunk_size (int): Dimensione massima dei blocchi copiati.
+
+    Raises:
+        ValueError: Se il diff non è valido o è troncato.
+    """
+    if diff.read(len(DELTA_MAGIC)) != DELTA_MAGIC:
+        raise ValueError("Intestazione del diff binario non valida.")
+    buffer = None
+    while True:
+        op = _read_exact(diff, 1)
+        if op == _OP_END:
+            return
+        if op == _OP_COPY:
+            offset, length = struct.unpack("<QQ", _read_exact(diff, 16))
+            base.seek(offset)
+            source = base
+        elif op == _OP_LITERAL:
+            (length,) = struct.unpack("<Q", _read_exact(diff, 8))
+            source = diff
+        else:
+            raise ValueError(f"Operazione sconosciuta nel diff binario: {op!r}")
+        while length:
+            size = min(length, chunk_size)
+            if source is base:
+                # I blocchi del file base sono letti sempre nello stesso buffer
+                if buffer is None: buffer = memoryview(bytearray(chunk_size))
+                if base.readinto(buffer[:size]) != size:
+                    raise ValueError("File base troncato.")
+                out.write(buffer[:size])
+            else:
+                out.write(_read_exact(source, size))
+            length -= size
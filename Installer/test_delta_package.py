@@ -0,0 +1,98 @@
+"""
+;==========================================
+; Title:  test_delta_package.py
+; Author: zSavT
+; Date:   18/10/2026
+;==========================================
+
+Test dall'inizio alla fine dei pacchetti delta: la cartella del gioco aggiornata
+con il delta deve coincidere con quella in cui è installata la nuova versione
+completa, anche per i file eliminati tra le due versioni.
+
+    python -m pytest Installer/test_delta_package.py
+"""
+
+import os
+import shutil
+
+import packager
+from installer_core import InstallEngine, restore_originals
+
+KEY = b"test-key-0123456789abcdef0123456"
+BIG = packager.DELTA_MIN_SIZE + 4096 # Abbastanza grande da essere aggiornato con un diff binario
+
+
+def write_tree(root, files):
+    """Crea una cartella con i file indicati ({nome con '/': contenuto})."""
+    for name, data in files.items():
+        path = os.path.join(root, *name.split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f: f.write(data)
+    return root
+
+
+def read_tree(root):
+    """Contenuto di una cartella ({nome con '/': contenuto}), senza i file dell'installer (_patch_ita*, backup)."""
+    files = {}
+    for directory, dirs, names in os.walk(root):
+        dirs[:] = [name for name in dirs if not name.startswith("_")]
+        for name in names:
+            if name.startswith("_"): continue
+            path = os.path.join(directory, name)
+            with open(path, "rb") as f: files[os.path.relpath(path, root).replace(os.sep, "/")] = f.read()
+    return files
+
+
+def install(dest, package, backup=True):
+    success, message = InstallEngine(dest, KEY, backup, package, 1).run()
+    assert success, message
+
+
+def test_delta_removes_files_deleted_in_new_version(tmp_path):
+    big = bytes(range(256)) * (BIG // 256)
+    vanilla = write_tree(str(tmp_path / "gioco"), {
+        "stage/archive.par": big,
+        "font/font.dds": b"font originale",   # Sostituito dalla v1, non più dalla v2
+        "mod/utente.txt": b"file dell'utente",
+    })
+    old = write_tree(str(tmp_path / "v1"), {
+        "stage/archive.par": big[:4096] + b"v1" * 2048 + big[8192:],
+        "font/font.dds": b"font tradotto v1",
+        "msg/extra.po": b"testo aggiunto dalla v1",  # Aggiunto dalla v1, eliminato nella v2
+        "mod/utente.txt": b"sostituito dalla v1",   # Eliminato nella v2, ma modificato dall'utente
+        "msg/main.po": b"v1",
+    })
+    new = write_tree(str(tmp_path / "v2"), {
+        "stage/archive.par": big[:4096] + b"v2" * 2048 + big[8192:],
+        "msg/main.po": b"v2",
+        "msg/nuovo.po": b"aggiunto dalla v2",
+    })
+    for source in (old, new):
+        packager.create_encrypted_package(source, source + ".pkg", KEY, workers=1)
+    packager.create_delta_package(old + ".pkg", new + ".pkg", str(tmp_path / "delta.pkg"), KEY)
+
+    # Riferimento: nuova versione completa installata sul gioco originale
+    expected_dest = str(tmp_path / "completa")
+    shutil.copytree(vanilla, expected_dest)
+    install(expected_dest, new + ".pkg")
+
+    dest = str(tmp_path / "delta")
+    shutil.copytree(vanilla, dest)
+    install(dest, old + ".pkg")
+    with open(os.path.join(dest, "mod", "utente.txt"), "wb") as f: f.write(b"modificato dall'utente")
+    install(dest, str(tmp_path / "delta.pkg"))
+
+    result = read_tree(dest)
+    assert result.pop("mod/utente.txt") == b"modificato dall'utente" # Non è più il file della v1: non viene toccato
+    expected = read_tree(expected_dest)
+    del expected["mod/utente.txt"]
+    assert result == expected
+    assert result["font/font.dds"] == b"font originale"
+    assert "msg/extra.po" not in result
+
+    # Il ripristino riporta i file originali del gioco
+    success, message = restore_originals(dest)
+    assert success, message
+    restored = read_tree(dest)
+    assert restored["stage/archive.par"] == big and restored["font/font.dds"] == b"font originale"
+    assert "msg/extra.po" not in restored and "msg/nuovo.po" not in restored
@@ -0,0 +1,141 @@
+"""
+;==========================================
+; Title:  check_consistency.py
+; Author: zSavT
+; Date:   18/10/2026
+;==========================================
+
+Trova i testi inglesi identici tradotti in modo diverso nei vari file (ad esempio
+il nome di un oggetto in "db.soul/en/msg.po" e nei negozi di "wdr_par_en/.../shop").
+
+Le voci tradotte vengono raggruppate per msgid normalizzato (spazi e a capo
+uniformati) tramite un indice hash salvato nell'indice di po_index.py: per ogni
+voce si conservano l'hash del msgid e quello della traduzione. Vengono segnalati
+i gruppi con più traduzioni diverse, con file e msgctxt di ogni occorrenza.
+
+L'analisi è incrementale: gli hash vengono ricalcolati solo per i file il cui
+contenuto (SHA-256) è cambiato dall'ultima esecuzione.
+
+    python check_consistency.py
+    python check_consistency.py --tutte --limite 20
+
+Codice di uscita: 1 se esistono testi tradotti in modo diverso, altrimenti 0.
+"""
+
+import sys      # Per il codice di uscita
+import time     # Per il tempo impiegato
+import hashlib  # Per l'hash dei testi normalizzati
+import argparse # Per le opzioni da riga di comando
+
+import po_corpus
+import po_index
+
+# --- Costanti Globali ---
+FUZZY = "fuzzy"
+SHOWN_LOCATIONS = 3 # Posizioni mostrate per ogni traduzione (tutte con --tutte)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS consistency_files (
+    file_id INTEGER PRIMARY KEY REFERENCES files (id) ON DELETE CASCADE,
+    sha256 TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS consistency_keys (
+    entry_id INTEGER PRIMARY KEY REFERENCES entries (id) ON DELETE CASCADE,
+    file_id INTEGER NOT NULL REFERENCES files (id) ON DELETE CASCADE,
+    msgid_key INTEGER NOT NULL,
+    msgstr_key INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS consistency_by_msgid ON consistency_keys (msgid_key, msgstr_key);
+CREATE INDEX IF NOT EXISTS consistency_by_file ON consistency_keys (file_id);
+"""
+
+
+def normalize(text):
+    """Testo normalizzato per il confronto: a capo (veri e "\\n" del gioco) e spazi ripetuti diventano un solo spazio."""
+    return " ".join(text.replace("\\n", " ").split())
+
+
+def text_key(text):
+    """Hash a 64 bit (con segno, per SQLite) del testo normalizzato."""
+    digest = hashlib.blake2b(normalize(text).encode("utf-8", "surrogateescape"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+def update_keys(index):
+    """
+    Aggiorna gli hash delle voci tradotte dei soli file cambiati dall'ultima esecuzione.
+    I file rimossi dall'indice vengono eliminati anche da qui (ON DELETE CASCADE).
+
+    Returns:
+        int: Numero di file rielaborati.
+    """
+    index.db.executescript(SCHEMA)
+    changed = index.db.execute("SELECT f.id, f.sha256 FROM files f LEFT JOIN consistency_files c ON c.file_id = f.id "
+                               "WHERE f.tree = ? AND (c.sha256 IS NULL OR c.sha256 != f.sha256)", (po_index.TRANSLATED,)).fetchall()
+    with index.db:
+        for file_id, sha256 in changed:
+            index.db.execute("DELETE FROM consistency_keys WHERE file_id = ?", (file_id,))
+            rows = index.db.execute("SELECT id, msgid, msgstr, flags FROM entries WHERE file_id = ?", (file_id,)).fetchall()
+            index.db.executemany("INSERT INTO consistency_keys (entry_id, file_id, msgid_key, msgstr_key) VALUES (?, ?, ?, ?)",
+                                 [(entry_id, file_id, text_key(msgid), text_key(msgstr)) for entry_id, msgid, msgstr, flags in rows
+                                  if msgid and msgstr and FUZZY not in flags.split(",")])
+            index.db.execute("INSERT OR REPLACE INTO consistency_files (file_id, sha256) VALUES (?, ?)", (file_id, sha256))
+    return len(changed)
+
+
+def divergent_groups(index):
+    """
+    Ritorna i testi inglesi con più traduzioni diverse, dai più frequenti.
+
+    Returns:
+        list[dict]: {"msgid": testo inglese, "occurrences": numero di voci,
+                     "translations": [{"msgstr": traduzione, "locations": [(file, msgctxt, riga), ...]}, ...]},
+                     con le traduzioni dalla più usata.
+    """
+    rows = index.db.execute(
+        "SELECT k.msgid_key, k.msgstr_key, f.path, e.msgctxt, e.line, e.msgid, e.msgstr FROM consistency_keys k "
+        "JOIN entries e ON e.id = k.entry_id JOIN files f ON f.id = k.file_id "
+        "WHERE k.msgid_key IN (SELECT msgid_key FROM consistency_keys GROUP BY msgid_key HAVING COUNT(DISTINCT msgstr_key) > 1) "
+        "ORDER BY f.path, e.line")
+    groups = {}
+    for msgid_key, msgstr_key, path, msgctxt, line, msgid, msgstr in rows:
+        group = groups.setdefault(msgid_key, {"msgid": msgid, "occurrences": 0, "translations": {}})
+        group["occurrences"] += 1
+        group["translations"].setdefault(msgstr_key, {"msgstr": msgstr, "locations": []})["locations"].append((path, msgctxt, line))
+    result = []
+    for group in groups.values():
+        group["translations"] = sorted(group["translations"].values(), key=lambda translation: -len(translation["locations"]))
+        result.append(group)
+    result.sort(key=lambda group: (-group["occurrences"], group["msgid"]))
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Testi inglesi identici tradotti in modo diverso nei vari file.")
+    parser.add_argument("--corpus", default=po_corpus.CORPUS_DIR, help="Cartella con 'File Estratti Originali' e 'File Estratti Tradotti'.")
+    parser.add_argument("--index", default=po_index.INDEX_FILE, help="File dell'indice SQLite.")
+    parser.add_argument("--limite", type=int, help="Numero massimo di testi mostrati (predefinito: tutti).")
+    parser.add_argument("--tutte", action="store_true", help=f"Mostra tutte le posizioni di ogni traduzione (predefinito: le prime {SHOWN_LOCATIONS}).")
+    parser.add_argument("--no-refresh", action="store_true", help="Non aggiorna l'indice prima del controllo.")
+    args = parser.parse_args(argv)
+
+    with po_index.PoIndex(args.index, args.corpus) as index:
+        start = time.perf_counter()
+        if not args.no_refresh: index.refresh()
+        updated = update_keys(index)
+        groups = divergent_groups(index)
+        elapsed = time.perf_counter() - start
+    for group in groups[:args.limite]:
+        print(f"⚠️ {len(group['translations'])} traduzioni diverse in {group['occurrences']} voci per EN: {po_corpus.escape(group['msgid'])}")
+        for translation in group["translations"]:
+            locations = translation["locations"]
+            shown = locations if args.tutte else locations[:SHOWN_LOCATIONS]
+            others = f", e altre {len(locations) - len(shown)}" if len(locations) > len(shown) else ""
+            print(f"   ({len(locations)}x) IT: {po_corpus.escape(translation['msgstr'])}")
+            print("      in " + ", ".join(f"{path}:{line} [{po_corpus.escape(msgctxt or '')}]" for path, msgctxt, line in shown) + others)
+    print(f"{len(groups)} testi inglesi con traduzioni diverse ({updated} file rielaborati, {elapsed:.1f} s).")
+    return 1 if groups else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
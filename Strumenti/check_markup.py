@@ -0,0 +1,167 @@
+"""
+;==========================================
+; Title:  check_markup.py
+; Author: zSavT
+; Date:   18/10/2026
+;==========================================
+
+Controlla che le traduzioni conservino i codici di controllo del testo inglese:
+
+- i tag del motore di gioco (<Color:Default>, <Color:255,200,200,255>,
+  <Action:Battle_Heavy_Attack@Combat>, <Italic>...</Italic>, <Sign:0>, <Name:...>);
+- i segnaposto di formato (%s, %d, %2d, %-5s, ...).
+
+Per ogni coppia msgid/msgstr dei file tradotti vengono confrontati i tag dei due
+testi e segnalati:
+
+- errori: tag mancanti o alterati (es. <Color:7> diventato <Color:8>), tag non
+  bilanciati nella traduzione (<Italic> senza </Italic>, colore non riportato a
+  <Color:Default>), segnaposto aggiunti, mancanti o in ordine diverso;
+- avvisi: tag aggiunti dalla traduzione (es. una parola in più evidenziata) e
+  differenze nei tag che già nel testo inglese non sono bilanciati.
+
+I file vengono letti in parallelo con il pool di po_corpus.
+
+    python check_markup.py                      # tutti i file tradotti
+    python check_markup.py file1.po file2.po    # solo i file indicati
+
+Codice di uscita: 1 se è stato trovato almeno un errore, altrimenti 0.
+"""
+
+import os           # Per i percorsi dei file
+import re           # Per la lettura dei tag
+import sys          # Per il codice di uscita
+import time         # Per il tempo impiegato
+import argparse     # Per le opzioni da riga di comando
+import collections  # Per il conteggio dei tag
+
+import po_corpus
+
+# --- Costanti Globali ---
+ERROR = "errore"
+WARNING = "avviso"
+FORMAT = "%"          # Tipo dei segnaposto di formato
+DEFAULT_COLOR = "Default"
+
+# Tag del motore (<Nome:argomenti>, <Italic>, </Italic>) e segnaposto printf. Il flag
+# "spazio" dei segnaposto non è considerato: "100% completo" non contiene "% c".
+TOKEN_RE = re.compile(r"<(/?)(Color|Action|Italic|Sign|Name|NName)(?::([^<>]*))?>|%[-+#0]*\d*(?:\.\d+)?[sdifxXc]")
+
+
+def tokenize(text):
+    """
+    Ritorna i codici di controllo di un testo, nell'ordine.
+
+    Returns:
+        list[tuple]: (tag completo, tipo), dove il tipo è il nome del tag (es. "Color") oppure FORMAT.
+    """
+    return [(match.group(0), match.group(2) or FORMAT) for match in TOKEN_RE.finditer(text)]
+
+
+def unbalanced(tokens):
+    """
+    Controlla l'apertura e la chiusura dei tag.
+
+    Returns:
+        dict: {tipo del tag: descrizione del problema} per i tag non bilanciati.
+    """
+    problems = {}
+    italic = 0
+    color = None # Ultimo colore diverso da quello predefinito
+    for tag, kind in tokens:
+        if kind == "Italic":
+            if tag.startswith("</"):
+                if not italic: problems.setdefault(kind, f"'{tag}' senza '<Italic>'")
+                italic = max(italic - 1, 0)
+            else:
+                italic += 1
+        elif kind == "Color":
+            color = None if tag == f"<Color:{DEFAULT_COLOR}>" else tag
+    if italic:
+        problems.setdefault("Italic", "'<Italic>' non chiuso")
+    if color:
+        problems["Color"] = f"'{color}' non riportato a '<Color:{DEFAULT_COLOR}>'"
+    return problems
+
+
+def check_pair(msgid, msgstr):
+    """
+    Confronta i codici di controllo di una coppia.
+
+    Returns:
+        list[tuple]: (ERROR o WARNING, descrizione) per ogni problema; vuota se i codici coincidono.
+    """
+    if not msgstr:
+        return [] # Voce non tradotta
+    source, target = tokenize(msgid), tokenize(msgstr)
+    if source == target:
+        return []
+    problems = []
+    source_unbalanced = unbalanced(source)
+    severity = lambda kind: WARNING if kind in source_unbalanced else ERROR
+    missing = collections.Counter(source) - collections.Counter(target)
+    added = collections.Counter(target) - collections.Counter(source)
+    for token in sorted(missing.elements()):
+        tag, kind = token
+        # Un tag mancante e uno aggiunto dello stesso tipo sono un tag alterato
+        replacement = next((other for other in sorted(added) if other[1] == kind), None)
+        if replacement:
+            added[replacement] -= 1
+            if not added[replacement]: del added[replacement]
+            problems.append((severity(kind), f"'{tag}' diventato '{replacement[0]}'"))
+        else:
+            problems.append((severity(kind), f"'{tag}' mancante"))
+    for tag, kind in sorted(added.elements()):
+        problems.append((ERROR if kind == FORMAT else WARNING, f"'{tag}' aggiunto"))
+    source_formats = [tag for tag, kind in source if kind == FORMAT]
+    target_formats = [tag for tag, kind in target if kind == FORMAT]
+    if source_formats != target_formats and sorted(source_formats) == sorted(target_formats):
+        problems.append((ERROR, f"segnaposto in ordine diverso ({' '.join(source_formats)} -> {' '.join(target_formats)})"))
+    for kind, problem in unbalanced(target).items():
+        if kind not in source_unbalanced: problems.append((ERROR, problem))
+    return problems
+
+
+def check_file(path):
+    """
+    Controlla un file PO (eseguita nei processi del pool).
+
+    Returns:
+        list[tuple]: (PoEntry, ERROR o WARNING, descrizione) per ogni problema.
+    """
+    return [(entry, severity, problem) for entry in po_corpus.read_po(path) for severity, problem in check_pair(entry.msgid, entry.msgstr)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Controllo dei tag e dei segnaposto nelle traduzioni.")
+    parser.add_argument("files", nargs="*", help="File PO da controllare (predefinito: tutti i file tradotti).")
+    parser.add_argument("--corpus", default=po_corpus.CORPUS_DIR, help="Cartella con 'File Estratti Tradotti'.")
+    parser.add_argument("--workers", type=int, default=po_corpus.WORKERS, help="Processi usati per leggere i file.")
+    parser.add_argument("--no-avvisi", action="store_true", help="Mostra solo gli errori.")
+    args = parser.parse_args(argv)
+
+    if args.files:
+        paths = [path for path in args.files if path.endswith(po_corpus.PO_EXTENSION)]
+        labels = paths
+    else:
+        data_dir = po_corpus.data_dirs(args.corpus)[1]
+        labels = po_corpus.list_po_files(data_dir)
+        paths = [os.path.join(data_dir, *label.split("/")) for label in labels]
+    start = time.perf_counter()
+    results = po_corpus.map_files(check_file, paths, args.workers)
+    counts = {ERROR: 0, WARNING: 0}
+    for label, problems in zip(labels, results):
+        for entry, severity, problem in problems:
+            counts[severity] += 1
+            if severity == WARNING and args.no_avvisi:
+                continue
+            symbol = "❌" if severity == ERROR else "⚠️"
+            print(f"{symbol} {label}:{entry.line} [{po_corpus.escape(entry.msgctxt or '')}] {problem}")
+            print(f"   EN: {po_corpus.escape(entry.msgid)}")
+            print(f"   IT: {po_corpus.escape(entry.msgstr)}")
+    print(f"{len(paths)} file controllati in {time.perf_counter() - start:.1f} s: {counts[ERROR]} errori, {counts[WARNING]} avvisi.")
+    return 1 if counts[ERROR] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+"""
+;==========================================
+; Title:  check_po.py
+; Author: zSavT
+; Date:   18/10/2026
+;==========================================
+
+Confronta i msgctxt dei file PO originali con quelli dei file tradotti
+(usato dal workflow "checkPO.yml"). Per ogni file originale:
+
+- se manca la cartella corrispondente nella traduzione viene mostrato un
+  avviso e i file al suo interno vengono ignorati;
+- se manca il file tradotto il controllo fallisce;
+- se nel file tradotto mancano dei msgctxt del file originale il controllo fallisce.
+
+I msgctxt presenti solo nella traduzione e i file tradotti senza un
+originale vengono segnalati, ma non fanno fallire il controllo.
+Tutti i file vengono letti in un unico processo Python (più i processi del
+pool per la lettura in parallelo), senza avviare comandi esterni per ogni file.
+
+    python check_po.py [--corpus "File Traduzione"] [--extra]
+
+Codice di uscita: 0 se i file sono coerenti, 1 altrimenti.
+"""
+
+import os       # Per i percorsi delle cartelle
+import sys      # Per il codice di uscita
+import time     # Per il tempo impiegato
+import argparse # Per le opzioni da riga di comando
+
+import po_corpus
+
+
+def compare_trees(original_data, translated_data, workers=po_corpus.WORKERS):
+    """
+    Confronta le cartelle 'data' originale e tradotta.
+
+    Returns:
+        dict: {
+            "missing_dirs": cartelle mancanti nella traduzione (i file al loro interno sono saltati),
+            "missing_files": file originali senza traduzione,
+            "missing_contexts": {file: [msgctxt mancanti nella traduzione]},
+            "extra_contexts": {file: [msgctxt presenti solo nella traduzione]},
+            "extra_files": file tradotti senza originale,
+            "checked": numero di file confrontati,
+        }
+    """
+    original_files = po_corpus.list_po_files(original_data)
+    translated_files = set(po_corpus.list_po_files(translated_data))
+    missing_dirs = []
+    missing_files = []
+    to_compare = []
+    for relative_path in original_files:
+        translated_dir = os.path.dirname(os.path.join(translated_data, *relative_path.split("/")))
+        if not os.path.isdir(translated_dir):
+            if translated_dir not in missing_dirs: missing_dirs.append(translated_dir)
+        elif relative_path not in translated_files:
+            missing_files.append(relative_path)
+        else:
+            to_compare.append(relative_path)
+    original_tree = po_corpus.load_tree(original_data, to_compare, workers)
+    translated_tree = po_corpus.load_tree(translated_data, to_compare, workers)
+    index = po_corpus.build_index(translated_tree)
+    missing_contexts = {}
+    extra_contexts = {}
+    for relative_path in to_compare:
+        # Come nel vecchio controllo, le voci senza msgctxt non vengono confrontate
+        original_contexts = {entry.msgctxt for entry in original_tree[relative_path] if entry.msgctxt is not None}
+        missing = sorted(context for context in original_contexts if (relative_path, context) not in index)
+        if missing: missing_contexts[relative_path] = missing
+        extra = sorted({entry.msgctxt for entry in translated_tree[relative_path] if entry.msgctxt is not None} - original_contexts)
+        if extra: extra_contexts[relative_path] = extra
+    return {
+        "missing_dirs": missing_dirs,
+        "missing_files": missing_files,
+        "missing_contexts": missing_contexts,
+        "extra_contexts": extra_contexts,
+        "extra_files": sorted(translated_files - set(original_files)),
+        "checked": len(to_compare),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Confronto dei msgctxt tra file PO originali e tradotti.")
+    parser.add_argument("--corpus", default=po_corpus.CORPUS_DIR, help="Cartella con 'File Estratti Originali' e 'File Estratti Tradotti'.")
+    parser.add_argument("--workers", type=int, default=po_corpus.WORKERS, help="Processi usati per leggere i file.")
+    parser.add_argument("--extra", action="store_true", help="Elenca anche i msgctxt presenti solo nella traduzione.")
+    args = parser.parse_args(argv)
+
+    original_data, translated_data = po_corpus.data_dirs(args.corpus)
+    if not os.path.isdir(original_data) or not os.path.isdir(translated_data):
+        print(f"❌ Impossibile trovare le cartelle '{original_data}' e '{translated_data}'.")
+        return 1
+    print(f"✅ Cartella originale: {original_data}")
+    print(f"✅ Cartella tradotta: {translated_data}")
+    print("---------------------------------------------------")
+    start = time.perf_counter()
+    result = compare_trees(original_data, translated_data, args.workers)
+    for directory in result["missing_dirs"]:
+        print(f"⚠️ Warning: Cartella mancante in traduzione: {directory} (i file al suo interno verranno ignorati)")
+    for relative_path in result["missing_files"]:
+        print(f"❌ File mancante: {translated_data}/{relative_path}")
+    for relative_path, contexts in result["missing_contexts"].items():
+        print(f"❌ Mancanti in {relative_path}:")
+        for context in contexts: print(f'   msgctxt "{po_corpus.escape(context)}"')
+    extra_count = sum(len(contexts) for contexts in result["extra_contexts"].values())
+    if extra_count:
+        print(f"ℹ️ {extra_count} msgctxt presenti solo nella traduzione, in {len(result['extra_contexts'])} file.")
+        if args.extra:
+            for relative_path, contexts in result["extra_contexts"].items():
+                print(f"   In più in {relative_path}:")
+                for context in contexts: print(f'      msgctxt "{po_corpus.escape(context)}"')
+    if result["extra_files"]:
+        print(f"ℹ️ {len(result['extra_files'])} file tradotti senza un file originale corrispondente (es. {result['extra_files'][0]}).")
+    print("---------------------------------------------------")
+    print(f"{result['checked']} file confrontati in {time.perf_counter() - start:.1f} s.")
+    if result["missing_files"] or result["missing_contexts"]:
+        print("❌ Controllo fallito: discrepanza nei msgctxt o file mancanti")
+        return 1
+    print("🎉 Tutti i msgctxt controllati sono coerenti (al netto delle cartelle saltate)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
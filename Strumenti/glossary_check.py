@@ -0,0 +1,260 @@
+"""
+;==========================================
+; Title:  glossary_check.py
+; Author: zSavT
+; Date:   18/10/2026
+;==========================================
+
+Controlla che le traduzioni rispettino le regole di glossario.md.
+
+Le regole vengono lette direttamente dal glossario:
+
+- "**Termine**: Rimane **invariato** ... Non tradurre in *X* o *Y*": se il testo
+  inglese contiene il termine, la traduzione deve contenerlo e non deve contenere X o Y;
+- righe della tabella delle vie ("| *Via Tenkaichi* | **Tenkaichi Street** |"): la
+  vecchia forma (Via Tenkaichi) non deve comparire nelle traduzioni;
+- "*No*: a Elise, di Elise": le forme elencate non devono comparire nelle traduzioni;
+- "(evitare *X*)", "Non utilizzare *X*": X non deve comparire nelle traduzioni;
+- 'Traduzione di "S"' / "Tradotto sempre come **Y** (... *S*)": se il testo inglese
+  contiene S la traduzione deve contenere Y.
+
+Tutti i termini sono cercati come parole intere, senza distinguere maiuscole e
+minuscole, con un unico automa (Aho-Corasick) per il testo inglese e uno per la
+traduzione: ogni voce viene letta una sola volta, qualunque sia il numero di regole.
+
+    python glossary_check.py                      # tutti i file tradotti
+    python glossary_check.py file1.po file2.po    # solo i file indicati (es. pre-commit)
+
+Codice di uscita: 1 se una traduzione contiene una forma vietata (o, con --strict,
+se manca una forma obbligatoria), altrimenti 0.
+"""
+
+import os                 # Per i percorsi dei file
+import re                 # Per la lettura delle regole dal glossario
+import sys                # Per il codice di uscita
+import time               # Per il tempo impiegato
+import argparse           # Per le opzioni da riga di comando
+import collections        # Per il tipo delle regole (namedtuple)
+
+import po_corpus
+
+# --- Costanti Globali ---
+GLOSSARY_FILE = os.path.join(po_corpus.REPO_ROOT, "glossario.md")
+FORBIDDEN = "vietato"     # La forma non deve comparire nella traduzione
+REQUIRED = "obbligatorio" # Se il testo inglese contiene 'source', la traduzione deve contenere 'pattern'
+
+# Una regola del glossario. source è il termine inglese che attiva la regola (None per
+# le forme vietate sempre); line è la riga del glossario da cui è stata letta.
+Rule = collections.namedtuple("Rule", "kind pattern source line")
+
+_BOLD_RE = re.compile(r"\*\*([^*]+)\*\*")
+_ITALIC_RE = re.compile(r"(?<!\*)\*([^*\s][^*]*)\*(?!\*)")
+_TABLE_ROW_RE = re.compile(r"^\|\s*\*([^*]+)\*\s*\|\s*\*\*([^*]+)\*\*")
+_BULLET_RE = re.compile(r"^(\s*)\*\s+(.*)$")
+
+
+def _italics(text):
+    return [term.strip() for term in _ITALIC_RE.findall(text) if term.strip()]
+
+
+def _phrase_list(text):
+    """Divide un elenco "a Elise, di Elise, da Elise." nelle singole forme, senza note tra parentesi."""
+    text = re.sub(r"\([^)]*\)", "", text)
+    return [phrase.strip(" .") for phrase in text.split(",") if phrase.strip(" .")]
+
+
+def parse_glossary(text):
+    """
+    Legge le regole dal testo di glossario.md.
+
+    Returns:
+        list[Rule]: Le regole, senza duplicati.
+    """
+    rules = []
+    term = None # Termine dell'ultimo punto elenco principale ("**Elise**", "**Clan Tojo**", ...)
+    for number, line in enumerate(text.splitlines(), 1):
+        row = _TABLE_ROW_RE.match(line)
+        if row:
+            if row.group(1).strip() != row.group(2).strip():
+                rules.append(Rule(FORBIDDEN, row.group(1).strip(), None, number))
+            continue
+        bullet = _BULLET_RE.match(line)
+        if not bullet:
+            continue
+        content = bullet.group(2)
+        bold = _BOLD_RE.findall(content)
+        if not bullet.group(1) and bold and content.startswith("**"):
+            term = bold[0].strip()
+        if "Non tradurre in" in content:
+            # Termine da lasciare in inglese
+            forbidden = content.split("Non tradurre in", 1)[1]
+            if "invariato" in content: rules.append(Rule(REQUIRED, term, term, number))
+            rules.extend(Rule(FORBIDDEN, phrase, term, number) for phrase in _italics(forbidden))
+        if content.startswith("*No*:"):
+            rules.extend(Rule(FORBIDDEN, phrase, None, number) for phrase in _phrase_list(content[len("*No*:"):]))
+        for marker in ("evitare", "Non utilizzare", "non utilizzare"):
+            if marker in content:
+                # Solo fino alla fine della nota: "(traduzione letterale errata di *The Florist*)" non è una forma vietata
+                tail = re.split(r"[()]", content.split(marker, 1)[1])[0]
+                rules.extend(Rule(FORBIDDEN, phrase, None, number) for phrase in _italics(tail))
+        source = re.search(r'Traduzione di "([^"]+)"', content)
+        if source and bold:
+            rules.append(Rule(REQUIRED, bold[0].strip(), source.group(1), number))
+        if "Tradotto sempre come" in content:
+            tail = content.split("Tradotto sempre come", 1)[1]
+            translation, english = _BOLD_RE.findall(tail), _italics(tail)
+            if translation and english: rules.append(Rule(REQUIRED, translation[0].strip(), english[0], number))
+    unique = {}
+    for rule in rules:
+        unique.setdefault((rule.kind, rule.pattern.lower(), (rule.source or "").lower()), rule)
+    return list(unique.values())
+
+
+def load_rules(path=GLOSSARY_FILE):
+    with open(path, "r", encoding="utf-8") as f:
+        return parse_glossary(f.read())
+
+
+class Matcher:
+    """
+    Automa di Aho-Corasick: trova in una sola lettura del testo tutte le occorrenze
+    di un insieme di termini, come parole intere e senza distinguere maiuscole e minuscole.
+    """
+    def __init__(self, patterns):
+        self.patterns = sorted({pattern.lower() for pattern in patterns})
+        self.goto = [{}]   # Transizioni di ogni stato
+        self.fail = [0]    # Stato a cui tornare quando manca la transizione
+        self.output = [()] # Termini riconosciuti in ogni stato (indici in self.patterns)
+        for index, pattern in enumerate(self.patterns):
+            state = 0
+            for char in pattern:
+                next_state = self.goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto[state][char] = next_state
+                    self.goto.append({}); self.fail.append(0); self.output.append(())
+                state = next_state
+            self.output[state] += (index,)
+        # Collegamenti di fallimento, in ampiezza
+        queue = collections.deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(char, 0)
+                self.output[next_state] += self.output[self.fail[next_state]]
+    def find(self, text):
+        """Ritorna l'insieme dei termini (in minuscolo) presenti nel testo come parole intere."""
+        found = set()
+        text = text.lower()
+        goto, fail, output = self.goto, self.fail, self.output
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for index in output[state]:
+                pattern = self.patterns[index]
+                start = position - len(pattern) + 1
+                end = position + 1
+                if (start == 0 or not text[start - 1].isalnum()) and (end == len(text) or not text[end].isalnum()):
+                    found.add(pattern)
+        return found
+
+
+class GlossaryChecker:
+    """Applica le regole del glossario alle coppie (msgid, msgstr)."""
+    def __init__(self, rules):
+        self.rules = rules
+        self.source_matcher = Matcher(rule.source for rule in rules if rule.source)
+        self.target_matcher = Matcher(rule.pattern for rule in rules)
+    def check(self, msgid, msgstr):
+        """
+        Returns:
+            list[Rule]: Le regole violate dalla coppia.
+        """
+        if not msgstr:
+            return [] # Voce non tradotta
+        sources = self.source_matcher.find(msgid)
+        targets = self.target_matcher.find(msgstr)
+        violations = []
+        for rule in self.rules:
+            pattern = rule.pattern.lower()
+            if rule.source is not None and rule.source.lower() not in sources:
+                continue
+            if rule.kind == FORBIDDEN and pattern in targets:
+                violations.append(rule)
+            elif rule.kind == REQUIRED and pattern not in targets:
+                violations.append(rule)
+        return violations
+
+
+_CHECKERS = {} # Controllori già pronti in ogni processo del pool, per file del glossario
+
+
+def check_file(job):
+    """
+    Controlla un file PO (eseguita nei processi del pool).
+
+    Args:
+        job (tuple): (file del glossario, percorso del file PO).
+
+    Returns:
+        list[tuple]: (PoEntry, Rule) per ogni regola violata.
+    """
+    glossary_path, path = job
+    checker = _CHECKERS.get(glossary_path)
+    if checker is None:
+        checker = _CHECKERS[glossary_path] = GlossaryChecker(load_rules(glossary_path))
+    return [(entry, rule) for entry in po_corpus.read_po(path) for rule in checker.check(entry.msgid, entry.msgstr)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Controllo delle traduzioni con le regole di glossario.md.")
+    parser.add_argument("files", nargs="*", help="File PO da controllare (predefinito: tutti i file tradotti).")
+    parser.add_argument("--glossario", default=GLOSSARY_FILE, help="File del glossario.")
+    parser.add_argument("--corpus", default=po_corpus.CORPUS_DIR, help="Cartella con 'File Estratti Tradotti'.")
+    parser.add_argument("--workers", type=int, default=po_corpus.WORKERS, help="Processi usati per leggere i file.")
+    parser.add_argument("--strict", action="store_true", help="Fallisce anche se manca una forma obbligatoria.")
+    parser.add_argument("--regole", action="store_true", help="Mostra le regole lette dal glossario ed esce.")
+    args = parser.parse_args(argv)
+
+    rules = load_rules(args.glossario)
+    if args.regole:
+        for rule in rules:
+            condition = f" (se il testo inglese contiene '{rule.source}')" if rule.source else ""
+            print(f"riga {rule.line:3d}: {rule.kind}: '{rule.pattern}'{condition}")
+        return 0
+    if args.files:
+        paths = [path for path in args.files if path.endswith(po_corpus.PO_EXTENSION)]
+        labels = paths
+    else:
+        data_dir = po_corpus.data_dirs(args.corpus)[1]
+        labels = po_corpus.list_po_files(data_dir)
+        paths = [os.path.join(data_dir, *label.split("/")) for label in labels]
+    start = time.perf_counter()
+    results = po_corpus.map_files(check_file, [(args.glossario, path) for path in paths], args.workers)
+    counts = {FORBIDDEN: 0, REQUIRED: 0}
+    for label, violations in zip(labels, results):
+        for entry, rule in violations:
+            counts[rule.kind] += 1
+            symbol = "❌" if rule.kind == FORBIDDEN or args.strict else "⚠️"
+            if rule.kind == FORBIDDEN:
+                problem = f"contiene '{rule.pattern}'"
+            else:
+                problem = f"il testo inglese contiene '{rule.source}' ma la traduzione non contiene '{rule.pattern}'"
+            print(f"{symbol} {label}:{entry.line} [{po_corpus.escape(entry.msgctxt or '')}] {problem} (glossario, riga {rule.line})")
+            print(f"   EN: {entry.msgid}")
+            print(f"   IT: {entry.msgstr}")
+    print(f"{len(paths)} file controllati con {len(rules)} regole in {time.perf_counter() - start:.1f} s: "
+          f"{counts[FORBIDDEN]} forme vietate, {counts[REQUIRED]} forme obbligatorie mancanti.")
+    if counts[FORBIDDEN] or (args.strict and counts[REQUIRED]):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
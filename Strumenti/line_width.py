@@ -0,0 +1,262 @@
+"""
+;==========================================
+; Title:  line_width.py
+; Author: zSavT
+; Date:   18/10/2026
+;==========================================
+
+Stima della larghezza in pixel delle righe tradotte, per trovare i testi che
+escono dai riquadri (dialoghi, menu, descrizioni degli oggetti di "pausepar")
+senza doverli cercare giocando.
+
+La larghezza di ogni carattere viene letta da una tabella caricata una sola
+volta: quella dei glifi del font del gioco, se indicata con --font (file JSON
+{"carattere": larghezza}, ad esempio esportato dai dati di "data/fontpar"),
+altrimenti una tabella approssimata per gruppi di caratteri (stretti, larghi,
+maiuscole, ideogrammi). I tag <Color:...> e <Italic> non occupano spazio,
+<Sign:N> vale come un'icona.
+
+I testi sono divisi in categorie per cartella, ognuna con la larghezza del suo
+riquadro in pixel (della tabella approssimata). Le larghezze predefinite sono
+ricavate dagli a capo inseriti a mano nei testi inglesi del gioco, che cadono
+dove finisce il riquadro, e si possono cambiare con --larghezza:
+
+- nelle categorie con a capo manuale (sottotitoli, database, email) una riga
+  tradotta viene segnalata se supera il riquadro ed è più larga della riga
+  inglese più lunga della stessa voce;
+- nelle categorie con a capo automatico (dialoghi, descrizioni, menu) il testo
+  viene mandato a capo parola per parola alla larghezza del riquadro, come fa il
+  gioco, e viene segnalato se occupa più righe del massimo della categoria e
+  più righe del testo inglese.
+
+Per le categorie senza una larghezza (nuove cartelle, o tutte con --font, le cui
+larghezze dei glifi sono in un'altra scala) il riquadro viene solo stimato: è il
+99,5° percentile delle larghezze delle righe inglesi della categoria, e le righe
+che lo superano sono semplici avvisi.
+
+    python line_width.py
+    python line_width.py --font larghezze.json --larghezza sottotitoli=420
+
+Codice di uscita: 1 se almeno una voce supera un riquadro di larghezza nota
+(predefinita o indicata con --larghezza), altrimenti 0.
+"""
+
+import os           # Per i percorsi dei file
+import re           # Per i tag
+import sys          # Per il codice di uscita
+import json         # Per la tabella delle larghezze dei glifi
+import time         # Per il tempo impiegato
+import argparse     # Per le opzioni da riga di comando
+import unicodedata  # Per la larghezza dei caratteri ideografici
+
+import po_corpus
+
+# --- Costanti Globali ---
+# Categorie di testo: nome, cartelle (relative a 'data'; vale la prima che corrisponde),
+# larghezza del riquadro in pixel della tabella approssimata e numero massimo di righe
+# per i testi con a capo automatico (None se il testo va a capo solo dove indicato)
+CATEGORIES = (
+    ("sottotitoli", ("auth/subtitle/", "hact/subtitle/"), 430, None),
+    ("descrizioni", ("pausepar/",), 602, 4),
+    ("menu", ("bootpar/", "ikusei/", "minigame/"), 476, 2),
+    ("dialoghi", ("wdr_par_en/",), 440, 3),
+    ("database", ("db.soul/",), 384, None),
+    ("email", ("scenario_en/",), 306, None),
+)
+OTHER = "altro"
+BOX_PERCENTILE = 99.5 # Percentile delle righe inglesi usato come larghezza stimata del riquadro
+
+# Tabella approssimata (pixel a dimensione normale), usata senza il font del gioco
+FALLBACK_WIDTHS = (
+    ("il.,:;'|!ìí`", 4),
+    ("frtjI()[]{}\"- ", 6),
+    ("mwMW@%", 12),
+)
+DEFAULT_WIDTH = 8
+UPPERCASE_WIDTH = 10
+WIDE_WIDTH = 18       # Caratteri a larghezza piena (giapponese) e icone
+ICON = "\ue000"  # Carattere (uso privato) usato al posto dei tag <Sign:N>
+
+_SIGN_RE = re.compile(r"<Sign:[^<>]*>")
+_MARKUP_RE = re.compile(r"<[^<>]*>")
+
+
+class WidthTable(dict):
+    """
+    Larghezza in pixel di ogni carattere. I caratteri assenti dalla tabella dei glifi
+    ricevono la larghezza approssimata, calcolata una volta sola e poi conservata.
+    """
+    def __missing__(self, char):
+        width = DEFAULT_WIDTH
+        if char == ICON or unicodedata.east_asian_width(char) in "WF":
+            width = WIDE_WIDTH
+        else:
+            for chars, group_width in FALLBACK_WIDTHS:
+                if char in chars:
+                    width = group_width
+                    break
+            else:
+                if char.isupper(): width = UPPERCASE_WIDTH
+        self[char] = width
+        return width
+
+
+def load_widths(path=None):
+    """
+    Carica la tabella delle larghezze.
+
+    Args:
+        path (str | None): File JSON {"carattere": larghezza} con le larghezze dei glifi del font; None per la tabella approssimata.
+
+    Returns:
+        WidthTable: La tabella.
+    """
+    table = WidthTable()
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            table.update({char: int(width) for char, width in json.load(f).items() if len(char) == 1})
+    return table
+
+
+def _visible_lines(text):
+    """Righe mostrate a schermo di un testo: senza tag, con le icone e divise agli a capo (veri e "\\n" del gioco)."""
+    return _MARKUP_RE.sub("", _SIGN_RE.sub(ICON, text)).replace("\\n", "\n").split("\n")
+
+
+def line_widths(text, table):
+    """Ritorna la larghezza in pixel di ogni riga di un testo (a capo reali e "\\n" del gioco)."""
+    return [sum(map(table.__getitem__, line)) for line in _visible_lines(text)]
+
+
+def wrapped_lines(text, table, box):
+    """Numero di righe del testo mandato a capo parola per parola alla larghezza box (oltre agli a capo indicati)."""
+    space = table[" "]
+    count = 0
+    for line in _visible_lines(text):
+        count += 1
+        width = 0
+        for word in line.split(" "):
+            word_width = sum(map(table.__getitem__, word))
+            if width and width + space + word_width > box:
+                count += 1
+                width = word_width
+            else:
+                width = width + space + word_width if width else word_width
+    return count
+
+
+def category_of(relative_path):
+    """Ritorna (nome, larghezza del riquadro oppure None, righe massime oppure None) della categoria di un file."""
+    for name, prefixes, box, max_lines in CATEGORIES:
+        if relative_path.startswith(prefixes):
+            return name, box, max_lines
+    return OTHER, None, None
+
+
+_TABLES = {} # Tabelle già caricate in ogni processo del pool, per file del font
+
+
+def measure_file(job):
+    """
+    Calcola le larghezze delle righe di un file PO (eseguita nei processi del pool).
+
+    Args:
+        job (tuple): (file del font oppure None, percorso del file PO, larghezza del riquadro
+                     per l'a capo automatico oppure None).
+
+    Returns:
+        list[tuple]: (PoEntry, larghezze delle righe inglesi, larghezze delle righe tradotte,
+                     righe inglesi e tradotte dopo l'a capo automatico, oppure None e None) per ogni voce.
+    """
+    font_path, path, wrap_box = job
+    table = _TABLES.get(font_path)
+    if table is None:
+        table = _TABLES[font_path] = load_widths(font_path)
+    measured = []
+    for entry in po_corpus.read_po(path):
+        en_lines = it_lines = None
+        if wrap_box:
+            en_lines = wrapped_lines(entry.msgid, table, wrap_box)
+            it_lines = wrapped_lines(entry.msgstr, table, wrap_box) if entry.msgstr else 0
+        measured.append((entry, line_widths(entry.msgid, table), line_widths(entry.msgstr, table) if entry.msgstr else [], en_lines, it_lines))
+    return measured
+
+
+def percentile(values, percent):
+    """Percentile (per rango) di una lista di valori. Ritorna None se la lista è vuota."""
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Righe tradotte più larghe del riquadro della loro categoria.")
+    parser.add_argument("--corpus", default=po_corpus.CORPUS_DIR, help="Cartella con 'File Estratti Tradotti'.")
+    parser.add_argument("--workers", type=int, default=po_corpus.WORKERS, help="Processi usati per leggere i file.")
+    parser.add_argument("--font", help="File JSON con le larghezze dei glifi del font del gioco ({\"carattere\": pixel}).")
+    parser.add_argument("--larghezza", action="append", default=[], metavar="CATEGORIA=PIXEL",
+                        help="Larghezza del riquadro di una categoria, invece di quella stimata (ripetibile).")
+    parser.add_argument("--categoria", help="Mostra solo la categoria indicata.")
+    args = parser.parse_args(argv)
+
+    boxes = {}
+    for value in args.larghezza:
+        name, _, width = value.partition("=")
+        if not width.isdigit():
+            print(f"❌ Larghezza non valida: '{value}' (formato: CATEGORIA=PIXEL)")
+            return 1
+        boxes[name] = int(width)
+    data_dir = po_corpus.data_dirs(args.corpus)[1]
+    labels = po_corpus.list_po_files(data_dir)
+    categories = {}
+    for label in labels:
+        name, box, max_lines = category_of(label)
+        if args.font: box = None # Larghezze predefinite nella scala della tabella approssimata
+        box = boxes.get(name, box)
+        categories[label] = (name, box, max_lines if box else None)
+    start = time.perf_counter()
+    jobs = [(args.font, os.path.join(data_dir, *label.split("/")), categories[label][1] if categories[label][2] else None) for label in labels]
+    results = po_corpus.map_files(measure_file, jobs, args.workers)
+    by_category = {}
+    for label, measured in zip(labels, results):
+        by_category.setdefault(categories[label], []).append((label, measured))
+    failed = warned = 0
+    summary = []
+    for (category, box, max_lines), files in by_category.items():
+        estimated = box is None
+        if estimated:
+            box = percentile([width for _, measured in files for _, en_widths, _, _, _ in measured for width in en_widths if width], BOX_PERCENTILE)
+            if box is None:
+                summary.append(f"{category} senza stima (nessuna riga inglese)")
+                continue
+        overflowing = 0
+        for label, measured in files:
+            for entry, en_widths, it_widths, en_lines, it_lines in measured:
+                if max_lines:
+                    if it_lines <= max_lines or it_lines <= en_lines:
+                        continue
+                    problem = f"{it_lines} righe con l'a capo automatico (massimo {max_lines}, inglese {en_lines}, riquadro {box} px)"
+                else:
+                    widest = max(it_widths, default=0)
+                    if widest <= box or widest <= max(en_widths):
+                        continue
+                    problem = f"riga {it_widths.index(widest) + 1} larga {widest} px (riquadro {box} px{' stimato' if estimated else ''}, inglese {max(en_widths)} px)"
+                overflowing += 1
+                if args.categoria and args.categoria != category:
+                    continue
+                symbol = "⚠️" if estimated else "❌"
+                print(f"{symbol} {label}:{entry.line} [{po_corpus.escape(entry.msgctxt or '')}] {category}: {problem}")
+                print(f"   IT: {po_corpus.escape(entry.msgstr)}")
+        summary.append(f"{category} {overflowing} (riquadro {box} px{', stimato' if estimated else ''}{f', massimo {max_lines} righe' if max_lines else ''})")
+        if estimated: warned += overflowing
+        else: failed += overflowing
+    print(f"{len(labels)} file controllati in {time.perf_counter() - start:.1f} s con la tabella "
+          f"{'dei glifi ' + args.font if args.font else 'approssimata'}: {failed} voci oltre il riquadro, "
+          f"{warned} avvisi oltre un riquadro stimato.")
+    print("Per categoria: " + ", ".join(summary) + ".")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,197 @@
+"""
+;==========================================
+; Title:  po_corpus.py
+; Author: zSavT
+; Date:   18/10/2026
+;==========================================
+
+Lettura dei file PO della cartella "File Traduzione", condivisa dagli
+strumenti di controllo della traduzione.
+
+I file originali (inglese) si trovano in "File Estratti Originali/data" e
+quelli tradotti, con lo stesso percorso relativo, in "File Estratti Tradotti/data".
+All'interno di un file ogni voce è identificata dal suo msgctxt (ad esempio
+i fotogrammi di inizio e fine di un sottotitolo, "224\\t355").
+
+I file vengono letti in parallelo su tutti i core disponibili: il parser è
+scritto in Python puro, quindi si usano processi e non thread.
+"""
+
+import os                 # Per percorsi e ricerca dei file
+import re                 # Per le sequenze di escape delle stringhe PO
+import collections        # Per il tipo delle voci (namedtuple)
+import concurrent.futures # Per la lettura in parallelo dei file
+
+# --- Costanti Globali ---
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CORPUS_DIR = os.path.join(REPO_ROOT, "File Traduzione") # Cartella predefinita dei file della traduzione
+ORIGINAL_DIR = "File Estratti Originali"
+TRANSLATED_DIR = "File Estratti Tradotti"
+DATA_DIR = "data"
+PO_EXTENSION = ".po"
+WORKERS = os.cpu_count() or 1
+FILES_PER_TASK = 64 # File letti da ogni processo per ogni richiesta (riduce il costo della comunicazione)
+
+# Una voce di un file PO. msgctxt è None se la voce non ha contesto; flags contiene
+# i flag della riga "#," (es. "fuzzy"); line è la riga del file in cui inizia la voce.
+PoEntry = collections.namedtuple("PoEntry", "msgctxt msgid msgstr flags line")
+
+_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", '"': '"', "\\": "\\"}
+_UNESCAPE_RE = re.compile(r"\\(.)")
+_ESCAPE_RE = re.compile(r'[\\"\n\t\r]')
+_ESCAPE_CHARS = {value: "\\" + key for key, value in _ESCAPES.items()}
+
+
+def unescape(text):
+    """Converte una stringa PO (senza virgolette) nel testo che rappresenta."""
+    if "\\" not in text:
+        return text
+    return _UNESCAPE_RE.sub(lambda match: _ESCAPES.get(match.group(1), match.group(0)), text)
+
+
+def escape(text):
+    """Converte un testo nella forma usata nei file PO (senza virgolette), es. per i messaggi."""
+    return _ESCAPE_RE.sub(lambda match: _ESCAPE_CHARS[match.group(0)], text)
+
+
+def parse_po(text):
+    """
+    Legge il contenuto di un file PO.
+
+    Le voci obsolete ("#~") e l'intestazione (msgid vuoto senza msgctxt) vengono
+    ignorate. Per le voci plurali si considera solo msgstr[0].
+
+    Args:
+        text (str): Il contenuto del file.
+
+    Returns:
+        list[PoEntry]: Le voci nell'ordine del file.
+    """
+    entries = []
+    fields = {}   # Campo -> lista dei frammenti della stringa
+    field = None  # Campo a cui appartengono le righe di continuazione
+    flags = ()
+    start = 0
+
+    def finish():
+        if "msgid" in fields:
+            msgctxt = unescape("".join(fields["msgctxt"])) if "msgctxt" in fields else None
+            msgid = unescape("".join(fields["msgid"]))
+            if msgid or msgctxt is not None:
+                entries.append(PoEntry(msgctxt, msgid, unescape("".join(fields.get("msgstr", ()))), flags, start))
+
+    for number, line in enumerate(text.splitlines(), 1):
+        line = line.strip()
+        if not line:
+            continue
+        if line[0] == '"':
+            if field is not None: fields[field].append(line[1:-1])
+            continue
+        if line[0] == "#":
+            if "msgid" in fields:
+                finish(); fields = {}; flags = ()
+            field = None
+            if line.startswith("#,"):
+                flags += tuple(flag.strip() for flag in line[2:].split(",") if flag.strip())
+            continue
+        keyword, _, value = line.partition(" ")
+        value = value.strip()[1:-1]
+        if keyword == "msgctxt" or (keyword == "msgid" and "msgid" in fields):
+            if fields:
+                finish(); flags = ()
+            fields = {}
+        if keyword == "msgstr[0]":
+            keyword = "msgstr"
+        elif keyword not in ("msgctxt", "msgid", "msgstr"):
+            field = None # msgid_plural, msgstr[N]: non usati
+            continue
+        if not fields: start = number
+        fields[keyword] = [value]
+        field = keyword
+    finish()
+    return entries
+
+
+def read_po(path):
+    """Legge un file PO dal disco (UTF-8). Ritorna la lista delle voci (vedi parse_po)."""
+    with open(path, "r", encoding="utf-8", errors="surrogateescape") as f:
+        return parse_po(f.read())
+
+
+def data_dirs(corpus_dir=CORPUS_DIR):
+    """Ritorna la coppia (cartella 'data' dei file originali, cartella 'data' dei file tradotti)."""
+    return os.path.join(corpus_dir, ORIGINAL_DIR, DATA_DIR), os.path.join(corpus_dir, TRANSLATED_DIR, DATA_DIR)
+
+
+def list_po_files(data_dir):
+    """
+    Elenca i file PO di una cartella 'data'.
+
+    Returns:
+        list[str]: Percorsi relativi alla cartella, con separatore "/", in ordine alfabetico.
+    """
+    files = []
+    for root, _, names in os.walk(data_dir):
+        relative_root = os.path.relpath(root, data_dir).replace(os.sep, "/")
+        for name in names:
+            if name.endswith(PO_EXTENSION):
+                files.append(name if relative_root == "." else f"{relative_root}/{name}")
+    files.sort()
+    return files
+
+
+def map_files(function, items, workers=WORKERS):
+    """
+    Applica function(item) a ogni elemento di items usando un pool di processi
+    (oppure nel processo corrente se workers è 1 o gli elementi sono pochi).
+    function deve essere una funzione di modulo, per poter essere inviata ai processi.
+
+    Returns:
+        list: I risultati, nello stesso ordine di items.
+    """
+    items = list(items)
+    if workers <= 1 or len(items) <= FILES_PER_TASK:
+        return [function(item) for item in items]
+    batches = [items[i:i + FILES_PER_TASK] for i in range(0, len(items), FILES_PER_TASK)]
+    results = []
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        for batch_results in pool.map(_apply_batch, [function] * len(batches), batches):
+            results.extend(batch_results)
+    return results
+
+
+def _apply_batch(function, batch):
+    return [function(item) for item in batch]
+
+
+def load_tree(data_dir, relative_paths=None, workers=WORKERS):
+    """
+    Legge in parallelo i file PO di una cartella 'data'.
+
+    Args:
+        data_dir (str): La cartella 'data' (originale o tradotta).
+        relative_paths (list[str] | None): I file da leggere; None per tutti i file della cartella.
+        workers (int): Numero di processi.
+
+    Returns:
+        dict: {percorso relativo: list[PoEntry]}.
+    """
+    if relative_paths is None:
+        relative_paths = list_po_files(data_dir)
+    paths = [os.path.join(data_dir, *relative_path.split("/")) for relative_path in relative_paths]
+    return dict(zip(relative_paths, map_files(read_po, paths, workers)))
+
+
+def build_index(tree):
+    """
+    Indicizza le voci lette con load_tree() per file e contesto.
+
+    Returns:
+        dict: {(percorso relativo, msgctxt): (msgid, msgstr)}. In caso di contesti
+              ripetuti nello stesso file vale la prima voce.
+    """
+    index = {}
+    for relative_path, entries in tree.items():
+        for entry in entries:
+            index.setdefault((relative_path, entry.msgctxt), (entry.msgid, entry.msgstr))
+    return index
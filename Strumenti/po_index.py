@@ -0,0 +1,222 @@
+"""
+;==========================================
+; Title:  po_index.py
+; Author: zSavT
+; Date:   18/10/2026
+;==========================================
+
+Indice persistente (SQLite) di tutte le voci dei file PO originali e tradotti,
+per percorso relativo e msgctxt.
+
+L'indice viene aggiornato in modo incrementale: per ogni file si salvano
+dimensione, data di modifica e hash SHA-256. Un file viene riletto solo se
+dimensione o data sono cambiate e, in quel caso, solo se è cambiato anche
+il contenuto (dopo un "git pull" vengono quindi rilette solo le voci dei file
+modificati). Gli strumenti che lavorano su tutto il corpus possono così
+interrogare l'indice invece di rileggere ogni volta tutti i file.
+
+    python po_index.py                          # aggiorna l'indice e mostra le statistiche
+    python po_index.py --lookup auth/subtitle/C0230.po "224\\t355"
+"""
+
+import os       # Per i percorsi e le informazioni sui file
+import sys      # Per il codice di uscita
+import time     # Per il tempo impiegato
+import sqlite3  # Per l'indice su disco
+import hashlib  # Per l'hash dei file
+import argparse # Per le opzioni da riga di comando
+
+import po_corpus
+
+# --- Costanti Globali ---
+INDEX_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "po_index.sqlite") # Indice predefinito (non versionato)
+INDEX_VERSION = 2  # Versione dello schema: se cambia l'indice viene ricreato
+ORIGINAL = "originale"
+TRANSLATED = "tradotto"
+TREES = {ORIGINAL: po_corpus.ORIGINAL_DIR, TRANSLATED: po_corpus.TRANSLATED_DIR}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    tree TEXT NOT NULL,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    UNIQUE (tree, path)
+);
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    file_id INTEGER NOT NULL REFERENCES files (id) ON DELETE CASCADE,
+    msgctxt TEXT,
+    msgid TEXT NOT NULL,
+    msgstr TEXT NOT NULL,
+    flags TEXT NOT NULL,
+    line INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_file ON entries (file_id, msgctxt);
+"""
+
+
+def scan_file(job):
+    """
+    Legge un file PO se il suo contenuto è cambiato (eseguita nei processi del pool).
+
+    Args:
+        job (tuple): (percorso del file, hash SHA-256 già indicizzato oppure None).
+
+    Returns:
+        tuple: (hash SHA-256, lista di PoEntry oppure None se il contenuto non è cambiato).
+    """
+    path, known_sha256 = job
+    with open(path, "rb") as f:
+        data = f.read()
+    sha256 = hashlib.sha256(data).hexdigest()
+    if sha256 == known_sha256:
+        return sha256, None
+    return sha256, po_corpus.parse_po(data.decode("utf-8", errors="surrogateescape"))
+
+
+class PoIndex:
+    """
+    Indice SQLite delle voci dei file PO. Si usa come context manager:
+
+        with PoIndex() as index:
+            index.refresh()
+            msgid, msgstr = index.lookup(TRANSLATED, "auth/subtitle/C0230.po", "224\\t355")
+    """
+    def __init__(self, path=INDEX_FILE, corpus_dir=po_corpus.CORPUS_DIR):
+        self.path = path
+        self.corpus_dir = corpus_dir
+        self.db = self._connect()
+        version = None
+        try: version = self.db.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        except sqlite3.OperationalError: pass
+        if version is None or version[0] != str(INDEX_VERSION):
+            # Indice assente o di una versione precedente: si ricrea da zero, insieme alle
+            # eventuali tabelle aggiunte dagli altri strumenti (es. ricerca testuale)
+            self.db.close()
+            for suffix in ("", "-wal", "-shm"):
+                try: os.remove(path + suffix)
+                except FileNotFoundError: pass
+            self.db = self._connect()
+            self.db.executescript(SCHEMA)
+            self.db.execute("INSERT INTO meta (key, value) VALUES ('version', ?)", (str(INDEX_VERSION),))
+            self.db.commit()
+    def _connect(self):
+        db = sqlite3.connect(self.path)
+        db.execute("PRAGMA foreign_keys = ON")
+        db.execute("PRAGMA journal_mode = WAL")
+        db.execute("PRAGMA synchronous = NORMAL")
+        return db
+    def __enter__(self):
+        return self
+    def __exit__(self, *exc_info):
+        self.close()
+    def close(self):
+        self.db.close()
+    def data_dir(self, tree):
+        return os.path.join(self.corpus_dir, TREES[tree], po_corpus.DATA_DIR)
+    def refresh(self, workers=po_corpus.WORKERS):
+        """
+        Aggiorna l'indice con i file presenti su disco.
+
+        Returns:
+            dict: Numero di file "indicizzati" in totale, "letti" (contenuto cambiato),
+                  "invariati" (data cambiata ma stesso contenuto) e "rimossi".
+        """
+        stats = {"indicizzati": 0, "letti": 0, "invariati": 0, "rimossi": 0}
+        known = {(tree, path): (file_id, size, mtime_ns, sha256)
+                 for file_id, tree, path, size, mtime_ns, sha256 in self.db.execute("SELECT id, tree, path, size, mtime_ns, sha256 FROM files")}
+        jobs = [] # (tree, percorso relativo, percorso completo, stat)
+        present = set()
+        for tree in TREES:
+            data_dir = self.data_dir(tree)
+            for relative_path in po_corpus.list_po_files(data_dir):
+                present.add((tree, relative_path))
+                full_path = os.path.join(data_dir, *relative_path.split("/"))
+                st = os.stat(full_path)
+                cached = known.get((tree, relative_path))
+                if cached and cached[1] == st.st_size and cached[2] == st.st_mtime_ns:
+                    continue
+                jobs.append((tree, relative_path, full_path, st))
+        results = po_corpus.map_files(scan_file, [(job[2], known[job[:2]][3] if job[:2] in known else None) for job in jobs], workers)
+        with self.db:
+            removed = [(known[key][0],) for key in known if key not in present]
+            self.db.executemany("DELETE FROM files WHERE id = ?", removed)
+            stats["rimossi"] = len(removed)
+            for (tree, relative_path, _, st), (sha256, entries) in zip(jobs, results):
+                cached = known.get((tree, relative_path))
+                if entries is None:
+                    self.db.execute("UPDATE files SET size = ?, mtime_ns = ? WHERE id = ?", (st.st_size, st.st_mtime_ns, cached[0]))
+                    stats["invariati"] += 1
+                    continue
+                if cached:
+                    file_id = cached[0]
+                    self.db.execute("UPDATE files SET size = ?, mtime_ns = ?, sha256 = ? WHERE id = ?", (st.st_size, st.st_mtime_ns, sha256, file_id))
+                    self.db.execute("DELETE FROM entries WHERE file_id = ?", (file_id,))
+                else:
+                    file_id = self.db.execute("INSERT INTO files (tree, path, size, mtime_ns, sha256) VALUES (?, ?, ?, ?, ?)",
+                                              (tree, relative_path, st.st_size, st.st_mtime_ns, sha256)).lastrowid
+                self.db.executemany("INSERT INTO entries (file_id, msgctxt, msgid, msgstr, flags, line) VALUES (?, ?, ?, ?, ?, ?)",
+                                    [(file_id, e.msgctxt, e.msgid, e.msgstr, ",".join(e.flags), e.line) for e in entries])
+                stats["letti"] += 1
+        stats["indicizzati"] = len(present)
+        return stats
+    def files(self, tree):
+        """Ritorna {percorso relativo: hash SHA-256} dei file indicizzati di un albero."""
+        return dict(self.db.execute("SELECT path, sha256 FROM files WHERE tree = ?", (tree,)))
+    def entries(self, tree, relative_path):
+        """Ritorna le voci (PoEntry) di un file, nell'ordine del file."""
+        rows = self.db.execute("SELECT e.msgctxt, e.msgid, e.msgstr, e.flags, e.line FROM entries e JOIN files f ON f.id = e.file_id "
+                               "WHERE f.tree = ? AND f.path = ? ORDER BY e.line", (tree, relative_path))
+        return [po_corpus.PoEntry(msgctxt, msgid, msgstr, tuple(flags.split(",")) if flags else (), line) for msgctxt, msgid, msgstr, flags, line in rows]
+    def lookup(self, tree, relative_path, msgctxt):
+        """Ritorna la coppia (msgid, msgstr) della voce indicata, oppure None."""
+        return self.db.execute("SELECT e.msgid, e.msgstr FROM entries e JOIN files f ON f.id = e.file_id "
+                               "WHERE f.tree = ? AND f.path = ? AND e.msgctxt IS ? ORDER BY e.line LIMIT 1",
+                               (tree, relative_path, msgctxt)).fetchone()
+    def iter_entries(self, tree, relative_paths=None):
+        """
+        Scorre le voci di un albero (o solo dei file indicati).
+
+        Yields:
+            tuple: (percorso relativo, PoEntry).
+        """
+        query = ("SELECT f.path, e.msgctxt, e.msgid, e.msgstr, e.flags, e.line FROM entries e JOIN files f ON f.id = e.file_id "
+                 "WHERE f.tree = ? ORDER BY f.path, e.line")
+        selected = set(relative_paths) if relative_paths is not None else None
+        for path, msgctxt, msgid, msgstr, flags, line in self.db.execute(query, (tree,)):
+            if selected is None or path in selected:
+                yield path, po_corpus.PoEntry(msgctxt, msgid, msgstr, tuple(flags.split(",")) if flags else (), line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Indice persistente delle voci dei file PO.")
+    parser.add_argument("--corpus", default=po_corpus.CORPUS_DIR, help="Cartella con 'File Estratti Originali' e 'File Estratti Tradotti'.")
+    parser.add_argument("--index", default=INDEX_FILE, help="File dell'indice SQLite.")
+    parser.add_argument("--workers", type=int, default=po_corpus.WORKERS, help="Processi usati per leggere i file.")
+    parser.add_argument("--lookup", nargs=2, metavar=("FILE", "MSGCTXT"), help="Mostra originale e traduzione di una voce (msgctxt con gli escape PO, es. \"224\\t355\").")
+    args = parser.parse_args(argv)
+
+    with PoIndex(args.index, args.corpus) as index:
+        start = time.perf_counter()
+        stats = index.refresh(args.workers)
+        print(f"Indice aggiornato in {time.perf_counter() - start:.2f} s: {stats['indicizzati']} file, {stats['letti']} riletti, "
+              f"{stats['invariati']} invariati, {stats['rimossi']} rimossi.")
+        if args.lookup:
+            relative_path, msgctxt = args.lookup[0], po_corpus.unescape(args.lookup[1])
+            original = index.lookup(ORIGINAL, relative_path, msgctxt)
+            translated = index.lookup(TRANSLATED, relative_path, msgctxt)
+            if original is None and translated is None:
+                print(f"Voce non trovata: {relative_path} [{args.lookup[1]}]")
+                return 1
+            print(f"{relative_path} [{args.lookup[1]}]")
+            print(f"   msgid:  {(original or translated)[0]}")
+            print(f"   msgstr: {translated[1] if translated else '(file tradotto mancante)'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
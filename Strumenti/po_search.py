@@ -0,0 +1,147 @@
+"""
+;==========================================
+; Title:  po_search.py
+; Author: zSavT
+; Date:   18/10/2026
+;==========================================
+
+Ricerca testuale nelle voci originali e tradotte di tutti i file PO, con
+risultati affiancati (testo inglese e traduzione, file e msgctxt), per
+controllare ad esempio come è stato tradotto un termine in tutto il gioco.
+
+La ricerca usa gli indici invertiti FTS5 di SQLite, aggiunti all'indice di
+po_index.py e aggiornati automaticamente insieme a esso:
+
+- per parole (predefinita): trova la sequenza di parole indicata, senza
+  distinguere maiuscole, minuscole e accenti ("tojo clan" trova "Tojo Clan");
+- per sottostringa (--ngram): indice per trigrammi, trova qualunque parte di
+  parola di almeno 3 caratteri ("Tenkai" trova "Tenkaichi Street").
+
+    python po_search.py "Tojo Clan"
+    python po_search.py --campo msgstr --ngram "Tenkaichi"
+
+Richiede SQLite 3.34 o successivo (incluso nelle versioni recenti di Python).
+"""
+
+import sys      # Per il codice di uscita
+import time     # Per il tempo impiegato
+import sqlite3  # Per gli errori di SQLite
+import argparse # Per le opzioni da riga di comando
+
+import po_corpus
+import po_index
+
+# --- Costanti Globali ---
+# Modalità di ricerca: tabella FTS5 e tokenizer usato per indicizzare msgid e msgstr
+SEARCH_TABLES = {
+    "parole": ("search_words", "unicode61 remove_diacritics 2"),
+    "ngram": ("search_ngrams", "trigram"),
+}
+NGRAM_SIZE = 3   # Lunghezza minima delle ricerche per sottostringa
+DEFAULT_LIMIT = 50
+
+
+def ensure_search_tables(index):
+    """
+    Crea, se mancano, le tabelle di ricerca nell'indice e le riempie con le voci già presenti.
+    Dei trigger le mantengono allineate alla tabella delle voci a ogni aggiornamento.
+
+    Raises:
+        RuntimeError: Se la versione di SQLite non supporta FTS5 o il tokenizer a trigrammi.
+    """
+    for table, tokenizer in SEARCH_TABLES.values():
+        if index.db.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (table,)).fetchone():
+            continue
+        try:
+            with index.db:
+                index.db.execute(f"CREATE VIRTUAL TABLE {table} USING fts5(msgid, msgstr, content='entries', content_rowid='id', tokenize='{tokenizer}')")
+                index.db.execute(f"CREATE TRIGGER {table}_insert AFTER INSERT ON entries BEGIN "
+                                 f"INSERT INTO {table} (rowid, msgid, msgstr) VALUES (new.id, new.msgid, new.msgstr); END")
+                index.db.execute(f"CREATE TRIGGER {table}_delete AFTER DELETE ON entries BEGIN "
+                                 f"INSERT INTO {table} ({table}, rowid, msgid, msgstr) VALUES ('delete', old.id, old.msgid, old.msgstr); END")
+                index.db.execute(f"INSERT INTO {table} ({table}) VALUES ('rebuild')")
+        except sqlite3.OperationalError as e:
+            raise RuntimeError(f"La versione di SQLite in uso ({sqlite3.sqlite_version}) non supporta la ricerca testuale: {e}") from e
+
+
+def search(index, text, mode="parole", field=None, limit=DEFAULT_LIMIT):
+    """
+    Cerca un testo nelle voci dell'indice.
+
+    Le voci con lo stesso file e msgctxt negli alberi originale e tradotto sono
+    riunite in un unico risultato, con il testo inglese e la traduzione.
+
+    Args:
+        index (po_index.PoIndex): L'indice, con le tabelle di ricerca (ensure_search_tables).
+        text (str): Il testo da cercare.
+        mode (str): "parole" oppure "ngram" (sottostringa).
+        field (str | None): "msgid" o "msgstr" per cercare in un solo campo.
+        limit (int): Numero massimo di risultati restituiti.
+
+    Returns:
+        tuple: (lista di dizionari {"path", "msgctxt", "msgid", "msgstr"}, numero totale di risultati).
+               "msgstr" è None se il file tradotto non esiste.
+    """
+    table = SEARCH_TABLES[mode][0]
+    query = '"' + text.replace('"', '""') + '"'
+    if field: query = f"{field} : {query}"
+    rows = index.db.execute(f"SELECT f.tree, f.path, e.msgctxt, e.msgid, e.msgstr FROM {table} s "
+                            f"JOIN entries e ON e.id = s.rowid JOIN files f ON f.id = e.file_id "
+                            f"WHERE {table} MATCH ? ORDER BY f.path, e.line", (query,))
+    hits = {}
+    for tree, path, msgctxt, msgid, msgstr in rows:
+        key = (path, msgctxt)
+        if tree == po_index.TRANSLATED:
+            hits[key] = {"path": path, "msgctxt": msgctxt, "msgid": msgid, "msgstr": msgstr}
+        elif key not in hits:
+            hits[key] = {"path": path, "msgctxt": msgctxt, "msgid": msgid, "msgstr": None}
+    results = list(hits.values())[:limit]
+    for result in results:
+        # Voce trovata solo nell'originale: si recupera la traduzione, se esiste
+        if result["msgstr"] is None:
+            translated = index.lookup(po_index.TRANSLATED, result["path"], result["msgctxt"])
+            if translated: result["msgstr"] = translated[1]
+    return results, len(hits)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ricerca testuale nei file PO originali e tradotti.")
+    parser.add_argument("testo", help="Testo da cercare.")
+    parser.add_argument("--ngram", action="store_true", help=f"Cerca come sottostringa (almeno {NGRAM_SIZE} caratteri) invece che per parole intere.")
+    parser.add_argument("--campo", choices=("msgid", "msgstr"), help="Cerca solo nel testo originale (msgid) o nella traduzione (msgstr).")
+    parser.add_argument("--limite", type=int, default=DEFAULT_LIMIT, help=f"Numero massimo di risultati mostrati (predefinito: {DEFAULT_LIMIT}).")
+    parser.add_argument("--corpus", default=po_corpus.CORPUS_DIR, help="Cartella con 'File Estratti Originali' e 'File Estratti Tradotti'.")
+    parser.add_argument("--index", default=po_index.INDEX_FILE, help="File dell'indice SQLite.")
+    parser.add_argument("--no-refresh", action="store_true", help="Non aggiorna l'indice prima della ricerca.")
+    args = parser.parse_args(argv)
+
+    mode = "ngram" if args.ngram else "parole"
+    if mode == "ngram" and len(args.testo) < NGRAM_SIZE:
+        print(f"La ricerca per sottostringa richiede almeno {NGRAM_SIZE} caratteri.")
+        return 1
+    with po_index.PoIndex(args.index, args.corpus) as index:
+        # Prima l'aggiornamento e poi le tabelle di ricerca: se mancano vengono
+        # riempite in blocco, molto più velocemente che una voce alla volta
+        if not args.no_refresh: index.refresh()
+        try:
+            ensure_search_tables(index)
+        except RuntimeError as e:
+            print(e)
+            return 1
+        start = time.perf_counter()
+        results, total = search(index, args.testo, mode, args.campo, args.limite)
+        elapsed = time.perf_counter() - start
+    for result in results:
+        # Un risultato per riga: gli a capo vengono mostrati come nei file PO
+        msgid = result["msgid"].replace("\n", "\\n")
+        msgstr = result["msgstr"].replace("\n", "\\n") if result["msgstr"] is not None else "(file tradotto mancante)"
+        print(f"{result['path']} [{po_corpus.escape(result['msgctxt'] or '')}]")
+        print(f"   EN: {msgid}")
+        print(f"   IT: {msgstr}")
+    shown = f", mostrati i primi {len(results)}" if total > len(results) else ""
+    print(f"{total} risultati in {elapsed * 1000:.1f} ms{shown}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,190 @@
+"""
+;==========================================
+; Title:  subtitle_timing.py
+; Author: zSavT
+; Date:   18/10/2026
+;==========================================
+
+Analisi della velocità di lettura dei sottotitoli dei filmati.
+
+Nei file di "data/auth/subtitle" e "data/hact/subtitle" ogni sottotitolo ha
+come msgctxt i fotogrammi di inizio e fine ("224\\t355"). Tutti i sottotitoli
+vengono caricati in array NumPy per colonna (file, fotogrammi, caratteri del
+testo inglese e della traduzione) e in un'unica passata vettoriale si calcolano:
+
+- la velocità di lettura, in caratteri al secondo (CPS) della traduzione;
+- il rapporto di espansione (lunghezza della traduzione / lunghezza dell'inglese);
+- le sovrapposizioni tra sottotitoli consecutivi dello stesso filmato.
+
+Vengono poi elencati i filmati con sottotitoli oltre le soglie di leggibilità.
+Nel conteggio dei caratteri i tag (<Italic>, <Color:...>) non vengono
+considerati e l'a capo ("\\n") vale un carattere.
+
+    python subtitle_timing.py
+    python subtitle_timing.py --cps 15 --dettagli
+
+Richiede NumPy (pip install numpy).
+"""
+
+import re       # Per msgctxt e tag
+import sys      # Per il codice di uscita
+import time     # Per il tempo impiegato
+import argparse # Per le opzioni da riga di comando
+try:
+    import numpy as np # Per i calcoli su tutti i sottotitoli
+except ImportError:
+    np = None
+
+import po_corpus
+
+# --- Costanti Globali ---
+SUBTITLE_DIRS = ("auth/subtitle/", "hact/subtitle/") # Cartelle dei sottotitoli, relative a 'data'
+FPS = 30              # Fotogrammi al secondo dei filmati
+MAX_CPS = 17.0        # Caratteri al secondo oltre i quali un sottotitolo è difficile da leggere
+MAX_EXPANSION = 1.5   # Rapporto massimo tra lunghezza della traduzione e dell'inglese
+
+_FRAMES_RE = re.compile(r"(\d+)\t(\d+)")
+_MARKUP_RE = re.compile(r"<[^<>]*>")
+
+
+def visible_length(text):
+    """Numero di caratteri mostrati a schermo: senza tag e con l'a capo del gioco ("\\n") come un solo carattere."""
+    return len(_MARKUP_RE.sub("", text).replace("\\n", "\n"))
+
+
+def load_subtitles(data_dir, workers=po_corpus.WORKERS):
+    """
+    Carica tutti i sottotitoli di una cartella 'data' tradotta in array per colonna.
+
+    Le voci con msgctxt diverso da "inizio\\tfine" vengono ignorate.
+
+    Returns:
+        dict: {
+            "files": lista dei percorsi relativi dei filmati,
+            "entries": lista delle PoEntry (stesso ordine degli array),
+            "file": indice del file di ogni sottotitolo (in "files"),
+            "start", "end": fotogrammi di inizio e fine,
+            "en_chars", "it_chars": caratteri del testo inglese e della traduzione (0 se non tradotto),
+        }
+    """
+    files = [path for path in po_corpus.list_po_files(data_dir) if path.startswith(SUBTITLE_DIRS)]
+    tree = po_corpus.load_tree(data_dir, files, workers)
+    entries, columns = [], []
+    for file_index, path in enumerate(files):
+        for entry in tree[path]:
+            frames = _FRAMES_RE.fullmatch(entry.msgctxt or "")
+            if not frames:
+                continue
+            entries.append(entry)
+            columns.append((file_index, int(frames.group(1)), int(frames.group(2)), visible_length(entry.msgid), visible_length(entry.msgstr)))
+    table = np.array(columns, dtype=np.int64).reshape(-1, 5)
+    return {
+        "files": files,
+        "entries": entries,
+        "file": table[:, 0],
+        "start": table[:, 1],
+        "end": table[:, 2],
+        "en_chars": table[:, 3],
+        "it_chars": table[:, 4],
+    }
+
+
+def analyze(subtitles, fps=FPS, max_cps=MAX_CPS, max_expansion=MAX_EXPANSION):
+    """
+    Calcola durate, velocità di lettura, espansione e sovrapposizioni di tutti i sottotitoli.
+
+    Returns:
+        dict: Array per sottotitolo ("duration" in secondi, "cps", "en_cps", "expansion",
+              "translated", "too_fast", "too_long", "overlap", "invalid") e per filmato
+              ("file_count", "file_too_fast", "file_too_long", "file_overlap", "file_max_cps").
+    """
+    start, end = subtitles["start"], subtitles["end"]
+    en_chars, it_chars = subtitles["en_chars"], subtitles["it_chars"]
+    duration = (end - start) / fps
+    invalid = duration <= 0
+    safe_duration = np.where(invalid, np.nan, duration)
+    translated = it_chars > 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cps = np.where(translated, it_chars / safe_duration, np.nan)
+        en_cps = en_chars / safe_duration
+        expansion = np.where(translated & (en_chars > 0), it_chars / np.maximum(en_chars, 1), np.nan)
+    too_fast = np.nan_to_num(cps) > max_cps
+    too_long = np.nan_to_num(expansion) > max_expansion
+    # Sovrapposizioni: sottotitoli ordinati per filmato e inizio, il successivo inizia prima della fine del precedente
+    order = np.lexsort((start, subtitles["file"]))
+    same_file = subtitles["file"][order][1:] == subtitles["file"][order][:-1]
+    overlapping = same_file & (start[order][1:] < end[order][:-1])
+    overlap = np.zeros(len(start), dtype=bool)
+    overlap[order[1:][overlapping]] = True
+    file_count = len(subtitles["files"])
+    file_max_cps = np.zeros(file_count)
+    np.maximum.at(file_max_cps, subtitles["file"], np.nan_to_num(cps))
+    return {
+        "duration": duration,
+        "cps": cps,
+        "en_cps": en_cps,
+        "expansion": expansion,
+        "translated": translated,
+        "too_fast": too_fast,
+        "too_long": too_long,
+        "overlap": overlap,
+        "invalid": invalid,
+        "file_count": np.bincount(subtitles["file"], minlength=file_count),
+        "file_too_fast": np.bincount(subtitles["file"], weights=too_fast, minlength=file_count).astype(int),
+        "file_too_long": np.bincount(subtitles["file"], weights=too_long, minlength=file_count).astype(int),
+        "file_overlap": np.bincount(subtitles["file"], weights=overlap | invalid, minlength=file_count).astype(int),
+        "file_max_cps": file_max_cps,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Velocità di lettura e tempi dei sottotitoli dei filmati.")
+    parser.add_argument("--corpus", default=po_corpus.CORPUS_DIR, help="Cartella con 'File Estratti Tradotti'.")
+    parser.add_argument("--workers", type=int, default=po_corpus.WORKERS, help="Processi usati per leggere i file.")
+    parser.add_argument("--fps", type=float, default=FPS, help=f"Fotogrammi al secondo dei filmati (predefinito: {FPS}).")
+    parser.add_argument("--cps", type=float, default=MAX_CPS, help=f"Caratteri al secondo massimi (predefinito: {MAX_CPS:g}).")
+    parser.add_argument("--espansione", type=float, default=MAX_EXPANSION, help=f"Rapporto massimo traduzione/inglese (predefinito: {MAX_EXPANSION:g}).")
+    parser.add_argument("--dettagli", action="store_true", help="Mostra ogni sottotitolo oltre le soglie.")
+    args = parser.parse_args(argv)
+
+    if np is None:
+        print("❌ Questo strumento richiede NumPy: pip install numpy")
+        return 1
+    data_dir = po_corpus.data_dirs(args.corpus)[1]
+    start = time.perf_counter()
+    subtitles = load_subtitles(data_dir, args.workers)
+    loaded = time.perf_counter()
+    result = analyze(subtitles, args.fps, args.cps, args.espansione)
+    analyzed = time.perf_counter()
+
+    files = subtitles["files"]
+    # Filmati oltre le soglie di leggibilità; le sovrapposizioni, che dipendono dai tempi
+    # del gioco e non dalla traduzione, sono solo riportate
+    flagged = np.flatnonzero(result["file_too_fast"] + result["file_too_long"])
+    # Prima i filmati con la quota maggiore di sottotitoli troppo veloci
+    flagged = flagged[np.argsort(-(result["file_too_fast"][flagged] / result["file_count"][flagged]), kind="stable")]
+    for file_index in flagged:
+        print(f"⚠️ {files[file_index]}: {result['file_too_fast'][file_index]}/{result['file_count'][file_index]} sottotitoli oltre {args.cps:g} CPS "
+              f"(massimo {result['file_max_cps'][file_index]:.1f}), {result['file_too_long'][file_index]} oltre l'espansione massima, "
+              f"{result['file_overlap'][file_index]} sovrapposti")
+        if not args.dettagli:
+            continue
+        for index in np.flatnonzero((subtitles["file"] == file_index) & (result["too_fast"] | result["too_long"] | result["overlap"] | result["invalid"])):
+            entry = subtitles["entries"][index]
+            problem = "sovrapposto al precedente" if result["overlap"][index] else "durata non valida" if result["invalid"][index] else \
+                      f"{result['cps'][index]:.1f} CPS (inglese {result['en_cps'][index]:.1f}), espansione {result['expansion'][index]:.2f}"
+            print(f"   {entry.line} [{po_corpus.escape(entry.msgctxt)}] {result['duration'][index]:.2f} s, {problem}")
+            print(f"      IT: {entry.msgstr}" if entry.msgstr else f"      EN: {entry.msgid}")
+    translated = result["translated"]
+    print(f"{len(subtitles['entries'])} sottotitoli in {len(files)} filmati ({translated.sum()} tradotti), "
+          f"letti in {loaded - start:.1f} s e analizzati in {(analyzed - loaded) * 1000:.1f} ms.")
+    if translated.any():
+        print(f"CPS mediani: {np.nanmedian(result['cps']):.1f} (inglese {np.nanmedian(result['en_cps'][translated]):.1f}), "
+              f"espansione mediana {np.nanmedian(result['expansion']):.2f}; {result['too_fast'].sum()} sottotitoli oltre {args.cps:g} CPS, "
+              f"{result['too_long'].sum()} oltre l'espansione {args.espansione:g}, {result['overlap'].sum()} sovrapposti, "
+              f"{result['invalid'].sum()} con durata non valida; {len(flagged)} filmati da controllare.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
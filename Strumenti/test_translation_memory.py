@@ -0,0 +1,57 @@
+"""
+;==========================================
+; Title:  test_translation_memory.py
+; Author: zSavT
+; Date:   18/10/2026
+;==========================================
+
+Test della compilazione delle voci con la memoria di traduzione (--riempi).
+
+    python -m pytest Strumenti/test_translation_memory.py
+"""
+
+import os
+
+import po_corpus
+import translation_memory
+
+HEADER = 'msgid ""\nmsgstr ""\n"Content-Type: text/plain; charset=utf-8\\n"\n\n'
+
+
+def write_po(corpus_dir, tree, relative_path, entries):
+    """Scrive un file PO con le voci (msgctxt, msgid, msgstr) indicate e ne ritorna il percorso."""
+    path = os.path.join(corpus_dir, tree, po_corpus.DATA_DIR, *relative_path.split("/"))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        f.write(HEADER + "".join(f'msgctxt "{ctxt}"\nmsgid "{msgid}"\nmsgstr "{msgstr}"\n\n' for ctxt, msgid, msgstr in entries))
+    return path
+
+
+def fill(tmp_path, translated, untranslated):
+    """Crea un corpus con un file tradotto e uno da compilare, esegue --riempi e ritorna le voci compilate."""
+    corpus_dir = str(tmp_path / "corpus")
+    for tree in (po_corpus.ORIGINAL_DIR, po_corpus.TRANSLATED_DIR):
+        write_po(corpus_dir, tree, "msg/tradotto.po", [(str(i), msgid, msgstr if tree == po_corpus.TRANSLATED_DIR else "")
+                                                       for i, (msgid, msgstr) in enumerate(translated)])
+        path = write_po(corpus_dir, tree, "msg/da_tradurre.po", [(str(i), msgid, "") for i, msgid in enumerate(untranslated)])
+    assert translation_memory.main(["--riempi", "--corpus", corpus_dir, "--index", str(tmp_path / "indice.sqlite")]) == 0
+    return {entry.msgid: (entry.msgstr, translation_memory.FUZZY in entry.flags) for entry in po_corpus.read_po(path)}
+
+
+def test_key_msgid_only_filled_with_exact_match(tmp_path):
+    filled = fill(tmp_path, [("adv_p1c1_010/akiyama_0097", "adv_p1c1_010/akiyama_0097"), ("adv_p1c1_010/kiryu_0001", "adv_p1c1_010/kiryu_0001")],
+                  ["adv_p1c1_010/akiyama_0098", "adv_p1c1_010/kiryu_0001"])
+    assert filled["adv_p1c1_010/akiyama_0098"] == ("", False)
+    assert filled["adv_p1c1_010/kiryu_0001"] == ("adv_p1c1_010/kiryu_0001", False)
+
+
+def test_near_match_differing_only_in_numbers_not_filled(tmp_path):
+    filled = fill(tmp_path, [("You have 300 yen left in your wallet.", "Ti restano 300 yen nel portafoglio.")],
+                  ["You have 500 yen left in your wallet."])
+    assert filled["You have 500 yen left in your wallet."] == ("", False)
+
+
+def test_near_match_sentence_filled_as_fuzzy(tmp_path):
+    filled = fill(tmp_path, [("Thanks for taking me out, Kiryu-san.", "Grazie per avermi portata fuori, Kiryu-san.")],
+                  ["Thanks for taking me out, Kiryu-chan."])
+    assert filled["Thanks for taking me out, Kiryu-chan."] == ("Grazie per avermi portata fuori, Kiryu-san.", True)
@@ -0,0 +1,313 @@
+"""
+;==========================================
+; Title:  translation_memory.py
+; Author: zSavT
+; Date:   18/10/2026
+;==========================================
+
+Memoria di traduzione costruita da tutte le coppie msgid -> msgstr già tradotte
+(lette dall'indice di po_index.py).
+
+La stessa frase inglese compare spesso in molti file (pac_STID_*, i commenti
+di "ikusei", i sottotitoli) e ogni copia viene tradotta a parte. La memoria
+permette di riutilizzare le traduzioni esistenti:
+
+- corrispondenze esatte: tabella hash msgid -> traduzioni (la più usata per prima);
+- corrispondenze simili: firme MinHash dei trigrammi di caratteri, divise in
+  bande (LSH). Le frasi con almeno una banda uguale sono le candidate, ordinate
+  poi per somiglianza (Jaccard dei trigrammi). Ogni ricerca legge solo poche
+  celle della tabella, qualunque sia il numero di frasi in memoria.
+
+    python translation_memory.py --cerca "Thanks, Kiryu-san."
+    python translation_memory.py "File Traduzione/File Estratti Tradotti/data/ikusei/01_sug_master_comment.po"
+    python translation_memory.py --riempi
+
+Con --riempi le voci non tradotte dei file indicati (o di tutti i file tradotti)
+vengono compilate: con la traduzione esatta, oppure con la più simile
+(somiglianza almeno FILL_SIMILARITY) segnata come "#, fuzzy" da ricontrollare.
+I msgid che sembrano identificatori ("adv_p1c1_010/akiyama_0098") e i testi
+che differiscono da quello simile solo per numeri o punteggiatura vengono
+compilati solo con la traduzione esatta: la traduzione simile sarebbe quella
+di un'altra chiave o di un altro numero.
+"""
+
+import os           # Per i percorsi dei file
+import re           # Per il confronto dei testi senza numeri e punteggiatura
+import sys          # Per il codice di uscita
+import time         # Per il tempo impiegato
+import zlib         # Per l'hash (stabile) dei trigrammi
+import argparse     # Per le opzioni da riga di comando
+import itertools    # Per raggruppare le voci per file
+import collections  # Per il conteggio delle traduzioni
+
+import po_corpus
+import po_index
+
+# --- Costanti Globali ---
+NGRAM_SIZE = 3         # Lunghezza dei trigrammi di caratteri
+SIGNATURE_SIZE = 40    # Valori della firma MinHash (una permutazione, divisa in SIGNATURE_SIZE parti)
+BAND_SIZE = 4          # Valori per banda: le frasi con una banda uguale sono candidate
+MAX_CANDIDATES = 128   # Candidate confrontate per ogni ricerca (quelle con più bande uguali)
+MIN_SIMILARITY = 0.5   # Somiglianza minima dei suggerimenti
+FILL_SIMILARITY = 0.8  # Somiglianza minima per compilare una voce come "fuzzy"
+DEFAULT_LIMIT = 5
+FUZZY = "fuzzy"
+KEY_CHARS = ("/", "_") # Caratteri che indicano un identificatore e non una frase
+
+_NON_LETTERS_RE = re.compile(r"[\W\d_]+")
+
+
+def shingles(text):
+    """Insieme dei trigrammi di caratteri del testo (minuscolo, spazi normalizzati)."""
+    text = " ".join(text.lower().split())
+    if len(text) <= NGRAM_SIZE:
+        return {text}
+    return {text[i:i + NGRAM_SIZE] for i in range(len(text) - NGRAM_SIZE + 1)}
+
+
+def signature(grams):
+    """
+    Firma MinHash con una sola funzione di hash ("one permutation hashing"): ogni
+    trigramma viene assegnato a una delle SIGNATURE_SIZE parti in base al suo hash
+    e per ogni parte si conserva il valore minimo.
+
+    Nelle frasi brevi molte parti restano vuote: ognuna prende il valore della prima
+    parte non vuota che la segue (in modo circolare), insieme alla distanza, così
+    che tutte le frasi abbiano la firma completa e quindi tutte le bande.
+    """
+    minimum = [None] * SIGNATURE_SIZE
+    for gram in grams:
+        value = zlib.crc32(gram.encode("utf-8", "surrogateescape"))
+        part, value = value % SIGNATURE_SIZE, value // SIGNATURE_SIZE
+        if minimum[part] is None or value < minimum[part]:
+            minimum[part] = value
+    values = list(minimum)
+    for part in range(SIGNATURE_SIZE):
+        if minimum[part] is None:
+            for distance in range(1, SIGNATURE_SIZE):
+                borrowed = minimum[(part + distance) % SIGNATURE_SIZE]
+                if borrowed is not None:
+                    values[part] = (borrowed, distance)
+                    break
+    return values
+
+
+def band_keys(grams):
+    """Chiavi delle bande della firma: (inizio della banda, valori della banda)."""
+    values = signature(grams)
+    return [(band, tuple(values[band:band + BAND_SIZE])) for band in range(0, SIGNATURE_SIZE, BAND_SIZE)]
+
+
+class TranslationMemory:
+    """
+    Memoria di traduzione in RAM:
+
+        memory = TranslationMemory.from_index(index)
+        memory.exact("Thanks.")                # [(traduzione, occorrenze), ...]
+        memory.suggest("Thanks, Kiryu-san.")   # [(somiglianza, msgid, traduzione, occorrenze), ...]
+    """
+    def __init__(self):
+        self.translations = {} # msgid -> Counter delle traduzioni
+        self.buckets = {}      # (banda, valori) -> lista dei msgid
+    def __len__(self):
+        return len(self.translations)
+    def add(self, msgid, msgstr):
+        counter = self.translations.get(msgid)
+        if counter is None:
+            counter = self.translations[msgid] = collections.Counter()
+            for key in band_keys(shingles(msgid)):
+                self.buckets.setdefault(key, []).append(msgid)
+        counter[msgstr] += 1
+    @classmethod
+    def from_index(cls, index):
+        """Costruisce la memoria dalle voci tradotte dell'indice (senza le voci vuote o "fuzzy")."""
+        memory = cls()
+        for _, entry in index.iter_entries(po_index.TRANSLATED):
+            if entry.msgid and entry.msgstr and FUZZY not in entry.flags:
+                memory.add(entry.msgid, entry.msgstr)
+        return memory
+    def exact(self, msgid):
+        """Ritorna le traduzioni esatte di msgid, dalla più usata: [(traduzione, occorrenze), ...]."""
+        counter = self.translations.get(msgid)
+        return counter.most_common() if counter else []
+    def suggest(self, msgid, limit=DEFAULT_LIMIT, min_similarity=MIN_SIMILARITY):
+        """
+        Suggerimenti per un testo, dal più simile.
+
+        Returns:
+            list[tuple]: (somiglianza da 0 a 1, msgid in memoria, traduzione più usata, occorrenze).
+                         La corrispondenza esatta, se presente, è sempre la prima.
+        """
+        grams = shingles(msgid)
+        keys = band_keys(grams)
+        candidates = collections.Counter()
+        for key in keys:
+            candidates.update(self.buckets.get(key, ()))
+        if msgid in self.translations:
+            candidates[msgid] += len(keys) # La corrispondenza esatta è sempre confrontata
+        ranked = []
+        # Il numero di bande uguali stima la somiglianza: si confrontano solo le candidate migliori
+        for candidate, _ in candidates.most_common(MAX_CANDIDATES):
+            other = shingles(candidate)
+            similarity = len(grams & other) / len(grams | other)
+            if similarity >= min_similarity:
+                translation, count = self.translations[candidate].most_common(1)[0]
+                ranked.append((similarity, candidate, translation, count))
+        ranked.sort(key=lambda item: (item[1] != msgid, -item[0], -item[3], item[1]))
+        return ranked[:limit]
+
+
+def adapt_line_breaks(translation, msgid):
+    """
+    Adatta gli a capo di una traduzione presa da un'altra voce a quelli del testo da
+    tradurre: i sottotitoli usano "\\n" (barra e n), gli altri testi l'a capo vero.
+    """
+    if "\\n" in msgid and "\n" not in msgid:
+        return translation.replace("\n", "\\n")
+    if "\n" in msgid and "\\n" not in msgid:
+        return translation.replace("\\n", "\n")
+    return translation
+
+
+def fill_po(path, fills):
+    """
+    Compila voci non tradotte di un file PO, lasciando invariato il resto del file.
+
+    Args:
+        path (str): Il file PO.
+        fills (dict): {riga di inizio della voce (PoEntry.line): (traduzione, True se da segnare come fuzzy)}.
+
+    Returns:
+        int: Numero di voci compilate (le voci con msgstr non vuoto o su più righe vengono saltate).
+    """
+    with open(path, "r", encoding="utf-8", errors="surrogateescape", newline="") as f:
+        lines = f.read().splitlines(keepends=True)
+    filled = 0
+    for start in sorted(fills, reverse=True): # Dal fondo, per non spostare le righe ancora da modificare
+        translation, fuzzy = fills[start]
+        index = start - 1
+        while index < len(lines) and not lines[index].startswith("msgstr"):
+            index += 1
+        if index >= len(lines) or lines[index].rstrip("\r\n") != 'msgstr ""' or \
+           (index + 1 < len(lines) and lines[index + 1].lstrip().startswith('"')):
+            continue
+        newline = lines[index][len('msgstr ""'):]
+        lines[index] = f'msgstr "{po_corpus.escape(translation)}"{newline}'
+        if fuzzy:
+            # Commenti della voce, subito prima della sua prima riga: se c'è già una riga
+            # di flag ("#, c-format") si aggiunge "fuzzy" a quella, altrimenti se ne crea una
+            flags_index = start - 2
+            while flags_index >= 0 and lines[flags_index].startswith("#") and not lines[flags_index].startswith("#,"):
+                flags_index -= 1
+            if flags_index >= 0 and lines[flags_index].startswith("#,"):
+                flags_line = lines[flags_index].rstrip("\r\n")
+                if FUZZY not in (flag.strip() for flag in flags_line[2:].split(",")):
+                    lines[flags_index] = f"{flags_line}, {FUZZY}{lines[flags_index][len(flags_line):]}"
+            else:
+                lines.insert(start - 1, f"#, {FUZZY}{newline or os.linesep}")
+        filled += 1
+    if filled:
+        with open(path, "w", encoding="utf-8", errors="surrogateescape", newline="") as f:
+            f.write("".join(lines))
+    return filled
+
+
+def is_key(msgid):
+    """Vero se il msgid sembra un identificatore (nessuno spazio, oppure con "/" o "_") e non una frase."""
+    return len(msgid.split()) < 2 or any(char in msgid for char in KEY_CHARS)
+
+
+def can_fill(msgid, source):
+    """
+    Indica se la traduzione di source può compilare la voce msgid.
+
+    Una traduzione simile non viene usata per gli identificatori, né se i due testi
+    differiscono solo per numeri o punteggiatura: sarebbe la traduzione di un'altra
+    chiave ("akiyama_0097" al posto di "akiyama_0098") o riporterebbe il numero sbagliato.
+    """
+    if source == msgid:
+        return True
+    return not is_key(msgid) and _NON_LETTERS_RE.sub("", msgid.lower()) != _NON_LETTERS_RE.sub("", source.lower())
+
+
+def relative_to_data(path, data_dir):
+    """Percorso relativo alla cartella 'data' tradotta (con "/"), oppure None se il file è altrove."""
+    relative = os.path.relpath(os.path.abspath(path), os.path.abspath(data_dir))
+    return None if relative.startswith("..") else relative.replace(os.sep, "/")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Memoria di traduzione con suggerimenti dalle traduzioni esistenti.")
+    parser.add_argument("files", nargs="*", help="File PO tradotti di cui mostrare i suggerimenti per le voci non tradotte o fuzzy.")
+    parser.add_argument("--cerca", metavar="TESTO", help="Mostra le traduzioni esistenti di un testo inglese e dei testi simili.")
+    parser.add_argument("--riempi", action="store_true", help="Compila le voci non tradotte (dei file indicati o di tutti i file tradotti).")
+    parser.add_argument("--limite", type=int, default=DEFAULT_LIMIT, help=f"Suggerimenti mostrati per voce (predefinito: {DEFAULT_LIMIT}).")
+    parser.add_argument("--corpus", default=po_corpus.CORPUS_DIR, help="Cartella con 'File Estratti Originali' e 'File Estratti Tradotti'.")
+    parser.add_argument("--index", default=po_index.INDEX_FILE, help="File dell'indice SQLite.")
+    parser.add_argument("--no-refresh", action="store_true", help="Non aggiorna l'indice prima di costruire la memoria.")
+    args = parser.parse_args(argv)
+
+    with po_index.PoIndex(args.index, args.corpus) as index:
+        if not args.no_refresh: index.refresh()
+        start = time.perf_counter()
+        memory = TranslationMemory.from_index(index)
+        print(f"Memoria costruita in {time.perf_counter() - start:.1f} s: {len(memory)} testi inglesi tradotti.")
+        if args.cerca:
+            start = time.perf_counter()
+            suggestions = memory.suggest(args.cerca, args.limite)
+            elapsed = time.perf_counter() - start
+            for similarity, msgid, msgstr, count in suggestions:
+                print(f"{similarity:4.0%} ({count}x) EN: {msgid}")
+                print(f"           IT: {msgstr}")
+            print(f"{len(suggestions)} suggerimenti in {elapsed * 1000:.2f} ms.")
+            return 0
+        data_dir = index.data_dir(po_index.TRANSLATED)
+        if args.files:
+            relative_paths = []
+            for path in args.files:
+                relative = relative_to_data(path, data_dir)
+                if relative is None:
+                    print(f"❌ Il file '{path}' non si trova in '{data_dir}'.")
+                    return 1
+                relative_paths.append(relative)
+        else:
+            relative_paths = None
+        counts = {"esatte": 0, "simili": 0, "senza": 0}
+        lookups, lookup_time = 0, 0.0
+        for relative_path, entries in itertools.groupby(index.iter_entries(po_index.TRANSLATED, relative_paths), key=lambda item: item[0]):
+            fills = {}
+            for _, entry in entries:
+                if not entry.msgid or (entry.msgstr and FUZZY not in entry.flags):
+                    continue
+                start = time.perf_counter()
+                suggestions = memory.suggest(entry.msgid, args.limite)
+                lookup_time += time.perf_counter() - start
+                lookups += 1
+                if not suggestions or suggestions[0][0] < FILL_SIMILARITY or not can_fill(entry.msgid, suggestions[0][1]):
+                    counts["senza"] += 1
+                elif suggestions[0][1] == entry.msgid:
+                    counts["esatte"] += 1
+                else:
+                    counts["simili"] += 1
+                if args.riempi:
+                    if not entry.msgstr and suggestions and suggestions[0][0] >= FILL_SIMILARITY and can_fill(entry.msgid, suggestions[0][1]):
+                        fills[entry.line] = (adapt_line_breaks(suggestions[0][2], entry.msgid), suggestions[0][1] != entry.msgid)
+                    continue
+                if not suggestions:
+                    continue
+                state = "fuzzy" if entry.msgstr else "non tradotta"
+                print(f"{relative_path}:{entry.line} [{po_corpus.escape(entry.msgctxt or '')}] ({state}) EN: {entry.msgid}")
+                for similarity, msgid, msgstr, count in suggestions:
+                    source = "" if msgid == entry.msgid else f" (da: {msgid})"
+                    print(f"   {similarity:4.0%} ({count}x) IT: {msgstr}{source}")
+            if fills:
+                filled = fill_po(os.path.join(data_dir, *relative_path.split("/")), fills)
+                print(f"✅ {relative_path}: {filled} voci compilate")
+        average = lookup_time / lookups * 1000 if lookups else 0.0
+        print(f"{lookups} voci non tradotte o fuzzy: {counts['esatte']} con traduzione esatta, {counts['simili']} con una traduzione simile, "
+              f"{counts['senza']} senza suggerimenti utilizzabili (ricerca media {average:.3f} ms).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())